@@ -0,0 +1,86 @@
+"""
+State Snapshot Benchmark
+
+Measures branch/restore cycles per second for a search-based planner, using
+clone_state/restore_state against copy.deepcopy of the whole environment.
+Each cycle branches from a mid-episode state and rolls out a few steps.
+
+Usage:
+    python benchmarks/clone_restore.py [--cycles 2000] [--rollout 5]
+"""
+# Standard imports
+import argparse
+import copy
+import os
+import time
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+
+
+def make_env(warmup_steps):
+    env = KuiperEscape(mode='agent', rock_rate=3, lives_start=3)
+    env.seed(0)
+    env.reset()
+    for i in range(warmup_steps):
+        env.step(i % 5)
+    return env
+
+
+def rollout(env, n_steps):
+    for i in range(n_steps):
+        observation, reward, done, info = env.step(i % 5)
+        if done:
+            break
+
+
+def cycles_snapshot(env, n_cycles, n_steps):
+    state = env.clone_state()
+    start = time.perf_counter()
+    for _ in range(n_cycles):
+        env.restore_state(state)
+        rollout(env, n_steps)
+    return n_cycles / (time.perf_counter() - start)
+
+
+def cycles_deepcopy(env, n_cycles, n_steps):
+    start = time.perf_counter()
+    for _ in range(n_cycles):
+        branch = copy.deepcopy(env)
+        rollout(branch, n_steps)
+    return n_cycles / (time.perf_counter() - start)
+
+
+def time_per_call(fn, n_calls):
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        fn()
+    return (time.perf_counter() - start) / n_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--cycles', type=int, default=2000)
+    parser.add_argument('--rollout', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=100)
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    env = make_env(args.warmup)
+    state = env.clone_state()
+    print('rocks on screen: {}'.format(len(env.game.rocks)))
+    print('{:<32} {:>10.1f} us'.format(
+        'clone_state', 1e6 * time_per_call(env.clone_state, args.cycles)
+    ))
+    print('{:<32} {:>10.1f} us'.format(
+        'restore_state', 1e6 * time_per_call(lambda: env.restore_state(state), args.cycles)
+    ))
+
+    rate = cycles_snapshot(env, args.cycles, args.rollout)
+    print('{:<32} {:>10.0f} cycles/sec'.format('clone/restore + rollout', rate))
+    rate = cycles_deepcopy(make_env(args.warmup), args.cycles // 10, args.rollout)
+    print('{:<32} {:>10.0f} cycles/sec'.format('deepcopy + rollout', rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Environment Server Benchmark
+
+Throughput of actor processes stepping environments hosted by an EnvServer
+over a Unix socket. Every actor owns `batch` environments and steps all of
+them with one request. Reports env steps/sec, and the mean number of
+requests served per stepping pass (the coalescing of concurrent actors),
+next to a KuiperEscape stepped in-process for reference.
+
+Usage:
+    python benchmarks/env_server.py [--steps 300]
+"""
+# Standard imports
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape, EnvClient, EnvServer
+
+ENV_KWARGS = {'rock_rate': 2}
+CASES = [(1, 1), (4, 1), (1, 8), (4, 8)]  # actors, envs per request
+
+
+def actor(path, env_ids, n_steps, start):
+    client = EnvClient(path)
+    client.reset(env_ids)
+    start.wait()
+    actions = np.zeros(len(env_ids), dtype=np.uint8)
+    for i in range(n_steps):
+        actions[:] = i % 5
+        client.step(env_ids, actions)
+    client.close()
+
+
+def server_throughput(path, n_actors, batch, n_steps):
+    ctx = mp.get_context('spawn')
+    start = ctx.Event()
+    actors = [
+        ctx.Process(target=actor, args=(path, list(range(k * batch, (k + 1) * batch)), n_steps, start))
+        for k in range(n_actors)
+    ]
+    for process in actors:
+        process.start()
+    client = EnvClient(path)
+    while client.stats()['requests'] < n_actors:
+        time.sleep(0.01)  # wait for the actors to reset their envs
+    before = client.stats()
+    t_start = time.perf_counter()
+    start.set()
+    for process in actors:
+        process.join()
+    elapsed = time.perf_counter() - t_start
+    after = client.stats()
+    client.close()
+    passes = after['passes'] - before['passes']
+    requests = after['requests'] - before['requests']
+    return n_actors * batch * n_steps / elapsed, requests / passes
+
+
+def local_throughput(n_steps):
+    env = KuiperEscape(**ENV_KWARGS)
+    env.seed(0)
+    env.reset()
+    start = time.perf_counter()
+    for i in range(n_steps):
+        env.step(i % 5)
+    return n_steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--steps', type=int, default=300,
+        help='requests per actor')
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    print('{:<28}{:>12.0f} steps/s'.format('local env', local_throughput(args.steps)))
+    n_envs = max(n_actors * batch for n_actors, batch in CASES)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'kuiper.sock')
+        for n_actors, batch in CASES:
+            server = EnvServer(n_envs=n_envs, env_kwargs=ENV_KWARGS)
+            server.start_thread(path)
+            steps_per_sec, coalesced = server_throughput(path, n_actors, batch, args.steps)
+            server.close()
+            os.remove(path)
+            print('{:<28}{:>12.0f} steps/s   {:.1f} requests/pass'.format(
+                '{} actors x {} envs/request'.format(n_actors, batch),
+                steps_per_sec, coalesced
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Fast Reset Benchmark
+
+Compares the latency of env.reset(), which resets the game in place, against
+rebuilding the Game and Lidar on every reset (the previous behavior). With
+pixel observations, a rebuilt game has to initialize pygame, the font and the
+display again before the first observation of the episode.
+
+Usage:
+    python benchmarks/fast_reset.py [--episodes 50] [--steps 20]
+"""
+# Standard imports
+import argparse
+import os
+import time
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+
+
+def rebuild_reset(env):
+    env.game = env.init_game()
+    env.lidar = env.init_lidar()
+    env.iteration = 0
+    return env.get_observation(reset=True)
+
+
+def reset_game(env, rebuild):
+    if rebuild:
+        env.game = env.init_game()
+        env.lidar = env.init_lidar()
+    else:
+        env.game.reset_state(rng=env.rng)
+
+
+def reset_latency(obs_type, rebuild, n_episodes, n_steps, game_only=False):
+    env = KuiperEscape(mode='agent', obs_type=obs_type, rock_rate=5)
+    env.seed(0)
+    env.reset()
+    total = 0
+    for _ in range(n_episodes):
+        for i in range(n_steps):
+            env.step(i % 5)
+        start = time.perf_counter()
+        if game_only:
+            reset_game(env, rebuild)
+        elif rebuild:
+            rebuild_reset(env)
+        else:
+            env.reset()
+        total += time.perf_counter() - start
+    env.close()
+    return total / n_episodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--episodes', type=int, default=50)
+    parser.add_argument('--steps', type=int, default=20,
+        help='steps per episode before each reset')
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    # Full reset including the first observation, and the game reset alone
+    cases = [
+        ('lidar obs', 'lidar', False),
+        ('pixel obs', 'pixels', False),
+        ('game only', 'pixels', True)
+    ]
+    for name, obs_type, game_only in cases:
+        rebuilt = reset_latency(obs_type, True, args.episodes, args.steps, game_only)
+        in_place = reset_latency(obs_type, False, args.episodes, args.steps, game_only)
+        print('{:<10} rebuild {:>10.1f} us   in place {:>8.1f} us   ({:.0f}x)'.format(
+            name, 1e6 * rebuilt, 1e6 * in_place, rebuilt / in_place
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Spatial Index Scaling Benchmark
+
+Measures the per-step cost of the rock update and queries (player collision
+check and lidar scan) as the number of rocks on the screen grows, with and
+without the uniform grid spatial index. The rocks move slowly, so that their
+number stays the same while the grid still has to follow them.
+
+Collisions are always one vectorized test of all rocks, which is cheaper
+than syncing the grid on every frame to query it. The grid only serves the
+lidar: on every scan of the step-marching engine, and for the analytic
+engine once LidarAnalytic.grid_min_rocks rocks are on the screen.
+
+Usage:
+    python benchmarks/grid_scaling.py [--engine analytic|march] [--steps 200]
+"""
+# Standard imports
+import argparse
+import random
+import time
+
+# Local imports
+from gym_kuiper_escape.envs.kuiper_escape.game import Game
+from gym_kuiper_escape.envs.kuiper_escape.lidar import LIDAR_ENGINES
+
+
+def populate(game, n_rocks):
+    # Scatter rocks over the screen, away from the player
+    while len(game.rocks) < n_rocks:
+        index = game.spawn_rock()
+        game.rocks.move_to(
+            index,
+            game.rng.uniform(0, game.screen_size),
+            game.rng.uniform(0, game.screen_size)
+        )
+        if game.rocks.collide_rect(game.player.rect, [index]):
+            game.rocks.release(index)
+
+
+def time_queries(n_rocks, grid_cell_size, engine, n_steps):
+    game = Game(
+        mode='agent', grid_cell_size=grid_cell_size, rng=random.Random(0),
+        rock_speed_min=0.01, rock_speed_max=0.02
+    )
+    populate(game, n_rocks)
+    lidar = LIDAR_ENGINES[engine](
+        x=0, y=0, n_beams=32, step=0.02 * game.screen_size,
+        max_radius=0.5 * game.screen_size, screen_size=game.screen_size
+    )
+    lidar.sync_position(game.player)
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        game.rocks.update()
+        game.get_collisions()
+        lidar.scan(collide_sprites=game.rocks, grid=game.grid)
+    return (time.perf_counter() - start) / n_steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--engine', default='analytic', choices=list(LIDAR_ENGINES))
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--rocks', type=int, nargs='+', default=[10, 25, 50, 100, 200, 400, 800, 1600])
+    args = parser.parse_args()
+
+    print('{:>8} {:>14} {:>14}'.format('rocks', 'linear (ms)', 'grid (ms)'))
+    for n_rocks in args.rocks:
+        t_linear = time_queries(n_rocks, None, args.engine, args.steps)
+        t_grid = time_queries(n_rocks, 64, args.engine, args.steps)
+        print('{:>8} {:>14.3f} {:>14.3f}'.format(n_rocks, t_linear * 1e3, t_grid * 1e3))
+
+
+if __name__ == "__main__":
+    main()
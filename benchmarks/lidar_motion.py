@@ -0,0 +1,79 @@
+"""
+Lidar Motion Benchmark
+
+Compares the ways an agent can see how the rocks move: a single lidar frame
+(no motion information), a stack of the last 4 lidar frames (motion inferred
+from the differences), and a single frame with the lidar motion channels
+(lidar_motion=True, closing speed and time to impact per beam). Reports the
+observation size and the steps/sec of KuiperEscape over a sweep of
+rock_rate, and of KuiperEscapeVector, where the motion channels are computed
+for all environments in one batched pass.
+
+Usage:
+    python benchmarks/lidar_motion.py [--steps 500] [--n-envs 64]
+"""
+# Standard imports
+import argparse
+import time
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape, KuiperEscapeVector
+
+CONFIGS = [
+    ('lidar', {}),
+    ('lidar, 4 stacked frames', {'frame_stack': 4}),
+    ('lidar + motion', {'lidar_motion': True})
+]
+ROCK_RATES = [1, 8, 32]
+
+
+def steps_per_sec(rock_rate, n_steps, env_kwargs):
+    env = KuiperEscape(rock_rate=rock_rate, lives_start=n_steps + 1, **env_kwargs)
+    env.seed(0)
+    env.reset()
+    start = time.perf_counter()
+    for i in range(n_steps):
+        env.step(i % 5)
+    return n_steps / (time.perf_counter() - start)
+
+
+def vector_steps_per_sec(n_envs, n_steps, lidar_motion):
+    env = KuiperEscapeVector(n_envs=n_envs, rock_rate=8, lidar_motion=lidar_motion)
+    env.seed(0)
+    env.reset()
+    actions = np.zeros(n_envs, dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(n_steps):
+        actions[:] = i % 5
+        env.step(actions)
+    return n_envs * n_steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--n-envs', type=int, default=64)
+    args = parser.parse_args()
+
+    print('KuiperEscape steps/sec')
+    print('{:<26}{:>10}'.format('observation', 'values') + ''.join(
+        '{:>14}'.format('rock_rate ' + str(rock_rate)) for rock_rate in ROCK_RATES
+    ))
+    for name, env_kwargs in CONFIGS:
+        size = int(np.prod(KuiperEscape(**env_kwargs).observation_space.shape))
+        rates = [steps_per_sec(rock_rate, args.steps, env_kwargs) for rock_rate in ROCK_RATES]
+        print('{:<26}{:>10}'.format(name, size) + ''.join('{:>14.0f}'.format(r) for r in rates))
+
+    print('\nKuiperEscapeVector, {} envs, env steps/sec'.format(args.n_envs))
+    for lidar_motion in (False, True):
+        print('{:<26}{:>10.0f}'.format(
+            'lidar + motion' if lidar_motion else 'lidar',
+            vector_steps_per_sec(args.n_envs, args.steps, lidar_motion)
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Multi-Agent Benchmark
+
+Agent steps/sec for K agents, flown in K separate KuiperEscape environments
+(each simulating its own rocks) and in one KuiperEscapeMulti with a shared
+rock field. Agents get enough lives to stay in the game for all steps.
+
+Usage:
+    python benchmarks/multi_agent.py [--steps 300] [--rock-rate 8]
+"""
+# Standard imports
+import argparse
+import time
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape, KuiperEscapeMulti
+
+N_AGENTS = [1, 4, 16, 64]
+
+
+def separate_throughput(n_agents, n_steps, env_kwargs):
+    envs = [KuiperEscape(**env_kwargs) for _ in range(n_agents)]
+    for k, env in enumerate(envs):
+        env.seed(k)
+        env.reset()
+    start = time.perf_counter()
+    for i in range(n_steps):
+        for env in envs:
+            env.step(i % 5)
+    return n_agents * n_steps / (time.perf_counter() - start)
+
+
+def shared_throughput(n_agents, n_steps, env_kwargs):
+    env = KuiperEscapeMulti(n_agents=n_agents, **env_kwargs)
+    env.seed(0)
+    env.reset()
+    actions = np.zeros(n_agents, dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(n_steps):
+        actions[:] = i % 5
+        env.step(actions)
+    return n_agents * n_steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--steps', type=int, default=300)
+    parser.add_argument('--rock-rate', type=float, default=8)
+    args = parser.parse_args()
+    env_kwargs = {'rock_rate': args.rock_rate, 'lives_start': args.steps + 1}
+
+    print('{:>8}{:>22}{:>22}'.format('agents', 'separate envs', 'shared rock field'))
+    for n_agents in N_AGENTS:
+        separate = separate_throughput(n_agents, args.steps, env_kwargs)
+        shared = shared_throughput(n_agents, args.steps, env_kwargs)
+        print('{:>8}{:>16.0f} /sec{:>16.0f} /sec   ({:.1f}x)'.format(
+            n_agents, separate, shared, shared / separate
+        ))
+
+
+if __name__ == "__main__":
+    main()
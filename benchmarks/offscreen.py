@@ -0,0 +1,98 @@
+"""
+Offscreen Rendering Benchmark
+
+Many pixel-observation environments in one process. Every game draws on its
+own offscreen surface, so the environments do not overwrite each other's
+screen. The isolation check steps K environments in lockstep and compares
+every pixel observation against the same environment stepped on its own.
+Then the K environments are stepped one after the other and on a thread
+pool (one task per environment and step), and the env steps/sec are
+reported.
+
+Usage:
+    python benchmarks/offscreen.py [--envs 16] [--threads 4] [--steps 200]
+
+Exits with status 1 if the observations of an environment change when other
+environments render in the same process.
+"""
+# Standard imports
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+
+ENV_KWARGS = {'obs_type': 'pixels', 'rock_rate': 4, 'copy_obs': False}
+
+
+def make_envs(n_envs, n_steps):
+    envs = [KuiperEscape(lives_start=n_steps + 1, **ENV_KWARGS) for _ in range(n_envs)]
+    for k, env in enumerate(envs):
+        env.seed(k)
+        env.reset()
+    return envs
+
+
+def isolation_check(n_envs, n_steps):
+    """Number of steps where an environment's observation differs from the
+    one it produces when stepped alone
+    """
+    alone = []
+    for k in range(n_envs):
+        env = make_envs(k + 1, n_steps)[k]
+        alone.append([env.step(i % 5)[0].copy() for i in range(n_steps)])
+    envs = make_envs(n_envs, n_steps)
+    n_mismatch = 0
+    for i in range(n_steps):
+        observations = [env.step(i % 5)[0] for env in envs]
+        for k, observation in enumerate(observations):
+            n_mismatch += not np.array_equal(observation, alone[k][i])
+    return n_mismatch
+
+
+def sequential_throughput(envs, n_steps):
+    start = time.perf_counter()
+    for i in range(n_steps):
+        for env in envs:
+            env.step(i % 5)
+    return len(envs) * n_steps / (time.perf_counter() - start)
+
+
+def threaded_throughput(envs, n_steps, n_threads):
+    with ThreadPoolExecutor(n_threads) as executor:
+        start = time.perf_counter()
+        for i in range(n_steps):
+            list(executor.map(lambda env: env.step(i % 5), envs))
+        return len(envs) * n_steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--envs', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--steps', type=int, default=200)
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    n_mismatch = isolation_check(min(args.envs, 4), min(args.steps, 50))
+    print('isolation check: {} mismatching observations'.format(n_mismatch))
+
+    envs = make_envs(args.envs, args.steps)
+    sequential = sequential_throughput(envs, args.steps)
+    envs = make_envs(args.envs, args.steps)
+    threaded = threaded_throughput(envs, args.steps, args.threads)
+    print('{} pixel envs, sequential      {:>8.0f} env steps/sec'.format(args.envs, sequential))
+    print('{} pixel envs, {} threads       {:>8.0f} env steps/sec'.format(args.envs, args.threads, threaded))
+
+    print('FAIL' if n_mismatch else 'OK: environments render independently')
+    sys.exit(1 if n_mismatch else 0)
+
+
+if __name__ == "__main__":
+    main()
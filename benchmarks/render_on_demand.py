@@ -0,0 +1,52 @@
+"""
+Render-on-Demand Benchmark
+
+Compares environment steps/sec when the screen is redrawn on every frame (the
+previous behavior) against drawing only when pixels are requested.
+
+Usage:
+    python benchmarks/render_on_demand.py [--steps 1000]
+"""
+# Standard imports
+import argparse
+import os
+import time
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+
+
+def steps_per_sec(n_steps, redraw_every_step, read_pixels):
+    env = KuiperEscape(mode='agent')
+    env.seed(0)
+    env.reset()
+    start = time.perf_counter()
+    for i in range(n_steps):
+        observation, reward, done, info = env.step(i % 5)
+        if redraw_every_step:
+            env.game.draw()
+        if read_pixels:
+            env.get_rgb_state()
+        if done:
+            env.reset()
+    return n_steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--steps', type=int, default=1000)
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    cases = [
+        ('lidar obs, redraw every step', True, False),
+        ('lidar obs, draw on demand', False, False),
+        ('pixel obs, draw on demand', False, True),
+    ]
+    for name, redraw_every_step, read_pixels in cases:
+        rate = steps_per_sec(args.steps, redraw_every_step, read_pixels)
+        print('{:<32} {:>10.0f} steps/sec'.format(name, rate))
+
+
+if __name__ == "__main__":
+    main()
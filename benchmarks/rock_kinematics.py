@@ -0,0 +1,140 @@
+"""
+Rock Kinematics Benchmark
+
+Compares the per-frame rock update of RockPool (rock_kinematics='step',
+every rock moved and bounds checked on every frame) with AnalyticRockPool
+(rock_kinematics='analytic', closed-form positions evaluated on query and a
+min-heap of exit frames):
+ - pool update cost per frame, by the number of rocks in flight
+ - Game.step_frame cost, by the number of rocks in flight. The collision
+   test queries the positions on every frame, so with analytic kinematics
+   the frame is still linear in the rocks, only the update is not
+ - jumping ahead many frames with one update(n_frames) call
+ - env steps/sec over a sweep of rock_rate (collisions and the lidar query
+   the positions on every frame)
+
+Usage:
+    python benchmarks/rock_kinematics.py [--frames 2000] [--steps 300]
+"""
+# Standard imports
+import argparse
+import random
+import time
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+from gym_kuiper_escape.envs.kuiper_escape.game import Game
+from gym_kuiper_escape.envs.kuiper_escape.rock import ROCK_KINEMATICS
+
+SCREEN_SIZE = 512
+N_ROCKS = [10, 100, 1000, 10000]
+ROCK_RATES = [1, 8, 32]
+
+
+def make_pool(kinematics, n_rocks):
+    # Slow rocks, so that none leaves the screen during the measurement
+    pool = ROCK_KINEMATICS[kinematics](SCREEN_SIZE, speed_min=0.01, speed_max=0.02)
+    rng = random.Random(0)
+    for _ in range(n_rocks):
+        index = pool.spawn(rng=rng)
+        pool.move_to(index, rng.uniform(100, 400), rng.uniform(100, 400))
+    return pool
+
+
+def update_cost(kinematics, n_rocks, n_frames):
+    """Microseconds per frame of pool.update()"""
+    pool = make_pool(kinematics, n_rocks)
+    start = time.perf_counter()
+    for _ in range(n_frames):
+        pool.update()
+    return 1e6 * (time.perf_counter() - start) / n_frames
+
+
+def frame_cost(kinematics, n_rocks, n_frames):
+    """Microseconds per Game.step_frame() with the player standing still"""
+    # Slow rocks (spawned ones too), away from the player
+    game = Game(
+        mode='agent', lives=10 ** 6, rock_kinematics=kinematics,
+        rock_speed_min=1e-4, rock_speed_max=2e-4, rng=random.Random(0)
+    )
+    rng = random.Random(0)
+    center = game.screen_size / 2
+    for _ in range(n_rocks):
+        index = game.rocks.spawn(rng=rng)
+        x, y = center, center
+        while abs(x - center) < 100 and abs(y - center) < 100:
+            x, y = rng.uniform(0, game.screen_size), rng.uniform(0, game.screen_size)
+        game.rocks.move_to(index, x, y)
+    start = time.perf_counter()
+    for _ in range(n_frames):
+        game.step_frame(0)
+    return 1e6 * (time.perf_counter() - start) / n_frames
+
+
+def jump_cost(n_rocks, n_frames):
+    """Milliseconds to advance n_frames, one update per frame vs one jump"""
+    pool = make_pool('analytic', n_rocks)
+    start = time.perf_counter()
+    for _ in range(n_frames):
+        pool.update()
+    pool.sync()
+    stepped = time.perf_counter() - start
+    pool = make_pool('analytic', n_rocks)
+    start = time.perf_counter()
+    pool.update(n_frames)
+    pool.sync()
+    jumped = time.perf_counter() - start
+    return 1e3 * stepped, 1e3 * jumped
+
+
+def steps_per_sec(kinematics, rock_rate, n_steps):
+    env = KuiperEscape(rock_rate=rock_rate, lives_start=10 ** 6, rock_kinematics=kinematics)
+    env.seed(0)
+    env.reset()
+    start = time.perf_counter()
+    for i in range(n_steps):
+        env.step(i % 5)
+    return n_steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--steps', type=int, default=300)
+    args = parser.parse_args()
+
+    print('pool.update() per frame')
+    print('{:>10}{:>14}{:>14}'.format('rocks', 'step', 'analytic'))
+    for n_rocks in N_ROCKS:
+        print('{:>10}{:>11.1f} us{:>11.1f} us'.format(
+            n_rocks,
+            update_cost('step', n_rocks, args.frames),
+            update_cost('analytic', n_rocks, args.frames)
+        ))
+
+    print('\nGame.step_frame() per frame (update and collisions)')
+    print('{:>10}{:>14}{:>14}'.format('rocks', 'step', 'analytic'))
+    for n_rocks in N_ROCKS:
+        print('{:>10}{:>11.1f} us{:>11.1f} us'.format(
+            n_rocks,
+            frame_cost('step', n_rocks, args.frames),
+            frame_cost('analytic', n_rocks, args.frames)
+        ))
+
+    stepped, jumped = jump_cost(N_ROCKS[-1], args.frames)
+    print('\n{} frames with {} rocks: {:.2f} ms frame by frame, {:.2f} ms with update(n_frames)'.format(
+        args.frames, N_ROCKS[-1], stepped, jumped
+    ))
+
+    print('\nenv steps/sec')
+    print('{:>10}{:>14}{:>14}'.format('rock_rate', 'step', 'analytic'))
+    for rock_rate in ROCK_RATES:
+        print('{:>10}{:>14.0f}{:>14.0f}'.format(
+            rock_rate,
+            steps_per_sec('step', rock_rate, args.steps),
+            steps_per_sec('analytic', rock_rate, args.steps)
+        ))
+
+
+if __name__ == "__main__":
+    main()
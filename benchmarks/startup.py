@@ -0,0 +1,110 @@
+"""
+Cold Start Benchmark
+
+Times the start-up of a fresh worker process: importing gym, importing
+gym_kuiper_escape.envs on top of it, and gym.make followed by the first
+reset and step (lidar observations). Every repeat runs in a new interpreter,
+and the median is compared against fixed budgets. pygame must not be
+imported at all, since nothing is rendered.
+
+Usage:
+    python benchmarks/startup.py [--repeats 5] [--import-budget-ms 50] [--make-budget-ms 50]
+    python benchmarks/startup.py --importtime  # slowest modules, from python -X importtime
+
+Exits with status 1 if a budget is exceeded or pygame was imported.
+"""
+# Standard imports
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+WORKER = """
+import json, sys, time
+start = time.perf_counter()
+import gym
+gym_loaded = time.perf_counter()
+import gym_kuiper_escape.envs
+package_loaded = time.perf_counter()
+env = gym.make('kuiper-escape-base-v0', disable_env_checker=True)
+env.reset()
+env.step(0)
+made = time.perf_counter()
+print(json.dumps({
+    'gym_ms': 1000 * (gym_loaded - start),
+    'import_ms': 1000 * (package_loaded - gym_loaded),
+    'make_ms': 1000 * (made - package_loaded),
+    'pygame': 'pygame' in sys.modules
+}))
+"""
+
+
+def run_worker():
+    output = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', WORKER],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_importtime(n_modules=15):
+    """Modules with the largest cumulative import time"""
+    stderr = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-X', 'importtime', '-c', 'import gym_kuiper_escape.envs'],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), module.rstrip()))
+    for cumulative, module in sorted(rows, reverse=True)[:n_modules]:
+        print('{:>10.1f} ms  {}'.format(cumulative / 1000, module))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=50,
+        help='import of gym_kuiper_escape.envs, gym excluded')
+    parser.add_argument('--make-budget-ms', type=float, default=50,
+        help='gym.make, first reset and first step')
+    parser.add_argument('--importtime', action='store_true')
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    if args.importtime:
+        print_importtime()
+        return
+
+    runs = [run_worker() for _ in range(args.repeats)]
+    results = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ('gym_ms', 'import_ms', 'make_ms')
+    }
+    pygame = any(run['pygame'] for run in runs)
+    print('{:<36}{:>8.1f} ms'.format('import gym', results['gym_ms']))
+    print('{:<36}{:>8.1f} ms   budget {:.0f} ms'.format(
+        'import gym_kuiper_escape.envs', results['import_ms'], args.import_budget_ms))
+    print('{:<36}{:>8.1f} ms   budget {:.0f} ms'.format(
+        'gym.make + reset + step', results['make_ms'], args.make_budget_ms))
+    print('{:<36}{:>8}'.format('pygame imported', str(pygame)))
+
+    failed = (
+        results['import_ms'] > args.import_budget_ms
+        or results['make_ms'] > args.make_budget_ms
+        or pygame
+    )
+    print('FAIL' if failed else 'OK: cold start within budget')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Benchmark Suite
+
+Measures the throughput of the main environment paths for a sweep of
+configurations, writes the results to a JSON file and compares them against a
+baseline recorded locally. Every case runs one episode of `episode_length` steps and
+records:
+ - steps_per_sec: env.step throughput over the episode (lidar observations)
+ - reset_ms: latency of env.reset()
+ - get_state_us: latency of one lidar observation (env.get_state())
+ - pixels_us: latency of one pixel observation, with the screen redrawn
+ - peak_mem_kb: peak Python heap allocated by one env over an episode
+   (tracemalloc, so memory owned by SDL surfaces is not included)
+
+The sweep varies one parameter at a time from the default case (rock_rate,
+lidar_n_beams, output_size and episode_length).
+
+Usage:
+    python benchmarks/suite.py [--output results.json] [--threshold 0.1]
+    python benchmarks/suite.py --save-baseline  # record a new baseline
+
+Exits with status 1 if any metric regressed by more than the threshold
+compared to the baseline. Baselines are machine specific and are not
+committed: record one with --save-baseline (benchmarks/baseline.json by
+default) on the machine the comparisons are run on, before the change to
+measure. Without a baseline, the results are only reported.
+"""
+# Standard imports
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+
+path_baseline = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'baseline.json')
+
+DEFAULT_CASE = {
+    'rock_rate': 2,
+    'lidar_n_beams': 32,
+    'output_size': 64,
+    'episode_length': 500
+}
+
+SWEEPS = {
+    'rock_rate': [1, 2, 4, 8],
+    'lidar_n_beams': [16, 32, 64],
+    'output_size': [32, 64, 128],
+    'episode_length': [100, 500, 2000]
+}
+
+# Whether a larger value of the metric is better
+METRICS = {
+    'steps_per_sec': True,
+    'reset_ms': False,
+    'get_state_us': False,
+    'pixels_us': False,
+    'peak_mem_kb': False
+}
+
+
+def get_cases():
+    cases = {'default': dict(DEFAULT_CASE)}
+    for param, values in SWEEPS.items():
+        for value in values:
+            if value != DEFAULT_CASE[param]:
+                cases['{}={}'.format(param, value)] = dict(DEFAULT_CASE, **{param: value})
+    return cases
+
+
+def make_env(case):
+    env = KuiperEscape(
+        mode='agent',
+        lives_start=case['episode_length'],  # episodes run the full length
+        rock_rate=case['rock_rate'],
+        lidar_n_beams=case['lidar_n_beams'],
+        output_size=case['output_size']
+    )
+    env.seed(0)
+    return env
+
+
+def run_episode(env, episode_length):
+    env.seed(0)
+    env.reset()
+    for i in range(episode_length):
+        env.step(i % 5)
+
+
+# Timings are the best of several rounds, which filters out most of the noise
+# from other processes
+def mean_time(fn, n_repeats, n_rounds):
+    best = float('inf')
+    for _ in range(n_rounds):
+        start = time.perf_counter()
+        for _ in range(n_repeats):
+            fn()
+        best = min(best, (time.perf_counter() - start) / n_repeats)
+    return best
+
+
+def measure_case(case, n_repeats, n_rounds):
+    env = make_env(case)
+    episode_length = case['episode_length']
+
+    # Steps/sec over a full (identically seeded) episode
+    episode_s = mean_time(lambda: run_episode(env, episode_length), 1, n_rounds)
+    steps_per_sec = episode_length / episode_s
+
+    # Observation latency, with the rocks at the end of the episode
+    get_state_s = mean_time(env.get_state, n_repeats, n_rounds)
+
+    def get_pixels():
+        env.game.dirty = True
+        env.get_rgb_state()
+    get_pixels()  # attach the display outside of the timing
+    pixels_s = mean_time(get_pixels, n_repeats, n_rounds)
+
+    reset_s = mean_time(env.reset, max(n_repeats // 10, 1), n_rounds)
+    env.close()
+
+    # Peak memory, measured separately since tracing slows everything down
+    tracemalloc.start()
+    env = make_env(case)
+    run_episode(env, episode_length)
+    env.get_rgb_state()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    env.close()
+
+    return {
+        'steps_per_sec': steps_per_sec,
+        'reset_ms': 1e3 * reset_s,
+        'get_state_us': 1e6 * get_state_s,
+        'pixels_us': 1e6 * pixels_s,
+        'peak_mem_kb': peak / 1024
+    }
+
+
+def get_meta():
+    import pygame
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver
+    }
+
+
+def compare(results, baseline, threshold):
+    """Relative change of every metric against the baseline. Returns a list of
+    (case, metric, baseline value, value, change, regressed), where a
+    positive change is an improvement.
+    """
+    rows = []
+    for name, result in results['cases'].items():
+        base = baseline['cases'].get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old = base['metrics'].get(metric)
+            new = result['metrics'][metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if not higher_is_better:
+                change = -change
+            rows.append((name, metric, old, new, change, change < -threshold))
+    return rows
+
+
+def print_results(results):
+    print('{:<20}'.format('case') + ''.join('{:>15}'.format(m) for m in METRICS))
+    for name, result in results['cases'].items():
+        print('{:<20}'.format(name) + ''.join(
+            '{:>15.4g}'.format(result['metrics'][m]) for m in METRICS
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default='benchmark_results.json',
+        help='path of the JSON results file')
+    parser.add_argument('--baseline', default=path_baseline,
+        help='path of the JSON baseline to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+        help='relative slowdown counted as a regression')
+    parser.add_argument('--repeats', type=int, default=200,
+        help='number of timed calls per latency metric')
+    parser.add_argument('--rounds', type=int, default=5,
+        help='timings are the best of this many rounds')
+    parser.add_argument('--cases', nargs='*',
+        help='only run these cases (default: all)')
+    parser.add_argument('--save-baseline', action='store_true',
+        help='write the results to the baseline file')
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    cases = get_cases()
+    if args.cases:
+        cases = {name: case for name, case in cases.items() if name in args.cases}
+    results = {'meta': get_meta(), 'cases': {}}
+    for name, case in cases.items():
+        results['cases'][name] = {
+            'config': case,
+            'metrics': measure_case(case, args.repeats, args.rounds)
+        }
+    print_results(results)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('\nResults written to ' + args.output)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Baseline written to ' + args.baseline)
+        return
+
+    if not os.path.exists(args.baseline):
+        print('No baseline at {}, skipping comparison'.format(args.baseline))
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    regressions = [row for row in rows if row[5]]
+    print('\nCompared to baseline ({}), threshold {:.0%}:'.format(
+        baseline['meta']['time'], args.threshold
+    ))
+    for name, metric, old, new, change, regressed in rows:
+        if regressed or abs(change) > args.threshold:
+            print('  {:<8} {:<20} {:<15} {:>10.4g} -> {:>10.4g} ({:+.0%})'.format(
+                'REGRESS' if regressed else 'improve', name, metric, old, new, change
+            ))
+    if regressions:
+        print('{} regression(s)'.format(len(regressions)))
+        sys.exit(1)
+    print('No regressions')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Trajectory Dataset Benchmark
+
+Records the same transitions of a KuiperEscape environment (pixel
+observations) twice: as a list of (obs, action, reward, done, info) tuples
+pickled at the end, and streamed by a TrajectoryRecorder to memory-mapped
+columns. Reports the recording steps/sec, the memory held while recording
+(tracemalloc peak), and the time and memory to open each dataset and draw
+minibatches from it.
+
+Usage:
+    python benchmarks/trajectory.py [--steps 5000] [--batches 100]
+"""
+# Standard imports
+import argparse
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape, TrajectoryRecorder, TrajectoryDataset
+
+ENV_KWARGS = {'obs_type': 'pixels', 'rock_rate': 2}
+BATCH_SIZE = 256
+
+
+def run(env, n_steps, on_step=None):
+    env.seed(0)
+    observation = env.reset()
+    for i in range(n_steps):
+        action = i % 5
+        next_observation, reward, done, info = env.step(action)
+        if on_step is not None:
+            on_step(observation, action, reward, done, info)
+        observation = env.reset() if done else next_observation
+
+
+def measure(function):
+    """Seconds and traced memory peak (MiB) of function()"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def record_pickle(path, n_steps):
+    transitions = []
+    run(KuiperEscape(**ENV_KWARGS), n_steps, lambda *transition: transitions.append(transition))
+    with open(path, 'wb') as f:
+        pickle.dump(transitions, f)
+
+
+def sample_pickle(path, n_batches):
+    with open(path, 'rb') as f:
+        transitions = pickle.load(f)
+    rng = np.random.default_rng(0)
+    for _ in range(n_batches):
+        index = rng.integers(len(transitions), size=BATCH_SIZE)
+        np.stack([transitions[i][0] for i in index])
+
+
+def record_memmap(path, n_steps):
+    env = TrajectoryRecorder(KuiperEscape(**ENV_KWARGS), path)
+    run(env, n_steps)
+    env.close()
+
+
+def sample_memmap(path, n_batches):
+    dataset = TrajectoryDataset(path)
+    rng = np.random.default_rng(0)
+    for _ in range(n_batches):
+        dataset.sample(BATCH_SIZE, rng)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--steps', type=int, default=5000)
+    parser.add_argument('--batches', type=int, default=100)
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ('pickled list', os.path.join(tmp, 'transitions.pkl'), record_pickle, sample_pickle),
+            ('memmap columns', os.path.join(tmp, 'dataset'), record_memmap, sample_memmap)
+        ]
+        for name, path, record, sample in cases:
+            record_time, record_peak, _ = measure(lambda: record(path, args.steps))
+            sample_time, sample_peak, _ = measure(lambda: sample(path, args.batches))
+            print('{:<16} record {:>7.0f} steps/s {:>8.1f} MiB   open + {} batches {:>7.3f} s {:>8.1f} MiB'.format(
+                name, args.steps / record_time, record_peak, args.batches, sample_time, sample_peak
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Video Recording Benchmark
+
+Steps/sec of an environment whose every frame is recorded as a PNG
+sequence: synchronously in the stepping loop (render('rgb_array') and
+encoding), and with a VideoRecorder encoding on its worker thread, both
+with back-pressure and with frame dropping. Steps/sec without recording is
+the reference.
+
+Usage:
+    python benchmarks/video.py [--steps 300]
+"""
+# Standard imports
+import argparse
+import os
+import tempfile
+import time
+
+# 3rd party imports
+import pygame
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape, VideoRecorder
+
+ENV_KWARGS = {'rock_rate': 2}
+
+
+def steps_per_sec(env, n_steps, on_step=None):
+    env.seed(0)
+    env.reset()
+    start = time.perf_counter()
+    for i in range(n_steps):
+        if env.step(i % 5)[2]:
+            env.reset()
+        if on_step is not None:
+            on_step(i)
+    return n_steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--steps', type=int, default=300)
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    print('{:<28}{:>10.0f} steps/s'.format('no recording', steps_per_sec(KuiperEscape(**ENV_KWARGS), args.steps)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = KuiperEscape(**ENV_KWARGS)
+
+        def save_frame(i):
+            frame = env.render('rgb_array')
+            surf = pygame.surfarray.make_surface(frame.transpose(1, 0, 2))
+            pygame.image.save(surf, os.path.join(tmp, 'frame_{:06d}.png'.format(i)))
+
+        print('{:<28}{:>10.0f} steps/s'.format('synchronous', steps_per_sec(env, args.steps, save_frame)))
+
+        for drop_frames in (False, True):
+            env = VideoRecorder(
+                KuiperEscape(**ENV_KWARGS),
+                os.path.join(tmp, 'drop' if drop_frames else 'wait'),
+                encoder='png',
+                drop_frames=drop_frames
+            )
+            result = steps_per_sec(env, args.steps)
+            env.close()
+            print('{:<28}{:>10.0f} steps/s   {}'.format(
+                'VideoRecorder ' + ('drop' if drop_frames else 'back-pressure'), result, env.stats()
+            ))
+
+
+if __name__ == "__main__":
+    main()
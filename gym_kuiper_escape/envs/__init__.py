@@ -1 +1,32 @@
+# Standard imports
+import importlib
+
+# Local imports
 from gym_kuiper_escape.envs.env_base import KuiperEscape
+from gym_kuiper_escape.envs.env_vector import KuiperEscapeVector
+from gym_kuiper_escape.envs.env_multi import KuiperEscapeMulti
+
+# The other components are imported on first access, so that gym.make and
+# worker processes only pay for the environment itself
+LAZY_EXPORTS = {
+    'SubprocVectorKuiperEscape': 'gym_kuiper_escape.envs.env_subproc',
+    'EpisodeRecorder': 'gym_kuiper_escape.envs.replay',
+    'EpisodeReplayer': 'gym_kuiper_escape.envs.replay',
+    'load_episodes': 'gym_kuiper_escape.envs.replay',
+    'TrajectoryRecorder': 'gym_kuiper_escape.envs.trajectory',
+    'TrajectoryDataset': 'gym_kuiper_escape.envs.trajectory',
+    'VideoRecorder': 'gym_kuiper_escape.envs.video',
+    'EnvClient': 'gym_kuiper_escape.envs.env_remote',
+    'RemoteKuiperEscape': 'gym_kuiper_escape.envs.env_remote',
+    'EnvServer': 'gym_kuiper_escape.envs.env_server'
+}
+
+
+def __getattr__(name):
+    if name in LAZY_EXPORTS:
+        return getattr(importlib.import_module(LAZY_EXPORTS[name]), name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(LAZY_EXPORTS))
@@ -1,21 +1,26 @@
 # Standard imports
-import sys
-import os
 import math
 import random
+from collections import namedtuple
 
 # 3rd party imports
 import numpy as np
 import gym
 from gym.utils import seeding
-from gym.spaces import Discrete, Box
-import pygame
+from gym.spaces import Discrete, Box, Dict
 
 # Local imports
-path_game = os.path.dirname(os.path.realpath(__file__)) + '/kuiper_escape'
-sys.path.insert(0, path_game)
-from game import Game
-from lidar import Lidar
+from gym_kuiper_escape.envs.kuiper_escape.game import Game
+from gym_kuiper_escape.envs.kuiper_escape.lidar import LIDAR_ENGINES, motion_observation
+from gym_kuiper_escape.envs.kuiper_escape.frame_stack import FrameStack
+from gym_kuiper_escape.envs.kuiper_escape.profiler import Profiler
+from gym_kuiper_escape.envs.kuiper_escape.rock import ROCK_KINEMATICS
+
+OBS_TYPES = ('lidar', 'pixels', 'lidar_pixels')
+OBS_DTYPES = ('float16', 'float32')
+
+# Snapshot of the environment state, see KuiperEscape.clone_state
+EnvState = namedtuple('EnvState', ['game', 'iteration', 'stacks'])
 
 
 class KuiperEscape(gym.Env):
@@ -45,7 +50,60 @@ class KuiperEscape(gym.Env):
     the distance and characteristics of nearby objects. The observation data
     consists of "n" designated lidar beams (sent of in uniformally distributed
     angles), as well as n collision type flags (0 for no collision, or 1 for
-    rock collision).
+    rock collision). The number of beams is set with `lidar_n_beams`, and the
+    dtype of the lidar observation with `obs_dtype` ('float16' or 'float32').
+
+    The lidar scan can be computed by one of two engines, selected with the
+    `lidar_engine` argument:
+     - 'march': original engine, steps each beam outward until it terminates
+       (default)
+     - 'analytic': exact ray/rect intersections for all beams at once
+
+    With lidar_motion=True, two more channels of n values follow, computed
+    from the velocity of the rock hit by each beam, so that a single frame
+    shows how the rocks move: the closing speed (the rock velocity towards
+    the ship along the beam, normalized by the max rock speed, in [-1, 1]
+    and 0 where no rock is hit), and the time to impact at that speed
+    (normalized by a 5 second horizon and clipped to 1, which also marks
+    beams without an approaching rock).
+
+    Alternatively, the observation can be the down-sampled screen pixels
+    (obs_type='pixels', shape (output_size, output_size, k)), or both
+    (obs_type='lidar_pixels', a dict with 'lidar' and 'pixels' entries). With
+    frame_stack=k the last k frames are stacked along the last axis.
+
+    Observations are written into preallocated buffers (the frame stack ring
+    buffers when stacking), and step()/reset() return copies of them. With
+    copy_obs=False the shared buffers themselves are returned, which are
+    overwritten by later steps, so copy them if they need to be kept. With
+    the analytic lidar, a step then does not allocate any NumPy arrays.
+
+    All randomness of the game (rock spawning) is drawn from a per-env
+    generator, so `seed(s)` followed by `reset()` and the same sequence of
+    actions reproduces an episode exactly.
+
+    With frame_skip=k, every action is repeated for k frames and the rewards
+    are summed. Only the game is stepped on the skipped frames, the
+    observation is computed once after the last one. With
+    frame_skip_max_pool=True, pixel observations are the max over the last
+    two frames. `info['iteration']` counts frames.
+
+    Rocks are stored in a preallocated, array-backed pool that recycles the
+    slots of removed rocks. At the end of an episode, `info['rock_pool']`
+    reports the pool's allocation counters for the episode. With
+    rock_kinematics='analytic', rocks are not moved frame by frame: their
+    positions are evaluated in closed form when queried, and their exit
+    frames are scheduled on a min-heap at spawn (see AnalyticRockPool).
+    Positions can then differ from the default 'step' kinematics in the
+    last bits.
+
+    With profile=True, the phases of the step loop are timed and the lidar
+    work is counted, see `profile_report()`. Profiling is off by default and
+    then adds no overhead.
+
+    For search-based planners, `clone_state()` returns a compact snapshot of
+    the simulation (including the generator state), and `restore_state(s)`
+    branches back to it, without copying the pygame display or sprites.
 
     The environment will provide the following rewards:
      - Reward of 1 for each frame without dying.
@@ -66,7 +124,18 @@ class KuiperEscape(gym.Env):
         rock_size_min=0.05,
         rock_size_max=0.10,
         framerate=10,
-        output_size=64
+        output_size=64,
+        lidar_engine='march',
+        obs_type='lidar',
+        frame_stack=1,
+        lidar_n_beams=32,
+        profile=False,
+        frame_skip=1,
+        frame_skip_max_pool=False,
+        obs_dtype='float16',
+        copy_obs=True,
+        rock_kinematics='step',
+        lidar_motion=False
     ):
         self.mode = mode
         self.output_size = output_size
@@ -78,17 +147,93 @@ class KuiperEscape(gym.Env):
         self.rock_speed_min = rock_speed_min
         self.rock_speed_max = rock_speed_max
         self.framerate = framerate
+        if lidar_engine not in LIDAR_ENGINES:
+            raise ValueError(
+                "lidar_engine must be one of " + str(list(LIDAR_ENGINES))
+            )
+        self.lidar_engine = lidar_engine
+        if obs_type not in OBS_TYPES:
+            raise ValueError("obs_type must be one of " + str(list(OBS_TYPES)))
+        self.obs_type = obs_type
+        self.frame_stack = frame_stack
+        if obs_dtype not in OBS_DTYPES:
+            raise ValueError("obs_dtype must be one of " + str(list(OBS_DTYPES)))
+        self.obs_dtype = obs_dtype
+        self.copy_obs = copy_obs
+        if rock_kinematics not in ROCK_KINEMATICS:
+            raise ValueError(
+                "rock_kinematics must be one of " + str(list(ROCK_KINEMATICS))
+            )
+        self.rock_kinematics = rock_kinematics
+        self.lidar_motion = lidar_motion
+        if frame_skip < 1:
+            raise ValueError("frame_skip must be at least 1")
+        self.frame_skip = frame_skip
+        self.frame_skip_max_pool = frame_skip_max_pool
+        self.seed()
         self.game = self.init_game()
-        self.lidar_n_beams = 32
+        self.lidar_n_beams = lidar_n_beams
         self.lidar_step_pct = 0.02
         self.lidar_max_radius_pct = 0.5
+        self.lidar_horizon_s = 5  # time to impact clipped at 5 seconds
+        self.lidar_size = self.lidar_n_beams * (4 if self.lidar_motion else 2)
         self.lidar = self.init_lidar()
         self.iteration = 0
         self.iteration_max = 15 * 60 * self.game.framerate  # 15 minutes
+        self.obs_buffer = np.zeros((self.lidar_size, 1), dtype=self.obs_dtype)
+        self.obs_radius = np.zeros(self.lidar_n_beams)
+        self.obs_motion = np.zeros(self.lidar_n_beams * 2)
         self.init_obs = self.get_state()
         self.action_space = Discrete(5)
-        self.observation_space = Box(low=0, high=1, shape=(self.lidar_n_beams * 2, 1), dtype=np.float16)
-        self.reward_range = (0, 1)
+        self.observation_space = self.init_observation_space()
+        self.stacks = self.init_stacks()
+        self.max_pool_buffer = self.init_max_pool_buffer()
+        self.pool_ready = False
+        self.reward_range = (0, self.frame_skip)
+        self.profile = profile
+        self.profiler = None
+        if self.profile:
+            self.profiler = Profiler(total_phase='step')
+            self.instrument()
+
+    def init_observation_space(self):
+        spaces = {
+            'lidar': Box(low=self.get_lidar_low(), high=1, shape=(self.lidar_size, self.frame_stack), dtype=self.obs_dtype),
+            'pixels': Box(low=0, high=255, shape=(self.output_size, self.output_size, self.frame_stack), dtype=np.uint8)
+        }
+        if self.obs_type == 'lidar_pixels':
+            return Dict(spaces)
+        return spaces[self.obs_type]
+
+    # Lower bounds of the lidar observation, -1 for the closing speeds
+    def get_lidar_low(self):
+        low = np.zeros((self.lidar_size, self.frame_stack))
+        if self.lidar_motion:
+            low[2 * self.lidar_n_beams:3 * self.lidar_n_beams] = -1
+        return low
+
+    # Frame stacks, not needed for single (unstacked) lidar observations
+    def init_stacks(self):
+        if self.obs_type == 'lidar' and self.frame_stack == 1:
+            return None
+        stacks = {}
+        if self.obs_type in ('lidar', 'lidar_pixels'):
+            stacks['lidar'] = FrameStack(
+                (self.lidar_size,), self.frame_stack, self.obs_dtype
+            )
+        if self.obs_type in ('pixels', 'lidar_pixels'):
+            stacks['pixels'] = FrameStack(
+                (self.output_size, self.output_size), self.frame_stack, np.uint8
+            )
+        return stacks
+
+    # Pixels of the second to last skipped frame, for max-pooling
+    def init_max_pool_buffer(self):
+        if not self.frame_skip_max_pool or self.frame_skip < 2:
+            return None
+        if self.obs_type not in ('pixels', 'lidar_pixels'):
+            return None
+        return np.zeros((self.output_size, self.output_size, 1), dtype=np.uint8)
 
     def init_game(self):
         game = Game(
@@ -100,21 +245,51 @@ class KuiperEscape(gym.Env):
             rock_speed_max=self.rock_speed_max,
             rock_size_min=self.rock_size_min,
             rock_size_max=self.rock_size_max,
-            framerate=self.framerate
+            framerate=self.framerate,
+            rng=self.rng,
+            rock_kinematics=self.rock_kinematics
         )
         return game
 
     def init_lidar(self):
-        lidar = Lidar(
+        lidar = LIDAR_ENGINES[self.lidar_engine](
             x = self.game.player.x,
             y = self.game.player.y,
             n_beams = self.lidar_n_beams,
             step = self.lidar_step_pct * self.game.screen_size,
             max_radius = self.lidar_max_radius_pct * self.game.screen_size,
-            screen_size=self.game.screen_size
+            screen_size=self.game.screen_size,
+            motion=self.lidar_motion
         )
         return lidar
 
+    # Time the phases of the step loop (the game and lidar live as long as
+    # the env, since reset reuses them)
+    def instrument(self):
+        profiler = self.profiler
+        profiler.instrument(self, 'step', 'step')
+        profiler.instrument(self, 'reset', 'reset')
+        profiler.instrument(self, 'get_observation', 'get_observation')
+        profiler.instrument(self, 'get_state', 'get_state')
+        profiler.instrument(self, 'get_rgb_state', 'get_rgb_state')
+        profiler.instrument(self, 'get_reward', 'reward')
+        self.game.instrument(profiler)
+        profiler.instrument(
+            self.lidar, 'scan', 'lidar_scan', counters=self.lidar.get_counters
+        )
+
+    def profile_report(self, reset=False):
+        """Time spent in each phase of the step loop and lidar work counters,
+        aggregated since the last reset. Requires profile=True.
+        """
+        if self.profiler is None:
+            raise RuntimeError("Profiling is disabled, create the env with profile=True")
+        report = self.profiler.report()
+        report['text'] = self.profiler.format_report()
+        if reset:
+            self.profiler.reset()
+        return report
+
     def step(self, action):
         """Run one timestep of the environment's dynamics. When end of
         episode is reached, you are responsible for calling `reset()`
@@ -129,14 +304,54 @@ class KuiperEscape(gym.Env):
             info (dict): contains auxiliary diagnostic information (helpful for debugging, and sometimes learning)
         """
 
-        # Step frame
-        self.game.step_frame(action)
-        self.iteration += 1
+        # Step frame(s), summing the rewards
+        reward, done = self.advance(action)
 
         # Gather observation
-        observation = self.get_state()
+        observation = self.get_observation()
+
+        # Gather metadata/info
+        info = {
+            'iteration': self.iteration,
+            'time': self.game.time
+        }
+        if done:
+            info['rock_pool'] = self.game.rocks.stats()
+
+        return (observation, reward, done, info)
+
+    def advance(self, action):
+        """Advance the game frame_skip frames with the same action. Only the
+        game itself is stepped on every frame (collisions included), and the
+        episode ends early if the player runs out of lives. Returns the
+        summed reward and done.
+        """
+        reward = 0
+        self.pool_ready = False
+        for i in range(self.frame_skip):
+            self.game.step_frame(action)
+            self.iteration += 1
+            reward += self.get_reward()
+            done = self.get_done()
+            if done:
+                break
+            if i == self.frame_skip - 2 and self.max_pool_buffer is not None:
+                self.get_rgb_state(out=self.max_pool_buffer)
+                self.pool_ready = True
+        return reward, done
+
+    # Check stop conditions
+    def get_done(self):
+        if self.game.player.lives == 0:
+            done = True
+        elif self.iteration > self.iteration_max:
+            done = True
+        else:
+            done = False
+        return done
 
-        # Gather reward
+    # Reward of 1 unless the player is near the corners
+    def get_reward(self):
         xp = self.game.player.x
         yp = self.game.player.y
         xp = xp / self.game.screen_size
@@ -146,22 +361,7 @@ class KuiperEscape(gym.Env):
             reward = 1
         else:
             reward = 0
-
-        # Check stop conditions
-        if self.game.player.lives == 0:
-            done = True
-        elif self.iteration > self.iteration_max:
-            done = True
-        else:
-            done = False
-
-        # Gather metadata/info
-        info = {
-            'iteration': self.iteration,
-            'time': self.game.time
-        }
-
-        return (observation, reward, done, info)
+        return reward
 
     def reset(self):
         """Resets the environment to an initial state and returns an initial
@@ -174,10 +374,10 @@ class KuiperEscape(gym.Env):
         Returns:
             observation (object): the initial observation.
         """
-        self.game = self.init_game()
-        self.lidar = self.init_lidar()
+        self.game.reset_state(rng=self.rng)
         self.iteration = 0
-        observation = self.get_state()
+        self.pool_ready = False
+        observation = self.get_observation(reset=True)
         return observation
 
     def render(self, mode, render_lidar=False):
@@ -212,17 +412,23 @@ class KuiperEscape(gym.Env):
         """
         if mode == 'human':
             self.game.turn_on_screen()
-            self.game.update_screen()
-            ls_beams = self.lidar.get_beams()
+            self.game.draw()
             if render_lidar:
-                for beam in ls_beams:
-                    self.game.screen.blit(beam.surf, beam.rect)
+                self.draw_lidar()
             self.game.render_screen()
             self.game.clock.tick(self.game.framerate)
 
         if mode == 'rgb_array':
             return self.get_rgb_array()
     
+    def draw_lidar(self):
+        """Draw the lidar beams over the current screen"""
+        for beam in self.lidar.get_beams():
+            self.game.screen.blit(beam.get_surf(), beam.rect.topleft)
+
+        # Overlay is not part of the frame, redraw on next request
+        self.game.dirty = True
+
     def close(self):
         """Override close in your subclass to perform any necessary cleanup.
         Environments will automatically close() themselves when
@@ -244,36 +450,162 @@ class KuiperEscape(gym.Env):
               this won't be true if seed=None, for example.
         """
         self.np_random, seed = seeding.np_random(seed)
+        self.rng = random.Random(seed)
         return [seed]
 
-    def get_state(self):
+    def get_config(self):
+        """Constructor arguments of this environment (e.g. for replays)"""
+        return {
+            'mode': self.mode,
+            'lives_start': self.lives_start,
+            'player_speed': self.player_speed,
+            'rock_rate': self.rock_rate,
+            'rock_speed_min': self.rock_speed_min,
+            'rock_speed_max': self.rock_speed_max,
+            'rock_size_min': self.rock_size_min,
+            'rock_size_max': self.rock_size_max,
+            'framerate': self.framerate,
+            'output_size': self.output_size,
+            'lidar_engine': self.lidar_engine,
+            'obs_type': self.obs_type,
+            'frame_stack': self.frame_stack,
+            'lidar_n_beams': self.lidar_n_beams,
+            'profile': self.profile,
+            'frame_skip': self.frame_skip,
+            'frame_skip_max_pool': self.frame_skip_max_pool,
+            'obs_dtype': self.obs_dtype,
+            'copy_obs': self.copy_obs,
+            'rock_kinematics': self.rock_kinematics,
+            'lidar_motion': self.lidar_motion
+        }
+
+    def clone_state(self):
+        """Snapshot of the environment state, to be passed to restore_state"""
+        if self.stacks is None:
+            stacks = None
+        else:
+            stacks = {
+                key: (stack.buffer.copy(), stack.index)
+                for key, stack in self.stacks.items()
+            }
+        return EnvState(self.game.clone_state(), self.iteration, stacks)
+
+    def restore_state(self, state):
+        """Return the environment to a snapshot taken with clone_state. The
+        snapshot is not modified, so it can be restored any number of times.
+        """
+        self.game.restore_state(state.game)
+        self.iteration = state.iteration
+        if state.stacks is not None:
+            for key, (buffer, index) in state.stacks.items():
+                self.stacks[key].buffer[...] = buffer
+                self.stacks[key].index = index
+
+    def get_observation(self, reset=False):
+        """Observation for the configured obs_type. New frames are written
+        straight into the observation buffer or frame stack ring buffers.
+        """
+        if self.stacks is None:
+            return self.share_observation(self.get_state(out=self.obs_buffer))
+        observation = {}
+        for key, stack in self.stacks.items():
+            if key == 'lidar':
+                self.get_state(out=stack.slot())
+            else:
+                self.get_rgb_state(out=stack.slot())
+                if self.pool_ready:
+                    np.maximum(stack.slot(), self.max_pool_buffer, out=stack.slot())
+            if reset:
+                observation[key] = stack.reset()
+            else:
+                observation[key] = stack.advance()
+        if self.obs_type == 'lidar_pixels':
+            return self.share_observation(observation)
+        return self.share_observation(observation[self.obs_type])
+
+    # The observation buffers are shared with the caller unless copy_obs
+    def share_observation(self, observation):
+        if not self.copy_obs:
+            return observation
+        if isinstance(observation, dict):
+            return {key: value.copy() for key, value in observation.items()}
+        return observation.copy()
+
+    def get_state(self, out=None):
+        """Lidar observation, shape (2 * lidar_n_beams, 1) of obs_dtype: the
+        beam radii normalized by the max radius, followed by the collide
+        flags, and with lidar_motion the closing speeds and times to impact
+        (shape (4 * lidar_n_beams, 1)). Written into `out` (allocated if not
+        given) in place.
+        """
+        if out is None:
+            out = np.empty((self.lidar_size, 1), dtype=self.obs_dtype)
         self.lidar.sync_position(self.game.player)
-        ls_radius, ls_collide = self.lidar.scan(
-            collide_sprites=self.game.rocks
+        radius, collide = self.lidar.scan(
+            collide_sprites=self.game.rocks,
+            grid=self.game.grid
         )
-        array_radius = np.array(ls_radius)
-        array_radius = array_radius / (self.lidar_max_radius_pct * self.game.screen_size)
-        array_collide = np.array(ls_collide)
-        array_state = np.concatenate([array_radius, array_collide])
-        array_state = array_state.reshape((len(array_state), 1))
-        return array_state
+        n_beams = self.lidar_n_beams
+        max_radius = self.lidar_max_radius_pct * self.game.screen_size
+        np.divide(radius, max_radius, out=self.obs_radius)
+        np.copyto(out[:n_beams, 0], self.obs_radius)
+        np.copyto(out[n_beams:2 * n_beams, 0], collide, casting='unsafe')
+        if self.lidar_motion:
+            closing, time_to_impact = self.lidar.get_motion()
+            motion_observation(
+                closing, time_to_impact,
+                speed_max=self.game.rocks.speed_max,
+                horizon=self.lidar_horizon_s * self.game.framerate,
+                out=self.obs_motion
+            )
+            np.copyto(out[2 * n_beams:, 0], self.obs_motion)
+        return out
         
-    def get_rgb_state(self):
-        rgb_array = self.get_rgb_array()
-        rgb_array = self.down_sample_rgb_array(rgb_array, self.output_size)
-        rgb_array = rgb_array[:, :, 0]
-        rgb_array = np.reshape(rgb_array, (self.output_size, self.output_size, 1))
-        rgb_array = rgb_array.astype(np.uint8)
-        return rgb_array
-
-    def get_rgb_array(self):
-        surf = pygame.display.get_surface()
-        array = pygame.surfarray.array3d(surf).astype(np.float16)
-        array = np.rot90(array)
-        array = np.flip(array)
-        array = np.fliplr(array)
-        array = array.astype(np.uint8)
-        return array
+    def get_rgb_state(self, out=None):
+        """Down-sampled single channel pixel observation, shape
+        (output_size, output_size, 1). The max-pooling reads the screen
+        through a strided view and reduces straight into `out` (allocated if
+        not given), so no full-size frame copies are made.
+        """
+        self.game.draw()
+        if out is None:
+            out = np.empty((self.output_size, self.output_size, 1), dtype=np.uint8)
+        channel = self.get_pixels_view()[:, :, 0]
+        bin_size = int(self.game.screen_size / self.output_size)
+        bins = np.lib.stride_tricks.as_strided(
+            channel,
+            shape=(self.output_size, bin_size, self.output_size, bin_size),
+            strides=(
+                channel.strides[0] * bin_size, channel.strides[0],
+                channel.strides[1] * bin_size, channel.strides[1]
+            ),
+            writeable=False
+        )
+        bins.max(axis=(1, 3), out=out[:, :, 0])
+        del channel, bins
+        return out
+
+    def get_rgb_array(self, out=None):
+        """Full resolution screen pixels, shape (screen_size, screen_size, 3),
+        copied once from the screen into `out` (allocated if not given).
+        """
+        self.game.draw()
+        view = self.get_pixels_view()
+        if out is None:
+            out = np.empty(view.shape, dtype=np.uint8)
+        np.copyto(out, view)
+        del view
+        return out
+
+    def get_pixels_view(self):
+        """View of the pixels of this env's screen (the game's offscreen
+        surface) as (row, column, channel), without any copy. The
+        orientation and (reversed) channel order match the frames previously
+        produced with array3d and a rot90/flip/fliplr chain. The screen stays
+        locked while the view is alive, so release it promptly.
+        """
+        import pygame
+        return pygame.surfarray.pixels3d(self.game.screen).transpose(1, 0, 2)[:, :, ::-1]
 
     def down_sample_rgb_array(self, array, output_size):
         bin_size = int(self.game.screen_size / output_size)
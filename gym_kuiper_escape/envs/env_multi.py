@@ -0,0 +1,264 @@
+# Standard imports
+import math
+import random
+
+# 3rd party imports
+import numpy as np
+from gym.spaces import Discrete, Box
+
+# Local imports
+from gym_kuiper_escape.envs.env_base import OBS_DTYPES
+from gym_kuiper_escape.envs.kuiper_escape.game import MultiGame
+from gym_kuiper_escape.envs.kuiper_escape.lidar import LIDAR_ENGINES, motion_observation
+from gym_kuiper_escape.envs.kuiper_escape.rock import ROCK_KINEMATICS
+
+
+class KuiperEscapeMulti:
+    """ Multi-Agent Kuiper Escape Environment
+
+    K agents fly their own ships through one shared asteroid field, e.g. for
+    population-based training. A separate KuiperEscape per agent simulates
+    a separate copy of the rocks. Here the rocks are spawned and moved once
+    per frame, whatever the number of agents. Only the ship movement, the
+    collision test, the lidar scan and the reward are computed per agent.
+    All lidar scans run on one lidar engine over the game's rock pool and
+    spatial index, so the scratch arrays of the scan are shared as well.
+
+    Observations, rewards and dones are arrays with one entry per agent:
+     - observation: shape (K, 2 * lidar_n_beams, 1), the lidar observation
+       of KuiperEscape for each agent (4 * lidar_n_beams with lidar_motion)
+     - reward: shape (K,), the reward of KuiperEscape, 0 for agents that
+       are done
+     - done: shape (K,), an agent is done once it runs out of lives, and all
+       agents are done at the time limit
+
+    The episode ends once all agents are done, call reset() then. Agents
+    that are done keep their last observation, and no longer collide with
+    rocks or show up in the lidar of the others (ships never do).
+
+    Observations are written into one preallocated buffer, and step() and
+    reset() return copies of it unless copy_obs=False.
+    """
+
+    metadata = {'render.modes': ['human', 'rgb_array']}
+
+    def __init__(
+        self,
+        n_agents=4,
+        mode='agent',
+        lives_start=1,
+        player_speed=0.5,
+        rock_rate=1,
+        rock_speed_min=0.05,
+        rock_speed_max=0.10,
+        rock_size_min=0.05,
+        rock_size_max=0.10,
+        framerate=10,
+        lidar_engine='march',
+        lidar_n_beams=32,
+        obs_dtype='float16',
+        copy_obs=True,
+        rock_kinematics='step',
+        lidar_motion=False
+    ):
+        self.n_agents = n_agents
+        self.mode = mode
+        self.lives_start = lives_start
+        self.player_speed = player_speed
+        self.rock_rate = rock_rate
+        self.rock_size_min = rock_size_min
+        self.rock_size_max = rock_size_max
+        self.rock_speed_min = rock_speed_min
+        self.rock_speed_max = rock_speed_max
+        self.framerate = framerate
+        if lidar_engine not in LIDAR_ENGINES:
+            raise ValueError(
+                "lidar_engine must be one of " + str(list(LIDAR_ENGINES))
+            )
+        self.lidar_engine = lidar_engine
+        if obs_dtype not in OBS_DTYPES:
+            raise ValueError("obs_dtype must be one of " + str(list(OBS_DTYPES)))
+        self.obs_dtype = obs_dtype
+        self.copy_obs = copy_obs
+        if rock_kinematics not in ROCK_KINEMATICS:
+            raise ValueError(
+                "rock_kinematics must be one of " + str(list(ROCK_KINEMATICS))
+            )
+        self.rock_kinematics = rock_kinematics
+        self.lidar_motion = lidar_motion
+        self.seed()
+        self.game = MultiGame(
+            n_players=n_agents,
+            mode=self.mode,
+            lives=self.lives_start,
+            player_speed=self.player_speed,
+            rock_rate=self.rock_rate,
+            rock_speed_min=self.rock_speed_min,
+            rock_speed_max=self.rock_speed_max,
+            rock_size_min=self.rock_size_min,
+            rock_size_max=self.rock_size_max,
+            framerate=self.framerate,
+            rng=self.rng,
+            rock_kinematics=self.rock_kinematics
+        )
+        self.lidar_n_beams = lidar_n_beams
+        self.lidar_step_pct = 0.02
+        self.lidar_max_radius_pct = 0.5
+        self.lidar_horizon_s = 5  # time to impact clipped at 5 seconds
+        self.lidar_size = self.lidar_n_beams * (4 if self.lidar_motion else 2)
+        self.lidar = LIDAR_ENGINES[self.lidar_engine](
+            x=self.game.player.x,
+            y=self.game.player.y,
+            n_beams=self.lidar_n_beams,
+            step=self.lidar_step_pct * self.game.screen_size,
+            max_radius=self.lidar_max_radius_pct * self.game.screen_size,
+            screen_size=self.game.screen_size,
+            motion=self.lidar_motion
+        )
+        self.iteration = 0
+        self.iteration_max = 15 * 60 * self.game.framerate  # 15 minutes
+        self.obs_buffer = np.zeros((n_agents, self.lidar_size, 1), dtype=self.obs_dtype)
+        self.obs_radius = np.zeros(self.lidar_n_beams)
+        self.obs_motion = np.zeros(self.lidar_n_beams * 2)
+        self.reward = np.zeros(n_agents)
+        self.done = np.zeros(n_agents, dtype=bool)
+        self.action_space = Discrete(5)
+        low = np.zeros((self.lidar_size, 1))
+        if self.lidar_motion:
+            low[2 * self.lidar_n_beams:3 * self.lidar_n_beams] = -1
+        self.observation_space = Box(low=low, high=1, shape=(self.lidar_size, 1), dtype=self.obs_dtype)
+        self.reward_range = (0, 1)
+
+    def seed(self, seed=None):
+        self.rng = random.Random(seed)
+        return [seed]
+
+    def step(self, actions):
+        """Step the shared game by one frame, with one action per agent.
+        Args:
+            actions (array): shape (K,), actions of agents that are done are
+                ignored
+        Returns:
+            observation (array): shape (K, 2 * lidar_n_beams, 1), or
+                (K, 4 * lidar_n_beams, 1) with lidar_motion
+            reward (array): shape (K,)
+            done (array): shape (K,)
+            info (dict): iteration, time and the lives of every agent
+        """
+        self.game.step_frame(actions)
+        self.iteration += 1
+
+        # Observation, reward and stop condition of the agents still in the
+        # game, the others keep their last observation
+        time_out = self.iteration > self.iteration_max
+        for k, player in enumerate(self.game.players):
+            if self.done[k]:
+                self.reward[k] = 0
+                continue
+            self.get_state(player, out=self.obs_buffer[k])
+            self.reward[k] = self.get_reward(player)
+            self.done[k] = player.lives == 0 or time_out
+
+        info = {
+            'iteration': self.iteration,
+            'time': self.game.time,
+            'lives': np.array([player.lives for player in self.game.players])
+        }
+        return (self.share_observation(), self.reward.copy(), self.done.copy(), info)
+
+    def reset(self):
+        self.game.reset_state(rng=self.rng)
+        self.iteration = 0
+        self.done[:] = False
+        for k, player in enumerate(self.game.players):
+            self.get_state(player, out=self.obs_buffer[k])
+        return self.share_observation()
+
+    # Reward of 1 unless the player is near the corners, as in KuiperEscape
+    def get_reward(self, player):
+        xp = player.x / self.game.screen_size
+        yp = player.y / self.game.screen_size
+        dist_from_center = math.sqrt((xp-0.5)**2 + (yp-0.5)**2)
+        if dist_from_center < 0.35:
+            reward = 1
+        else:
+            reward = 0
+        return reward
+
+    # The observation buffer is shared with the caller unless copy_obs
+    def share_observation(self):
+        if self.copy_obs:
+            return self.obs_buffer.copy()
+        return self.obs_buffer
+
+    def get_state(self, player, out):
+        """Lidar observation of one player, as KuiperEscape.get_state"""
+        self.lidar.sync_position(player)
+        radius, collide = self.lidar.scan(
+            collide_sprites=self.game.rocks,
+            grid=self.game.grid
+        )
+        n_beams = self.lidar_n_beams
+        max_radius = self.lidar_max_radius_pct * self.game.screen_size
+        np.divide(radius, max_radius, out=self.obs_radius)
+        np.copyto(out[:n_beams, 0], self.obs_radius)
+        np.copyto(out[n_beams:2 * n_beams, 0], collide, casting='unsafe')
+        if self.lidar_motion:
+            closing, time_to_impact = self.lidar.get_motion()
+            motion_observation(
+                closing, time_to_impact,
+                speed_max=self.game.rocks.speed_max,
+                horizon=self.lidar_horizon_s * self.game.framerate,
+                out=self.obs_motion
+            )
+            np.copyto(out[2 * n_beams:, 0], self.obs_motion)
+        return out
+
+    def render(self, mode='human'):
+        """Render all ships and the shared rock field, as KuiperEscape.render"""
+        if mode == 'human':
+            self.game.turn_on_screen()
+            self.game.draw()
+            self.game.render_screen()
+            self.game.clock.tick(self.game.framerate)
+
+        if mode == 'rgb_array':
+            import pygame
+            self.game.draw()
+            view = pygame.surfarray.pixels3d(self.game.screen)
+            frame = view.transpose(1, 0, 2)[:, :, ::-1].copy()
+            del view
+            return frame
+
+    def close(self):
+        pass
+
+    def get_config(self):
+        """Constructor arguments of this environment"""
+        return {
+            'n_agents': self.n_agents,
+            'mode': self.mode,
+            'lives_start': self.lives_start,
+            'player_speed': self.player_speed,
+            'rock_rate': self.rock_rate,
+            'rock_speed_min': self.rock_speed_min,
+            'rock_speed_max': self.rock_speed_max,
+            'rock_size_min': self.rock_size_min,
+            'rock_size_max': self.rock_size_max,
+            'framerate': self.framerate,
+            'lidar_engine': self.lidar_engine,
+            'lidar_n_beams': self.lidar_n_beams,
+            'obs_dtype': self.obs_dtype,
+            'copy_obs': self.copy_obs,
+            'rock_kinematics': self.rock_kinematics,
+            'lidar_motion': self.lidar_motion
+        }
+
+    def clone_state(self):
+        """Snapshot of the shared game, to be passed to restore_state"""
+        return (self.game.clone_state(), self.iteration, self.done.copy())
+
+    def restore_state(self, state):
+        game, self.iteration, done = state
+        self.game.restore_state(game)
+        self.done[...] = done
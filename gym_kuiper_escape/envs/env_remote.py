@@ -0,0 +1,275 @@
+"""
+Remote Environments
+
+Protocol and clients of the Kuiper Escape environment server (see
+env_server). The server hosts a pool of environments, and a client steps any
+number of them with one message. Messages are a fixed header followed by a
+binary payload, observations are sent as packed arrays rather than pickles:
+
+    magic    4 bytes   b'KES1'
+    code     uint8     command of a request, status of a reply
+    length   uint32    payload length
+
+Request payloads, with n uint32, env ids uint32, actions uint8 and seeds
+int64 (-1 for a random seed):
+
+    spec     (empty)
+    reset    n, env_ids
+    step     n, env_ids, actions
+    seed     n, env_ids, seeds
+    stats    (empty)
+
+Reply payloads:
+
+    spec     JSON (environment config and observation layout)
+    reset    observations
+    step     observations, rewards float64, dones uint8, iterations uint32,
+             times float64, JSON of the other info entries, by position
+             in the request ({} if there are none, e.g. info['rock_pool']
+             at the end of an episode)
+    seed     JSON (seeds used, which can exceed 64 bits)
+    stats    JSON
+    error    UTF-8 message
+
+Observations are packed per observation key (a single array unless
+obs_type='lidar_pixels'), each as n consecutive arrays of the observation
+shape and dtype.
+
+"""
+# Standard imports
+import json
+import socket
+import struct
+
+# 3rd party imports
+import numpy as np
+import gym
+from gym.spaces import Discrete, Box, Dict
+
+MAGIC = b'KES1'
+HEADER = struct.Struct('<4sBI')
+
+CMD_SPEC = 0
+CMD_RESET = 1
+CMD_STEP = 2
+CMD_SEED = 3
+CMD_STATS = 4
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+def pack_message(code, payload=b''):
+    return HEADER.pack(MAGIC, code, len(payload)) + payload
+
+
+def unpack_header(header):
+    magic, code, length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Not a Kuiper Escape server message: " + repr(magic))
+    return code, length
+
+
+def pack_request(env_ids, *arrays):
+    """Payload of n, env ids and one value per env id of each of `arrays`"""
+    env_ids = np.asarray(env_ids, dtype=np.uint32)
+    chunks = [struct.pack('<I', len(env_ids)), env_ids.tobytes()]
+    for values, dtype in arrays:
+        values = np.asarray(values, dtype=dtype)
+        if values.shape != env_ids.shape:
+            raise ValueError("Expected one value per env id")
+        chunks.append(values.tobytes())
+    return b''.join(chunks)
+
+
+def unpack_request(payload, *dtypes):
+    """Inverse of pack_request: env ids and one array per dtype"""
+    n, = struct.unpack_from('<I', payload)
+    offset = 4
+    arrays = []
+    for dtype in (np.uint32,) + dtypes:
+        dtype = np.dtype(dtype)
+        arrays.append(np.frombuffer(payload, dtype=dtype, count=n, offset=offset))
+        offset += n * dtype.itemsize
+    if offset != len(payload):
+        raise ValueError("Malformed request payload")
+    return arrays
+
+
+def get_layout(spec):
+    """(key, shape, dtype) of every observation array, key None for a single
+    (non-dict) observation
+    """
+    return [
+        (entry['key'], tuple(entry['shape']), np.dtype(entry['dtype']))
+        for entry in spec['observation']
+    ]
+
+
+def unpack_observations(layout, n, buffer, offset=0):
+    """Batch of n observations (leading axis n) packed at `offset` in
+    `buffer`, as arrays sharing its memory. Returns the observations and the
+    offset after them.
+    """
+    observation = {}
+    for key, shape, dtype in layout:
+        count = n * int(np.prod(shape))
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+        observation[key] = array.reshape((n,) + shape)
+        offset += count * dtype.itemsize
+    if None in observation:
+        return observation[None], offset
+    return observation, offset
+
+
+# Bounds of a Box space are sent as a number, or as nested lists where they
+# vary (e.g. the lidar motion channels)
+def encode_bound(array):
+    if (array == array.flat[0]).all():
+        return float(array.flat[0])
+    return array.astype(np.float64).tolist()
+
+
+def decode_bound(bound):
+    if isinstance(bound, list):
+        return np.array(bound)
+    return bound
+
+
+def get_observation_space(spec):
+    spaces = {}
+    for entry in spec['observation']:
+        spaces[entry['key']] = Box(
+            low=decode_bound(entry['low']),
+            high=decode_bound(entry['high']),
+            shape=tuple(entry['shape']),
+            dtype=np.dtype(entry['dtype'])
+        )
+    if None in spaces:
+        return spaces[None]
+    return Dict(spaces)
+
+
+class EnvClient:
+    """Client of an EnvServer, stepping any of its environments in batches
+
+    Args:
+        address: path of a Unix socket, or (host, port) of a TCP socket
+
+    Observations are returned with a leading axis of one entry per env id
+    (or a dict of such arrays), in the same order as the env ids.
+    """
+    def __init__(self, address):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.connect(address)
+        self.closed = False
+        self.spec = json.loads(self.request(CMD_SPEC).decode('utf-8'))
+        self.n_envs = self.spec['n_envs']
+        self.layout = get_layout(self.spec)
+        self.action_space = Discrete(self.spec['n_actions'])
+        self.observation_space = get_observation_space(self.spec)
+        self.reward_range = tuple(self.spec['reward_range'])
+
+    def request(self, command, payload=b''):
+        """Send one request and return the payload of the reply"""
+        self.sock.sendall(pack_message(command, payload))
+        status, length = unpack_header(self.receive(HEADER.size))
+        payload = self.receive(length)
+        if status != STATUS_OK:
+            raise RuntimeError("Env server error: " + payload.decode('utf-8'))
+        return payload
+
+    def receive(self, size):
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            n = self.sock.recv_into(view[received:])
+            if n == 0:
+                raise ConnectionError("Env server closed the connection")
+            received += n
+        return buffer
+
+    def reset(self, env_ids):
+        payload = self.request(CMD_RESET, pack_request(env_ids))
+        return unpack_observations(self.layout, len(env_ids), payload)[0]
+
+    def step(self, env_ids, actions):
+        """Step the environments `env_ids` with one action each.
+        Returns:
+            observation (array or dict of arrays): leading axis len(env_ids)
+            reward (array): shape (len(env_ids),)
+            done (array): shape (len(env_ids),)
+            info (list): one info dict per environment
+        """
+        n = len(env_ids)
+        payload = self.request(CMD_STEP, pack_request(env_ids, (actions, np.uint8)))
+        observation, offset = unpack_observations(self.layout, n, payload)
+        arrays = []
+        for dtype in (np.float64, np.uint8, np.uint32, np.float64):
+            arrays.append(np.frombuffer(payload, dtype=dtype, count=n, offset=offset))
+            offset += n * np.dtype(dtype).itemsize
+        reward, done, iteration, time = arrays
+        infos = [
+            {'iteration': int(i), 'time': float(t)}
+            for i, t in zip(iteration, time)
+        ]
+        for i, extra in json.loads(bytes(payload[offset:]).decode('utf-8')).items():
+            infos[int(i)].update(extra)
+        return (observation, reward, done.astype(bool), infos)
+
+    def seed(self, env_ids, seeds=None):
+        if seeds is None:
+            seeds = [None] * len(env_ids)
+        seeds = [-1 if seed is None else seed for seed in seeds]
+        payload = self.request(CMD_SEED, pack_request(env_ids, (seeds, np.int64)))
+        return json.loads(payload.decode('utf-8'))
+
+    def stats(self):
+        """Server counters: stepping passes, requests and env steps"""
+        return json.loads(self.request(CMD_STATS).decode('utf-8'))
+
+    def close(self):
+        if not self.closed:
+            self.sock.close()
+            self.closed = True
+
+
+class RemoteKuiperEscape(gym.Env):
+    """Kuiper Escape environment hosted by an EnvServer
+
+    Implements the same gym.Env interface as KuiperEscape for the server
+    environment `env_id`, without running the game (or pygame) in the
+    calling process. Rendering is not available remotely.
+    """
+    def __init__(self, address, env_id=0):
+        self.client = EnvClient(address)
+        if not 0 <= env_id < self.client.n_envs:
+            raise IndexError("Env id out of range: " + str(env_id))
+        self.env_id = env_id
+        self.action_space = self.client.action_space
+        self.observation_space = self.client.observation_space
+        self.reward_range = self.client.reward_range
+
+    def step(self, action):
+        observation, reward, done, infos = self.client.step([self.env_id], [action])
+        return (self.first(observation), float(reward[0]), bool(done[0]), infos[0])
+
+    def reset(self):
+        return self.first(self.client.reset([self.env_id]))
+
+    def seed(self, seed=None):
+        return self.client.seed([self.env_id], [seed])
+
+    def close(self):
+        self.client.close()
+
+    # Observation of the only environment of a batch
+    def first(self, observation):
+        if isinstance(observation, dict):
+            return {key: value[0] for key, value in observation.items()}
+        return observation[0]
@@ -0,0 +1,316 @@
+"""
+Kuiper Escape Environment Server
+
+Hosts a pool of KuiperEscape environments for actor processes, which then do
+not need to run the game themselves. Clients connect over a Unix or TCP
+socket (see env_remote for the protocol and the clients) and send batched
+requests, each covering any number of env ids.
+
+The server runs on asyncio. Requests are not served as they arrive, but
+queued for a stepper task: each stepping pass takes all requests that are
+pending by then, from all clients, and serves them in one loop over the
+environments before any reply is written. While a pass runs, new requests
+queue up for the next one, so busy clients are coalesced automatically.
+
+Usage:
+    python -m gym_kuiper_escape.envs.env_server --unix /tmp/kuiper.sock --n-envs 16
+    python -m gym_kuiper_escape.envs.env_server --port 5555 --env-kwargs '{"rock_rate": 2}'
+
+Every environment renders on its own offscreen surface, so one server can
+host any number of environments with pixel observations.
+"""
+# Standard imports
+import argparse
+import asyncio
+import json
+import os
+import struct
+import threading
+
+# 3rd party imports
+import numpy as np
+from gym.spaces import Dict
+
+# Local imports
+from gym_kuiper_escape.envs.env_base import KuiperEscape
+from gym_kuiper_escape.envs.env_remote import (
+    MAGIC,
+    HEADER,
+    CMD_SPEC,
+    CMD_RESET,
+    CMD_STEP,
+    CMD_SEED,
+    CMD_STATS,
+    STATUS_OK,
+    STATUS_ERROR,
+    pack_message,
+    unpack_header,
+    unpack_request,
+    get_layout,
+    encode_bound
+)
+
+
+class EnvServer:
+    """Batched server of `n_envs` KuiperEscape environments
+
+    Args:
+        n_envs: number of environments in the pool, env ids 0 to n_envs - 1
+        env_kwargs: KuiperEscape constructor arguments of every environment
+    """
+    def __init__(self, n_envs=8, env_kwargs=None):
+        self.n_envs = n_envs
+        self.env_kwargs = env_kwargs or {}
+
+        # Observations are packed into the replies, so share the env buffers
+        self.envs = [
+            KuiperEscape(**dict(self.env_kwargs, copy_obs=False))
+            for _ in range(n_envs)
+        ]
+        self.spec = self.get_spec()
+        self.layout = get_layout(self.spec)
+        self.pending = []
+        self.wakeup = None
+        self.server = None
+        self.stepper = None
+        self.handlers = {}
+        self.loop = None
+        self.thread = None
+
+        # Counters, the number of requests per pass shows the coalescing
+        self.n_passes = 0
+        self.n_requests = 0
+        self.n_env_steps = 0
+
+    def get_spec(self):
+        env = self.envs[0]
+        if isinstance(env.observation_space, Dict):
+            spaces = list(env.observation_space.spaces.items())
+        else:
+            spaces = [(None, env.observation_space)]
+        return {
+            'n_envs': self.n_envs,
+            'config': env.get_config(),
+            'n_actions': int(env.action_space.n),
+            'reward_range': list(env.reward_range),
+            'observation': [
+                {
+                    'key': key,
+                    'shape': list(space.shape),
+                    'dtype': np.dtype(space.dtype).str,
+                    'low': encode_bound(space.low),
+                    'high': encode_bound(space.high)
+                }
+                for key, space in spaces
+            ]
+        }
+
+    async def start(self, address):
+        """Listen on `address`, the path of a Unix socket or (host, port)"""
+        self.wakeup = asyncio.Event()
+        self.stepper = asyncio.ensure_future(self.run_passes())
+        if isinstance(address, str):
+            self.server = await asyncio.start_unix_server(self.handle_client, path=address)
+        else:
+            host, port = address
+            self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server
+
+    async def serve(self, address):
+        server = await self.start(address)
+        async with server:
+            await server.serve_forever()
+
+    def start_thread(self, address):
+        """Serve from a background thread with its own event loop (e.g. to
+        test clients on localhost). Returns once the server is listening.
+        """
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.start(address))
+            ready.set()
+            self.loop.run_forever()
+            self.loop.run_until_complete(self.shutdown())
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def stop_thread(self):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+
+    async def shutdown(self):
+        """Stop listening, cancel the stepper and the client handlers and
+        wait until their connections are closed
+        """
+        self.server.close()
+        tasks = [self.stepper] + list(self.handlers)
+        writers = list(self.handlers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for writer in writers:
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self.handlers[task] = writer
+        try:
+            while True:
+                command, length = unpack_header(await reader.readexactly(HEADER.size))
+                payload = await reader.readexactly(length)
+                if command == CMD_SPEC:
+                    reply = [pack_message(STATUS_OK, json.dumps(self.spec).encode('utf-8'))]
+                elif command == CMD_STATS:
+                    reply = [pack_message(STATUS_OK, json.dumps(self.stats()).encode('utf-8'))]
+                else:
+                    future = asyncio.get_running_loop().create_future()
+                    self.pending.append((command, payload, future))
+                    self.wakeup.set()
+                    reply = await future
+                writer.writelines(reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # client disconnected
+        except ValueError:
+            pass  # not a client of this server
+        except asyncio.CancelledError:
+            pass  # server shutdown, end the handler without an error
+        finally:
+            del self.handlers[task]
+            writer.close()
+
+    async def run_passes(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            requests, self.pending = self.pending, []
+            self.run_pass(requests)
+
+    def run_pass(self, requests):
+        """Serve all `requests` in one pass, then hand out the replies"""
+        self.n_passes += 1
+        self.n_requests += len(requests)
+        for command, payload, future in requests:
+            # Any error of a request (bad request, or raised by an env) is
+            # sent back to its client, and the pass goes on
+            try:
+                reply = self.serve_request(command, payload)
+            except (ValueError, IndexError, struct.error) as e:
+                reply = [pack_message(STATUS_ERROR, str(e).encode('utf-8'))]
+            except Exception as e:
+                message = '{}: {}'.format(type(e).__name__, e)
+                reply = [pack_message(STATUS_ERROR, message.encode('utf-8'))]
+            if not future.cancelled():
+                future.set_result(reply)
+
+    def serve_request(self, command, payload):
+        """Reply to one request, as a list of buffers to be written"""
+        if command == CMD_RESET:
+            env_ids, = unpack_request(payload)
+            envs = self.get_envs(env_ids)
+            chunks = self.new_observations(len(envs))
+            for i, env in enumerate(envs):
+                self.pack_observation(chunks, i, env.reset())
+        elif command == CMD_STEP:
+            env_ids, actions = unpack_request(payload, np.uint8)
+            envs = self.get_envs(env_ids)
+            n = len(envs)
+            chunks = self.new_observations(n)
+            reward = np.empty(n, dtype=np.float64)
+            done = np.empty(n, dtype=np.uint8)
+            iteration = np.empty(n, dtype=np.uint32)
+            time = np.empty(n, dtype=np.float64)
+            extras = {}
+            for i, (env, action) in enumerate(zip(envs, actions.tolist())):
+                observation, reward[i], done[i], info = env.step(action)
+                self.pack_observation(chunks, i, observation)
+                iteration[i] = info['iteration']
+                time[i] = info['time']
+                extra = {k: v for k, v in info.items() if k not in ('iteration', 'time')}
+                if extra:
+                    extras[i] = extra
+            self.n_env_steps += n
+            extras = json.dumps(extras, default=lambda value: np.asarray(value).tolist())
+            chunks += [reward, done, iteration, time, np.frombuffer(extras.encode('utf-8'), dtype=np.uint8)]
+        elif command == CMD_SEED:
+            env_ids, seeds = unpack_request(payload, np.int64)
+            envs = self.get_envs(env_ids)
+            seeds = [
+                env.seed(None if seed < 0 else seed)[0]
+                for env, seed in zip(envs, seeds.tolist())
+            ]
+            return [pack_message(STATUS_OK, json.dumps(seeds).encode('utf-8'))]
+        else:
+            raise ValueError("Unknown command: " + str(command))
+        length = sum(chunk.nbytes for chunk in chunks)
+        return [HEADER.pack(MAGIC, STATUS_OK, length)] + [
+            memoryview(chunk).cast('B') for chunk in chunks
+        ]
+
+    def get_envs(self, env_ids):
+        envs = []
+        for env_id in env_ids.tolist():
+            if not 0 <= env_id < self.n_envs:
+                raise IndexError("Env id out of range: " + str(env_id))
+            envs.append(self.envs[env_id])
+        return envs
+
+    # Arrays of a batch of n observations, one per observation key
+    def new_observations(self, n):
+        return [np.empty((n,) + shape, dtype=dtype) for _, shape, dtype in self.layout]
+
+    # Copy an observation out of the env buffers right away, since the same
+    # env may be stepped again later in the pass
+    def pack_observation(self, chunks, i, observation):
+        for (key, _, _), packed in zip(self.layout, chunks):
+            packed[i] = observation if key is None else observation[key]
+
+    def stats(self):
+        return {
+            'passes': self.n_passes,
+            'requests': self.n_requests,
+            'env_steps': self.n_env_steps
+        }
+
+    def close(self):
+        self.stop_thread()
+        for env in self.envs:
+            env.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Kuiper Escape environment server')
+    parser.add_argument('--unix', help='path of the Unix socket to listen on')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5555)
+    parser.add_argument('--n-envs', type=int, default=8)
+    parser.add_argument('--env-kwargs', default='{}',
+        help='JSON encoded KuiperEscape constructor arguments')
+    args = parser.parse_args()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    server = EnvServer(n_envs=args.n_envs, env_kwargs=json.loads(args.env_kwargs))
+    address = args.unix if args.unix else (args.host, args.port)
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
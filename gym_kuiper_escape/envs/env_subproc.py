@@ -0,0 +1,265 @@
+# Standard imports
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+
+# 3rd party imports
+import numpy as np
+from gym.spaces import Dict
+
+# Local imports
+from gym_kuiper_escape.envs.env_base import KuiperEscape
+
+# Imported once by the fork-server, and inherited by every worker
+PRELOAD_MODULES = [
+    'numpy',
+    'pygame',
+    'gym',
+    'gym_kuiper_escape.envs',
+    'gym_kuiper_escape.envs.kuiper_escape.asset_preload'
+]
+
+
+def create_shared_array(shape, dtype):
+    size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    shm = SharedMemory(create=True, size=size)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def attach_shared_array(spec):
+    name, shape, dtype = spec
+    shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def write_observation(shared_obs, env_id, observation):
+    if isinstance(observation, dict):
+        for key, value in observation.items():
+            shared_obs[key][env_id] = value
+    else:
+        shared_obs[None][env_id] = observation
+
+
+def copy_observation(observation):
+    if isinstance(observation, dict):
+        return {key: np.array(value) for key, value in observation.items()}
+    return np.array(observation)
+
+
+def worker(conn, env_ids, env_kwargs, specs):
+    """Worker process loop. Owns the environments `env_ids`, reads their
+    actions from shared memory and writes observations, rewards and dones
+    straight back into shared memory. Only commands, acknowledgements and
+    the small info dicts travel through the pipe.
+    """
+    # Observations are copied into shared memory, so share the env buffers
+    envs = [KuiperEscape(**dict(env_kwargs, copy_obs=False)) for _ in env_ids]
+    handles = []
+    shared = {}
+    for name, spec in specs.items():
+        shm, array = attach_shared_array(spec)
+        handles.append(shm)
+        shared[name] = array
+    shared_obs = {}
+    for name, array in shared.items():
+        if name.startswith('obs:'):
+            shared_obs[name[4:] or None] = array
+
+    try:
+        while True:
+            cmd, data = conn.recv()
+            if cmd == 'step':
+                infos = []
+                for env_id, env in zip(env_ids, envs):
+                    observation, reward, done, info = env.step(shared['actions'][env_id])
+                    if done:
+                        info['terminal_observation'] = copy_observation(observation)
+                        observation = env.reset()
+                    write_observation(shared_obs, env_id, observation)
+                    shared['rewards'][env_id] = reward
+                    shared['dones'][env_id] = done
+                    infos.append(info)
+                conn.send(infos)
+            elif cmd == 'reset':
+                for env_id, env in zip(env_ids, envs):
+                    write_observation(shared_obs, env_id, env.reset())
+                conn.send(None)
+            elif cmd == 'seed':
+                conn.send([
+                    env.seed(None if data is None else data + env_id)[0]
+                    for env_id, env in zip(env_ids, envs)
+                ])
+            elif cmd == 'close':
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for env in envs:
+            env.close()
+        del shared, shared_obs
+        for shm in handles:
+            shm.close()
+        conn.close()
+
+
+class SubprocVectorKuiperEscape:
+    """ Multiprocess Kuiper Escape Vector Environment
+
+    Runs `n_envs` KuiperEscape environments in `n_workers` worker processes,
+    each worker owning a contiguous group of environments. Actions,
+    observations, rewards and dones are exchanged through
+    `multiprocessing.shared_memory` arrays, so observations are never pickled.
+
+    Stepping is split into `step_async(actions)` and `step_wait()`, so the
+    learner can overlap inference with simulation. Environments that finish
+    are reset automatically, with the last observation of the finished
+    episode in `info['terminal_observation']`.
+
+    With the 'forkserver' start method (default where available), pygame,
+    gym, this package and the decoded sprite assets are imported once in the
+    fork-server, so new workers start from a warm process.
+
+    Every environment renders on its own offscreen surface, so a worker can
+    step any number of environments with pixel observations.
+    """
+
+    def __init__(
+        self,
+        n_envs=8,
+        n_workers=None,
+        env_kwargs=None,
+        start_method=None,
+        copy=True
+    ):
+        self.n_envs = n_envs
+        self.n_workers = min(n_workers or mp.cpu_count(), n_envs)
+        self.env_kwargs = env_kwargs or {}
+        self.copy = copy
+        self.waiting = False
+        self.closed = False
+
+        # Spaces, and observation layout, from a local reference environment
+        env = KuiperEscape(**self.env_kwargs)
+        self.action_space = env.action_space
+        self.observation_space = env.observation_space
+        self.reward_range = env.reward_range
+        observation = env.reset()
+        env.close()
+
+        # Shared memory arrays
+        self.handles = []
+        self.specs = {}
+        self.shared = {}
+        if isinstance(self.observation_space, Dict):
+            layout = {'obs:' + key: value for key, value in observation.items()}
+        else:
+            layout = {'obs:': observation}
+        for name, value in layout.items():
+            self.add_shared_array(name, (n_envs,) + value.shape, value.dtype)
+        self.add_shared_array('actions', (n_envs,), np.int64)
+        self.add_shared_array('rewards', (n_envs,), np.float64)
+        self.add_shared_array('dones', (n_envs,), np.bool_)
+
+        # Start workers
+        if start_method is None:
+            methods = mp.get_all_start_methods()
+            start_method = 'forkserver' if 'forkserver' in methods else 'spawn'
+        ctx = mp.get_context(start_method)
+        if start_method == 'forkserver':
+            ctx.set_forkserver_preload(PRELOAD_MODULES)
+        self.groups = np.array_split(np.arange(n_envs), self.n_workers)
+        self.conns = []
+        self.processes = []
+        for env_ids in self.groups:
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=worker,
+                args=(child_conn, [int(i) for i in env_ids], self.env_kwargs, self.specs),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.processes.append(process)
+
+    def add_shared_array(self, name, shape, dtype):
+        shm, array = create_shared_array(shape, dtype)
+        self.handles.append(shm)
+        self.specs[name] = (shm.name, shape, np.dtype(dtype).str)
+        self.shared[name] = array
+
+    def get_observation(self):
+        if isinstance(self.observation_space, Dict):
+            observation = {
+                name[4:]: array for name, array in self.shared.items()
+                if name.startswith('obs:')
+            }
+        else:
+            observation = self.shared['obs:']
+        if self.copy:
+            observation = copy_observation(observation)
+        return observation
+
+    def step_async(self, actions):
+        """Send actions to the workers and return immediately"""
+        self.shared['actions'][:] = actions
+        for conn in self.conns:
+            conn.send(('step', None))
+        self.waiting = True
+
+    def step_wait(self):
+        """Wait for the workers to finish the step started by step_async.
+        Returns:
+            observation (array or dict of arrays): leading axis n_envs
+            reward (array): shape (n_envs,)
+            done (array): shape (n_envs,)
+            info (list): one info dict per environment
+        """
+        infos = []
+        for conn in self.conns:
+            infos.extend(conn.recv())
+        self.waiting = False
+        reward = self.shared['rewards'].copy()
+        done = self.shared['dones'].copy()
+        return (self.get_observation(), reward, done, infos)
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def reset(self):
+        for conn in self.conns:
+            conn.send(('reset', None))
+        for conn in self.conns:
+            conn.recv()
+        return self.get_observation()
+
+    def seed(self, seed=None):
+        for conn in self.conns:
+            conn.send(('seed', seed))
+        seeds = []
+        for conn in self.conns:
+            seeds.extend(conn.recv())
+        return seeds
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self.waiting:
+                for conn in self.conns:
+                    conn.recv()
+            for conn in self.conns:
+                conn.send(('close', None))
+        except (EOFError, BrokenPipeError):
+            pass  # worker already exited
+        for process in self.processes:
+            process.join()
+        self.shared.clear()
+        for shm in self.handles:
+            shm.close()
+            shm.unlink()
+        self.closed = True
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()
@@ -0,0 +1,305 @@
+# Standard imports
+import math
+
+# 3rd party imports
+import numpy as np
+from gym.spaces import Discrete, Box
+
+# Local imports
+from gym_kuiper_escape.envs.env_base import OBS_DTYPES
+from gym_kuiper_escape.envs.kuiper_escape.lidar import beam_directions, cast_rays, motion_observation
+from gym_kuiper_escape.envs.kuiper_escape.player import get_player_dims
+
+
+class KuiperEscapeVector:
+    """ Batched Kuiper Escape Environment
+
+    Simulates N independent Kuiper Escape games at once. Instead of one
+    `Game` per environment, with its own player and sprite groups, the state
+    of every game is kept in flat NumPy arrays (struct-of-arrays layout):
+     - player x/y/lives, one entry per environment
+     - rock x/y/direction/speed/size, one row of rock slots per environment,
+       plus an alive mask marking the occupied slots
+
+    Each step spawns, moves, culls and collides the rocks of every
+    environment in a single vectorized pass, and computes the lidar of every
+    environment with one call to the analytic ray caster (including the
+    closing speeds and times to impact with lidar_motion). The dynamics,
+    rewards and stop conditions follow `Game.step_frame` and
+    `KuiperEscape.step`.
+
+    Observations are of `obs_dtype` ('float16' or 'float32'), as in
+    KuiperEscape.
+
+    Environments that finish are reset automatically. For those, the
+    returned observation is the initial observation of the new episode, and
+    the last observation of the finished episode is available in
+    `info['terminal_observation']`.
+    """
+
+    def __init__(
+        self,
+        n_envs=8,
+        lives_start=1,
+        player_speed=0.5,
+        rock_rate=1,
+        rock_speed_min=0.05,
+        rock_speed_max=0.10,
+        rock_size_min=0.05,
+        rock_size_max=0.10,
+        framerate=10,
+        rock_capacity=32,
+        lidar_n_beams=32,
+        lidar_motion=False,
+        obs_dtype='float16'
+    ):
+        if obs_dtype not in OBS_DTYPES:
+            raise ValueError("obs_dtype must be one of " + str(list(OBS_DTYPES)))
+        self.obs_dtype = obs_dtype
+        self.n_envs = n_envs
+        self.lives_start = lives_start
+        self.player_speed = player_speed
+        self.rock_rate = rock_rate
+        self.rock_size_min = rock_size_min
+        self.rock_size_max = rock_size_max
+        self.rock_speed_min = rock_speed_min
+        self.rock_speed_max = rock_speed_max
+        self.framerate = framerate
+        self.screen_size = 512
+        self.seed()
+
+        # Game constants (scaled as in Game, Player and Rock)
+        self.frames_per_rock = max(int(self.framerate / self.rock_rate), 1)
+        self.player_step = self.player_speed * self.screen_size * (1 / self.framerate)
+        self.player_w, self.player_h = get_player_dims(self.screen_size)
+        self.action_dx = np.array([0, 0, 1, 0, -1, 1, 1, -1, -1])
+        self.action_dy = np.array([0, -1, 0, 1, 0, -1, 1, 1, -1])
+
+        # Player state
+        self.frame = np.ones(n_envs, dtype=np.int64)
+        self.player_x = np.full(n_envs, self.screen_size / 2)
+        self.player_y = np.full(n_envs, self.screen_size / 2)
+        self.lives = np.full(n_envs, lives_start, dtype=np.int64)
+        self.iteration = np.zeros(n_envs, dtype=np.int64)
+        self.iteration_max = 15 * 60 * self.framerate  # 15 minutes
+
+        # Rock state, one row of slots per environment
+        self.rock_x = np.zeros((n_envs, rock_capacity))
+        self.rock_y = np.zeros((n_envs, rock_capacity))
+        self.rock_dir_x = np.zeros((n_envs, rock_capacity))
+        self.rock_dir_y = np.zeros((n_envs, rock_capacity))
+        self.rock_speed = np.zeros((n_envs, rock_capacity))
+        self.rock_size = np.zeros((n_envs, rock_capacity), dtype=np.int64)
+        self.rock_alive = np.zeros((n_envs, rock_capacity), dtype=bool)
+
+        # Lidar
+        self.lidar_n_beams = lidar_n_beams
+        self.lidar_max_radius_pct = 0.5
+        self.lidar_max_radius = self.lidar_max_radius_pct * self.screen_size
+        self.lidar_dir_x, self.lidar_dir_y = beam_directions(self.lidar_n_beams)
+        self.lidar_motion = lidar_motion
+        self.lidar_horizon_s = 5  # time to impact clipped at 5 seconds
+        self.lidar_size = self.lidar_n_beams * (4 if self.lidar_motion else 2)
+
+        self.init_obs = self.get_state()[0]
+        self.action_space = Discrete(5)
+        low = np.zeros((self.lidar_size, 1))
+        if self.lidar_motion:
+            low[2 * self.lidar_n_beams:3 * self.lidar_n_beams] = -1
+        self.observation_space = Box(low=low, high=1, shape=(self.lidar_size, 1), dtype=self.obs_dtype)
+        self.reward_range = (0, 1)
+
+    @property
+    def time(self):
+        return self.frame / self.framerate
+
+    def seed(self, seed=None):
+        self.np_random = np.random.default_rng(seed)
+        return [seed]
+
+    def step(self, actions):
+        """Step every environment by one frame.
+        Args:
+            actions (array): one action per environment, shape (N,)
+        Returns:
+            observation (array): shape (N, 2 * lidar_n_beams, 1), or
+                (N, 4 * lidar_n_beams, 1) with lidar_motion
+            reward (array): shape (N,)
+            done (array): shape (N,)
+            info (dict): iteration, time and terminal_observation arrays
+        """
+        self.step_frame(np.asarray(actions))
+        self.iteration += 1
+
+        # Gather observation
+        observation = self.get_state()
+
+        # Gather reward
+        xp = self.player_x / self.screen_size
+        yp = self.player_y / self.screen_size
+        dist_from_center = np.sqrt((xp - 0.5)**2 + (yp - 0.5)**2)
+        reward = (dist_from_center < 0.35).astype(np.int64)
+
+        # Check stop conditions
+        done = (self.lives == 0) | (self.iteration > self.iteration_max)
+
+        # Gather metadata/info
+        info = {
+            'iteration': self.iteration.copy(),
+            'time': self.time,
+            'terminal_observation': observation.copy()
+        }
+
+        # Auto-reset finished environments
+        if done.any():
+            self.reset_envs(done)
+            observation[done] = self.init_obs
+
+        return (observation, reward, done, info)
+
+    def reset(self):
+        self.reset_envs(np.ones(self.n_envs, dtype=bool))
+        return self.get_state()
+
+    def reset_envs(self, mask):
+        self.frame[mask] = 1
+        self.player_x[mask] = self.screen_size / 2
+        self.player_y[mask] = self.screen_size / 2
+        self.lives[mask] = self.lives_start
+        self.iteration[mask] = 0
+        self.rock_alive[mask] = False
+
+    def step_frame(self, actions):
+
+        # Add rocks
+        spawn = self.frame % self.frames_per_rock == 0
+        if spawn.any():
+            self.spawn_rocks(np.flatnonzero(spawn))
+
+        # Update positions
+        self.update_player(actions)
+        self.update_rocks()
+
+        # Check for collisions, deduct player life
+        left, top, right, bottom = self.get_rock_rects()
+        p_left, p_top = self.get_player_rect()
+        p_left = p_left[:, None]
+        p_top = p_top[:, None]
+        collisions = (
+            self.rock_alive
+            & (p_left < right)
+            & (p_left + self.player_w > left)
+            & (p_top < bottom)
+            & (p_top + self.player_h > top)
+        )
+        self.rock_alive &= ~collisions
+        self.lives -= collisions.sum(axis=1)
+
+        # Increment frame
+        self.frame += 1
+
+    def spawn_rocks(self, envs):
+        n = len(envs)
+        if self.rock_alive[envs].all(axis=1).any():
+            self.grow_rocks()
+        slots = np.argmin(self.rock_alive[envs], axis=1)
+
+        # Draw rock parameters as in Rock.__init__
+        rng = self.np_random
+        scale = self.screen_size * (1 / self.framerate)
+        size = rng.uniform(self.rock_size_min, self.rock_size_max, n) * self.screen_size
+        speed = rng.uniform(self.rock_speed_min * scale, self.rock_speed_max * scale, n)
+        face = rng.integers(0, 4, n)
+        angle_limit = 0.1 * math.pi
+        angle = rng.uniform(angle_limit, math.pi - angle_limit, n)
+        angle += np.array([math.pi, 0.5 * math.pi, 0, 1.5 * math.pi])[face]
+        angle = angle % (2 * math.pi)
+        along = rng.integers(0, self.screen_size + 1, n).astype(np.float64)
+        before = (face == 0) | (face == 3)  # top or left face
+        outside = np.where(before, -size / 2, self.screen_size + size / 2)
+        vertical = (face == 0) | (face == 2)  # top or bottom face
+
+        self.rock_x[envs, slots] = np.where(vertical, along, outside)
+        self.rock_y[envs, slots] = np.where(vertical, outside, along)
+        self.rock_dir_x[envs, slots] = np.cos(angle)
+        self.rock_dir_y[envs, slots] = np.sin(angle)
+        self.rock_speed[envs, slots] = speed
+        self.rock_size[envs, slots] = size.astype(np.int64)
+        self.rock_alive[envs, slots] = True
+
+    def grow_rocks(self):
+        for name in [
+            'rock_x', 'rock_y', 'rock_dir_x', 'rock_dir_y',
+            'rock_speed', 'rock_size', 'rock_alive'
+        ]:
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)], axis=1))
+
+    def update_player(self, actions):
+        self.player_x += self.player_step * self.action_dx[actions]
+        self.player_y += self.player_step * self.action_dy[actions]
+
+        # Keep player on the screen
+        left, top = self.get_player_rect()
+        clamp = left < 0
+        self.player_x[clamp] = self.player_w // 2
+        clamp = left + self.player_w > self.screen_size
+        self.player_x[clamp] = self.screen_size - self.player_w + self.player_w // 2
+        clamp = top <= 0
+        self.player_y[clamp] = self.player_h // 2
+        clamp = top + self.player_h >= self.screen_size
+        self.player_y[clamp] = self.screen_size - self.player_h + self.player_h // 2
+
+    def update_rocks(self):
+        self.rock_x += self.rock_speed * self.rock_dir_x
+        self.rock_y += -self.rock_speed * self.rock_dir_y
+
+        # Kill rocks that moved off of the screen
+        left, top, right, bottom = self.get_rock_rects()
+        self.rock_alive &= ~(
+            (right < 0)
+            | (left > self.screen_size)
+            | (top > self.screen_size)
+            | (bottom < 0)
+        )
+
+    def get_player_rect(self):
+        left = np.trunc(self.player_x) - self.player_w // 2
+        top = np.trunc(self.player_y) - self.player_h // 2
+        return left, top
+
+    def get_rock_rects(self):
+        left = np.trunc(self.rock_x) - self.rock_size // 2
+        top = np.trunc(self.rock_y) - self.rock_size // 2
+        return left, top, left + self.rock_size, top + self.rock_size
+
+    def get_state(self):
+        left, top = self.get_player_rect()
+        boxes = np.stack(self.get_rock_rects(), axis=2)
+        velocity = None
+        if self.lidar_motion:
+            velocity = (
+                self.rock_speed * self.rock_dir_x,
+                -self.rock_speed * self.rock_dir_y
+            )
+        result = cast_rays(
+            left + self.player_w // 2,
+            top + self.player_h // 2,
+            self.lidar_dir_x,
+            self.lidar_dir_y,
+            boxes,
+            self.lidar_max_radius,
+            self.screen_size,
+            mask=self.rock_alive,
+            velocity=velocity
+        )
+        radius, collide = result[:2]
+        channels = [radius / self.lidar_max_radius, collide]
+        if self.lidar_motion:
+            channels.append(motion_observation(
+                *result[2:],
+                speed_max=self.rock_speed_max * self.screen_size * (1 / self.framerate),
+                horizon=self.lidar_horizon_s * self.framerate
+            ))
+        array_state = np.concatenate(channels, axis=1).astype(self.obs_dtype)
+        return array_state[:, :, None]
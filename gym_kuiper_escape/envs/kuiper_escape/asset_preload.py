@@ -0,0 +1,13 @@
+"""
+Asset Preloading
+
+Importing this module decodes all sprite assets into the shared asset store.
+It is listed in the fork-server preload modules of the multiprocess vector
+environment, so that every forked worker inherits pygame and the decoded
+assets instead of loading them again.
+
+"""
+# Local imports
+from .assets import asset_store
+
+asset_store.preload()
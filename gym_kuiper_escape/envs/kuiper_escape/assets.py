@@ -0,0 +1,130 @@
+"""
+Sprite Asset Store
+
+Each PNG asset is decoded once per process, and scaled copies are kept in a
+least-recently-used cache keyed by (asset, size). Sprites of the same size
+share a single surface, so spawning a rock or resetting the player does not
+touch the filesystem once the cache is warm. Sprites are scaled to the exact
+size of their rect, as when every sprite loaded its own image. The store is
+shared by all games of the process, which may render on several threads, so
+lookups hold a lock.
+
+"""
+# Standard imports
+import os
+import struct
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+# Construct path to assets
+path_base = os.path.dirname(os.path.realpath(__file__))
+path_assets = os.path.join(path_base, 'assets')
+
+
+@lru_cache(maxsize=None)
+def get_image_size(name):
+    """Width and height of a PNG asset, read from the file header"""
+    with open(os.path.join(path_assets, name + '.png'), 'rb') as f:
+        width, height = struct.unpack('>II', f.read(24)[16:24])
+    return width, height
+
+
+def to_screen_format(surf):
+    """Copy of a sprite in the pixel format of the game screens (with
+    per-pixel alpha), which is what convert_alpha() gives with a display.
+    Blitting a sprite in the PNG format is about ten times slower. Games
+    draw on offscreen surfaces, so there may be no display to convert to,
+    and the pixels are then copied into a surface with the screen's masks.
+    """
+    import pygame
+    if pygame.display.get_surface() is not None:
+        return surf.convert_alpha()
+    red, green, blue, _ = pygame.Surface((1, 1)).get_masks()
+    converted = pygame.Surface(
+        surf.get_size(), pygame.SRCALPHA, 32, masks=(red, green, blue, 0xff000000)
+    )
+    pygame.surfarray.pixels3d(converted)[...] = pygame.surfarray.pixels3d(surf)
+    pygame.surfarray.pixels_alpha(converted)[...] = pygame.surfarray.pixels_alpha(surf)
+    return converted
+
+
+class AssetStore:
+    """Cache of decoded and pre-scaled sprite surfaces
+
+    Args:
+        max_surfaces: number of scaled surfaces kept in the LRU cache
+        size_step: sizes are rounded to a multiple of this many pixels
+            before lookup. The default of 1 keeps the exact sizes, larger
+            steps bound the number of distinct surfaces, but sprites are
+            then drawn up to half a step off the size of their rect
+    """
+    def __init__(self, max_surfaces=64, size_step=1):
+        self.max_surfaces = max_surfaces
+        self.size_step = size_step
+        self.images = {}
+        self.surfaces = OrderedDict()
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def quantize(self, size):
+        step = self.size_step
+        return tuple(max(step, int(round(dim / step)) * step) for dim in size)
+
+    def get_image(self, name):
+        with self.lock:
+            image = self.images.get(name)
+            if image is None:
+                import pygame
+                image = pygame.image.load(os.path.join(path_assets, name + '.png'))
+                self.images[name] = image
+                self.loads += 1
+            return image
+
+    # Decode every asset up front (e.g. in a fork-server parent process)
+    def preload(self):
+        for filename in sorted(os.listdir(path_assets)):
+            name, ext = os.path.splitext(filename)
+            if ext == '.png':
+                get_image_size(name)
+                self.get_image(name)
+
+    def get_surface(self, name, size):
+        key = (name, self.quantize(size))
+        with self.lock:
+            surf = self.surfaces.get(key)
+            if surf is not None:
+                self.surfaces.move_to_end(key)
+                self.hits += 1
+                return surf
+
+            # Scale from the decoded image, evict least recently used surface
+            import pygame
+            self.misses += 1
+            surf = to_screen_format(pygame.transform.scale(self.get_image(name), key[1]))
+            self.surfaces[key] = surf
+            if len(self.surfaces) > self.max_surfaces:
+                self.surfaces.popitem(last=False)
+            return surf
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'loads': self.loads,
+            'surfaces': len(self.surfaces)
+        }
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+
+# Shared by all games in the process
+asset_store = AssetStore()
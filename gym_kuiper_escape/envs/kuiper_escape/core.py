@@ -0,0 +1,162 @@
+"""
+Headless Simulation Core
+
+Lightweight, pure-Python stand-ins for the parts of pygame that the game
+physics relies on (rects, sprites and sprite groups). The player, rocks and
+lidar are built on these, so the simulation can run without pygame, SDL or a
+display. Pygame is only needed once the game is rendered.
+
+"""
+
+
+class Rect:
+    """Integer rectangle with the same semantics as `pygame.Rect` for the
+    attributes used by the game (edges, centers and collision tests).
+    Coordinates assigned to the rect are truncated to integers.
+    """
+    __slots__ = ('x', 'y', 'w', 'h')
+
+    def __init__(self, left, top, width, height):
+        self.x = int(left)
+        self.y = int(top)
+        self.w = int(width)
+        self.h = int(height)
+
+    def __repr__(self):
+        return '<Rect({}, {}, {}, {})>'.format(self.x, self.y, self.w, self.h)
+
+    # Sequence protocol, so the rect can be passed to pygame blit calls
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.w, self.h)[i]
+
+    @property
+    def left(self):
+        return self.x
+
+    @left.setter
+    def left(self, value):
+        self.x = int(value)
+
+    @property
+    def right(self):
+        return self.x + self.w
+
+    @right.setter
+    def right(self, value):
+        self.x = int(value) - self.w
+
+    @property
+    def top(self):
+        return self.y
+
+    @top.setter
+    def top(self, value):
+        self.y = int(value)
+
+    @property
+    def bottom(self):
+        return self.y + self.h
+
+    @bottom.setter
+    def bottom(self, value):
+        self.y = int(value) - self.h
+
+    @property
+    def centerx(self):
+        return self.x + self.w // 2
+
+    @centerx.setter
+    def centerx(self, value):
+        self.x = int(value) - self.w // 2
+
+    @property
+    def centery(self):
+        return self.y + self.h // 2
+
+    @centery.setter
+    def centery(self, value):
+        self.y = int(value) - self.h // 2
+
+    @property
+    def topleft(self):
+        return (self.x, self.y)
+
+    @property
+    def size(self):
+        return (self.w, self.h)
+
+    def copy(self):
+        return Rect(self.x, self.y, self.w, self.h)
+
+    def collidepoint(self, x, y):
+        return self.x <= x < self.x + self.w and self.y <= y < self.y + self.h
+
+    def colliderect(self, other):
+        return (
+            self.x < other.x + other.w
+            and self.y < other.y + other.h
+            and self.x + self.w > other.x
+            and self.y + self.h > other.y
+        )
+
+    # Move the rect inside of another rect (e.g. the screen)
+    def clamp_ip(self, other):
+        if self.x < other.x:
+            self.x = other.x
+        elif self.x + self.w > other.x + other.w:
+            self.x = other.x + other.w - self.w
+        if self.y < other.y:
+            self.y = other.y
+        elif self.y + self.h > other.y + other.h:
+            self.y = other.y + other.h - self.h
+
+
+class Body:
+    """Base class for simulated objects, mirroring `pygame.sprite.Sprite`.
+    A body can belong to several groups, and `kill()` removes it from all of
+    them.
+    """
+    def __init__(self):
+        self.groups = {}
+
+    def kill(self):
+        for group in list(self.groups):
+            group.remove(self)
+
+    def alive(self):
+        return len(self.groups) > 0
+
+
+class Group:
+    """Container of bodies, mirroring `pygame.sprite.Group`"""
+    def __init__(self):
+        self.bodies = {}
+
+    def __iter__(self):
+        return iter(list(self.bodies))
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def __contains__(self, body):
+        return body in self.bodies
+
+    def add(self, body):
+        self.bodies[body] = None
+        body.groups[self] = None
+
+    def remove(self, body):
+        if body in self.bodies:
+            del self.bodies[body]
+            del body.groups[self]
+
+    def update(self, *args):
+        for body in list(self.bodies):
+            body.update(*args)
+
+    def empty(self):
+        for body in list(self.bodies):
+            self.remove(body)
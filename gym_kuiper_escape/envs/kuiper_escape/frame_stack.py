@@ -0,0 +1,44 @@
+# 3rd party imports
+import numpy as np
+
+
+class FrameStack:
+    """Frame Stack Class
+
+    Keeps the last k frames in a preallocated circular buffer, stacked along
+    a new last axis (oldest frame first). Every frame is written twice, k
+    slots apart, in a buffer of 2k slots. The last k frames are then always
+    a contiguous window of the buffer, so the stacked observation is returned
+    as a view without any copying or concatenation.
+
+    Note: the returned view is overwritten by later frames, copy it if it
+    needs to be kept (e.g. in a replay buffer).
+    """
+    def __init__(self, frame_shape, k, dtype):
+        self.k = k
+        self.buffer = np.zeros(tuple(frame_shape) + (2 * k,), dtype=dtype)
+        self.index = 0
+
+    # View of the slot receiving the next frame, shape frame_shape + (1,)
+    def slot(self):
+        return self.buffer[..., self.index:self.index + 1]
+
+    # Fill the stack with the frame written to the slot (start of episode)
+    def reset(self):
+        self.buffer[...] = self.slot()
+        self.index = 0
+        return self.view()
+
+    # Commit the frame written to the slot, and return the stacked frames
+    def advance(self):
+        i = self.index
+        self.buffer[..., i + self.k] = self.buffer[..., i]
+        self.index = (i + 1) % self.k
+        return self.view()
+
+    def push(self, frame):
+        self.slot()[..., 0] = frame
+        return self.advance()
+
+    def view(self):
+        return self.buffer[..., self.index:self.index + self.k]
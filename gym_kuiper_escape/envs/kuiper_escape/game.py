@@ -7,28 +7,18 @@ steadily over time.
 
 """
 # Standard imports
-import sys
-import os
 import random
 import math
-
-# 3rd party imports
-import pygame
-from pygame.locals import (
-    K_ESCAPE,
-    KEYDOWN,
-    QUIT,
-    K_UP,
-    K_DOWN,
-    K_LEFT,
-    K_RIGHT
-)
+from collections import namedtuple
 
 # Local imports
-path_components = os.path.dirname(os.path.realpath(__file__))
-sys.path.insert(0, path_components)
-from player import Player
-from rock import Rock
+from .core import Group
+from .grid import SpatialGrid
+from .player import Player
+from .rock import ROCK_KINEMATICS
+
+# Snapshot of the simulation state, see Game.clone_state
+GameState = namedtuple('GameState', ['frame', 'time', 'player', 'rocks', 'rng'])
 
 class Game:
     def __init__(
@@ -41,13 +31,13 @@ class Game:
         rock_size_max=0.08,
         rock_speed_min=0.1,  # portion of screen traversed in one second
         rock_speed_max=0.3,  # portion of screen traversed in one second
-        framerate=10
+        framerate=10,
+        grid_cell_size=64,  # None to disable the rock spatial index
+        rng=None,  # random.Random instance, all game randomness is drawn from it
+        rock_kinematics='step'  # 'step' or 'analytic', see rock.ROCK_KINEMATICS
     ):
-        # Initialize pygame
-        pygame.init()
-        pygame.display.set_caption('Kuiper Escape')
         self.mode = mode
-        self.font = pygame.font.SysFont("monospace", 12)
+        self.rng = random.Random() if rng is None else rng
         self.frame = 1
         self.time = 0
         self.lives = lives
@@ -59,20 +49,22 @@ class Game:
         self.rock_size_max = rock_size_max
 
         # Define constants for the screen width and height
-        if self.mode == 'human':
-            self.screen_mode = pygame.SHOWN
-            self.include_info = True
-        else:
-            self.screen_mode = pygame.HIDDEN
-            self.include_info = False
+        self.include_info = self.mode == 'human'
         self.screen_size = 512
         self.screen_dims = (self.screen_size, self.screen_size)
         self.framerate = framerate
-        self.clock = pygame.time.Clock()
-        self.screen = pygame.display.set_mode(
-            self.screen_dims, 
-            flags=self.screen_mode
-        )
+
+        # Every game draws on its own offscreen surface, created on first
+        # render. The process-wide display is only opened to show the game
+        # (immediately for human mode). The screen is only redrawn when a
+        # changed frame is requested.
+        self.dirty = True
+        self.screen = None
+        self.display = None
+        self.font = None
+        self.clock = None
+        if self.mode == 'human':
+            self.turn_on_screen()
 
         # Instantiate player and sprite groups
         self.player = Player(
@@ -80,51 +72,127 @@ class Game:
             lives=self.lives,
             speed=self.player_speed * self.screen_size * (1 / self.framerate)
         )
-        self.rocks = pygame.sprite.Group()
-        self.all_sprites = pygame.sprite.Group()
+        self.all_sprites = Group()
         self.all_sprites.add(self.player)
+        if grid_cell_size is None:
+            self.grid = None
+        else:
+            self.grid = SpatialGrid(self.screen_size, grid_cell_size)
+        self.rocks = ROCK_KINEMATICS[rock_kinematics](
+            screen_size=self.screen_size,
+            size_min=self.rock_size_min,
+            size_max=self.rock_size_max,
+            speed_min=self.rock_speed_min * self.screen_size * (1 / self.framerate),
+            speed_max=self.rock_speed_max * self.screen_size * (1 / self.framerate),
+            grid=self.grid
+        )
+
+    def init_screen(self):
+        """Create the offscreen surface the game is drawn on. The simulation
+        itself runs without pygame, so this is deferred until the game is
+        rendered, and pygame is only imported then. The surface belongs to
+        this game alone, so any number of games can render in one process
+        (on any thread).
+        """
+        if self.screen is not None:
+            return
+        import pygame
+        self.screen = pygame.Surface(self.screen_dims)
 
     def step_frame(self, action):
 
         # Add rocks, increase rate over time
-        frames_per_rock = int(self.framerate / self.rock_rate)
-        if frames_per_rock < 1:
-            frames_per_rock = 1
-        if self.frame % frames_per_rock == 0:
-            new_rock = Rock(
-                screen_size=self.screen_size,
-                size_min=self.rock_size_min,
-                size_max=self.rock_size_max,
-                speed_min=self.rock_speed_min * self.screen_size * (1 / self.framerate),
-                speed_max=self.rock_speed_max * self.screen_size * (1 / self.framerate)
-            )
-            self.rocks.add(new_rock)
-            self.all_sprites.add(new_rock)
-        else:
-            new_rock = None
+        self.spawn_on_schedule()
 
         # Update sprite positions
         self.player.update(action)
         self.rocks.update()
 
         # Check for collisions, deduct player life
-        collisions = pygame.sprite.spritecollide(self.player, self.rocks, dokill=False)
-        for rock in collisions:
-            rock.kill()
+        collisions = self.get_collisions()
+        for index in collisions:
+            self.rocks.release(index)
             self.player.die()
 
         # Check if player has any remaining lives
         if self.player.lives == 0:
             self.running = False
 
-        # Update screen surface
-        self.update_screen()
+        # Screen surface is out of date, redrawn on request
+        self.dirty = True
 
         # Increment frame and time
         self.frame += 1
         self.time = (self.frame / self.framerate)
 
+    # Spawn a rock every frames_per_rock frames, returns its slot or None
+    def spawn_on_schedule(self):
+        frames_per_rock = int(self.framerate / self.rock_rate)
+        if frames_per_rock < 1:
+            frames_per_rock = 1
+        if self.frame % frames_per_rock == 0:
+            return self.spawn_rock()
+        return None
+
+    # Spawn a rock, returns its slot in the rock pool
+    def spawn_rock(self):
+        return self.rocks.spawn(rng=self.rng)
+
+    # Slots of the rocks overlapping the player. One vectorized test of all
+    # rocks: a grid query would first need the grid synced on every frame,
+    # which costs more than the test, so the grid only serves the lidar
+    def get_collisions(self):
+        return self.rocks.collide_rect(self.player.rect)
+
+    def reset_state(self, rng=None):
+        """Start a new game in place. The player is moved back to the start
+        with full lives and all rocks are removed, while the display, font,
+        clock and sprite surfaces are kept alive.
+        """
+        if rng is not None:
+            self.rng = rng
+        self.frame = 1
+        self.time = 0
+        self.player.reset_state(self.lives)
+        self.rocks.clear()
+        self.dirty = True
+
+    def clone_state(self):
+        """Snapshot of the simulation state (no surfaces or sprites)
+
+        The player is captured as (x, y, lives, rect.x, rect.y), and the
+        rocks as a float array with one row of ROCK_PARAMS per rock.
+        """
+        player = self.player
+        return GameState(
+            self.frame,
+            self.time,
+            (player.x, player.y, player.lives, player.rect.x, player.rect.y),
+            self.rocks.get_params(),
+            self.rng.getstate()
+        )
+
+    def restore_state(self, state):
+        """Return the simulation to a snapshot taken with clone_state"""
+        self.frame = state.frame
+        self.time = state.time
+        player = self.player
+        player.x, player.y, player.lives, player.rect.x, player.rect.y = state.player
+        self.rng.setstate(state.rng)
+        self.rocks.set_params(state.rocks)
+        self.dirty = True
+
+    def instrument(self, profiler):
+        """Time the phases of step_frame with a Profiler"""
+        profiler.instrument(self, 'step_frame', 'step_frame')
+        profiler.instrument(self, 'spawn_rock', 'spawn_rock')
+        profiler.instrument(self.player, 'update', 'player_update')
+        profiler.instrument(self.rocks, 'update', 'rock_update')
+        profiler.instrument(self, 'get_collisions', 'collisions')
+        profiler.instrument(self, 'update_screen', 'update_screen')
+
     def get_action(self, pressed_keys):
+        from pygame.locals import K_UP, K_DOWN, K_LEFT, K_RIGHT
         up = pressed_keys[K_UP]
         right = pressed_keys[K_RIGHT]
         down = pressed_keys[K_DOWN]
@@ -152,12 +220,27 @@ class Game:
             action = 0
         return action
 
+    # Open the display window, which shows the offscreen surface with the
+    # score and lives on top
     def turn_on_screen(self):
-        self.screen = pygame.display.set_mode(
-            self.screen_dims, 
-            flags=pygame.SHOWN
-        )
-        self.include_info=True
+        import pygame
+        self.init_screen()
+        if self.display is None:
+            pygame.init()
+            pygame.display.set_caption('Kuiper Escape')
+            self.font = pygame.font.SysFont("monospace", 12)
+            self.clock = pygame.time.Clock()
+            self.display = pygame.display.set_mode(self.screen_dims, flags=pygame.SHOWN)
+        if not self.include_info:
+            self.include_info = True
+            self.dirty = True
+
+    # Rasterize the current frame, at most once per frame
+    def draw(self):
+        self.init_screen()
+        if self.dirty:
+            self.update_screen()
+            self.dirty = False
 
     def update_screen(self):
         self.screen.fill((0, 0, 0))
@@ -167,12 +250,19 @@ class Game:
             self.screen.blit(info_score, (5, 10))
             self.screen.blit(info_lives, (self.screen_size - 100, 10))
         for entity in self.all_sprites:
-            self.screen.blit(entity.surf, entity.rect)
+            self.screen.blit(entity.get_surf(), entity.rect.topleft)
+        for rock in self.rocks:
+            self.screen.blit(rock.get_surf(), rock.rect.topleft)
 
     def render_screen(self):
+        import pygame
+        self.display.blit(self.screen, (0, 0))
         pygame.display.flip()
 
     def play(self):
+        import pygame
+        from pygame.locals import K_ESCAPE, KEYDOWN, QUIT
+        self.turn_on_screen()
 
         # Variable to keep the main loop running
         self.running = True
@@ -194,7 +284,102 @@ class Game:
             pressed_keys = pygame.key.get_pressed()
             action = self.get_action(pressed_keys)
             self.step_frame(action)
+            self.draw()
             self.render_screen()
 
             # Set framerate
             self.clock.tick_busy_loop(self.framerate)
+
+
+class MultiGame(Game):
+    """Game with several players flying through one shared rock field
+
+    Rocks are spawned and moved once per frame, however many players there
+    are. Every player moves with its own action and loses a life for each
+    rock it touches. Collisions are found for all players before any rock is
+    removed, so a rock touching two players costs both a life. A player
+    without lives stops moving and is no longer drawn.
+
+    `player` is the first of `players`, so the single player code paths
+    (rendering, the lidar start position) keep working.
+    """
+    def __init__(self, n_players=2, **kwargs):
+        super(MultiGame, self).__init__(**kwargs)
+        self.n_players = n_players
+        self.players = [self.player]
+        for _ in range(n_players - 1):
+            player = Player(
+                screen_size=self.screen_size,
+                lives=self.lives,
+                speed=self.player.speed
+            )
+            self.players.append(player)
+            self.all_sprites.add(player)
+
+    def step_frame(self, actions):
+
+        # Add and move the rocks once for all players
+        self.spawn_on_schedule()
+        for player, action in zip(self.players, actions):
+            if player.lives > 0:
+                player.update(action)
+        self.rocks.update()
+
+        # Check for collisions, deduct player lives
+        collisions = self.get_collisions()
+        for player, indices in zip(self.players, collisions):
+            for index in indices:
+                self.rocks.release(index)
+                player.die()
+            if indices and player.lives <= 0:
+                player.lives = 0
+                self.all_sprites.remove(player)
+
+        # Screen surface is out of date, redrawn on request
+        self.dirty = True
+
+        # Increment frame and time
+        self.frame += 1
+        self.time = (self.frame / self.framerate)
+
+    # Slots of the rocks overlapping each player, empty for players out of
+    # the game
+    def get_collisions(self):
+        return [
+            self.rocks.collide_rect(player.rect) if player.lives > 0 else []
+            for player in self.players
+        ]
+
+    def reset_state(self, rng=None):
+        super(MultiGame, self).reset_state(rng=rng)
+        for player in self.players:
+            player.reset_state(self.lives)
+            self.all_sprites.add(player)
+
+    def clone_state(self):
+        """Snapshot of the simulation state, with a tuple of (x, y, lives,
+        rect.x, rect.y) per player
+        """
+        return GameState(
+            self.frame,
+            self.time,
+            tuple(
+                (player.x, player.y, player.lives, player.rect.x, player.rect.y)
+                for player in self.players
+            ),
+            self.rocks.get_params(),
+            self.rng.getstate()
+        )
+
+    def restore_state(self, state):
+        self.frame = state.frame
+        self.time = state.time
+        for player, player_state in zip(self.players, state.player):
+            player.x, player.y, player.lives, player.rect.x, player.rect.y = player_state
+            if player.lives > 0:
+                self.all_sprites.add(player)
+            else:
+                self.all_sprites.remove(player)
+        self.rng.setstate(state.rng)
+        self.rocks.set_params(state.rocks)
+        self.dirty = True
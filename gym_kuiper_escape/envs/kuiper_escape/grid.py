@@ -0,0 +1,134 @@
+"""
+Uniform Grid Spatial Index
+
+The screen is divided into square cells, and each rock is registered in every
+cell that its rect overlaps. The rock pool brings the registrations up to
+date before a lidar query, so that lidar queries only need to look at the
+rocks in the cells they touch, instead of scanning every rock on the screen.
+Rocks are registered by key (their slot in the rock pool), and queries return
+keys.
+
+Rocks that are (partially) off the screen are registered in the nearest edge
+cells, so queries near the screen edges still find them.
+
+"""
+# 3rd party imports
+import numpy as np
+
+
+class SpatialGrid:
+    def __init__(self, screen_size, cell_size=64):
+        self.screen_size = screen_size
+        self.cell_size = cell_size
+        self.n_cells = -(-screen_size // cell_size)
+        self.cells = [{} for _ in range(self.n_cells * self.n_cells)]
+        self.spans = {}
+
+    def __len__(self):
+        return len(self.spans)
+
+    def clamp(self, i):
+        return min(max(i, 0), self.n_cells - 1)
+
+    # Range of cells (inclusive) overlapped by a rect
+    def get_span(self, rect):
+        cs = self.cell_size
+        last = self.n_cells - 1
+        x = rect.x
+        y = rect.y
+        return (
+            min(max(x // cs, 0), last),
+            min(max(y // cs, 0), last),
+            min(max((x + rect.w - 1) // cs, 0), last),
+            min(max((y + rect.h - 1) // cs, 0), last)
+        )
+
+    # Spans of many rects at once, from an (N, 4) array of (x, y, w, h)
+    def get_spans(self, rects):
+        cs = self.cell_size
+        spans = np.empty(rects.shape, dtype=np.int64)
+        spans[:, :2] = rects[:, :2] // cs
+        spans[:, 2:] = (rects[:, :2] + rects[:, 2:] - 1) // cs
+        np.maximum(spans, 0, out=spans)
+        return np.minimum(spans, self.n_cells - 1, out=spans)
+
+    def get_cell(self, x, y):
+        return (
+            self.clamp(int(x // self.cell_size)),
+            self.clamp(int(y // self.cell_size))
+        )
+
+    def iter_cells(self, span):
+        i0, j0, i1, j1 = span
+        n = self.n_cells
+        for j in range(j0, j1 + 1):
+            for i in range(i0, i1 + 1):
+                yield self.cells[j * n + i]
+
+    def add(self, key, span):
+        self.spans[key] = span
+        for cell in self.iter_cells(span):
+            cell[key] = None
+
+    def remove(self, key):
+        span = self.spans.pop(key, None)
+        if span is not None:
+            for cell in self.iter_cells(span):
+                del cell[key]
+
+    # Re-register a key after its rect moved, only if it changed cells
+    def move(self, key, span):
+        if span != self.spans.get(key):
+            self.remove(key)
+            self.add(key, span)
+
+    def clear(self):
+        for cell in self.cells:
+            cell.clear()
+        self.spans.clear()
+
+    def query_rect(self, rect):
+        found = {}
+        for cell in self.iter_cells(self.get_span(rect)):
+            found.update(cell)
+        return list(found)
+
+    def query_point(self, x, y):
+        i, j = self.get_cell(x, y)
+        return list(self.cells[j * self.n_cells + i])
+
+    def query_ring(self, x, y, r):
+        """Keys in the cells at (Chebyshev) distance r from the cell of the
+        point, i.e. the r-th square ring of cells around it. May contain
+        duplicates of rocks spanning several cells.
+        """
+        ci, cj = self.get_cell(x, y)
+        n = self.n_cells
+        found = []
+        for j in range(max(cj - r, 0), min(cj + r, n - 1) + 1):
+            if abs(j - cj) == r:
+                cols = range(max(ci - r, 0), min(ci + r, n - 1) + 1)
+            else:
+                cols = [i for i in (ci - r, ci + r) if 0 <= i < n]
+            for i in cols:
+                found.extend(self.cells[j * n + i])
+        return found
+
+    def ring_bound(self, x, y, r):
+        """Distance from the point to the nearest cell that lies outside of
+        rings 0..r. Any rock not found in those rings is at least this far
+        away. Returns infinity once every cell has been visited.
+        """
+        ci, cj = self.get_cell(x, y)
+        cs = self.cell_size
+        n = self.n_cells
+        bound = float('inf')
+        if ci - r > 0:
+            bound = min(bound, x - (ci - r) * cs)
+        if ci + r < n - 1:
+            bound = min(bound, (ci + r + 1) * cs - x)
+        if cj - r > 0:
+            bound = min(bound, y - (cj - r) * cs)
+        if cj + r < n - 1:
+            bound = min(bound, (cj + r + 1) * cs - y)
+        return bound
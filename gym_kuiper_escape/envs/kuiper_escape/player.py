@@ -1,39 +1,45 @@
-# Standard imports
-import os
+# Local imports
+from .core import Body, Rect
+from .assets import asset_store, get_image_size
 
-# 3rd party imports
-import pygame
-from pygame.locals import (
-    K_UP,
-    K_DOWN,
-    K_LEFT,
-    K_RIGHT
-)
 
-# Construct path to assets
-path_base = os.path.dirname(os.path.realpath(__file__))
-path_asset = os.path.join(path_base, 'assets/spaceship.png')
+def get_player_dims(screen_size):
+    """Width and height of the scaled player rect
 
-class Player(pygame.sprite.Sprite):
+    Read straight from the PNG header, so that simulations without a pygame
+    display can size the player exactly like the sprite does.
+    """
+    width, height = get_image_size('spaceship')
+    aspect_ratio = height / width
+    scaled_height = screen_size * 0.05
+    scaled_width = scaled_height * aspect_ratio
+    return int(scaled_height), int(scaled_width)
+
+
+class Player(Body):
     def __init__(self, screen_size, lives=3, speed=5):
         super(Player, self).__init__()
         self.screen_size = screen_size
         self.lives = lives
         self.speed = speed
-        self.surf = pygame.image.load(path_asset)
-        aspect_ratio = self.surf.get_height() / self.surf.get_width()
-        scaled_height = self.screen_size * 0.05
-        scaled_width = scaled_height * aspect_ratio
-        self.surf = pygame.transform.scale(
-            self.surf, (scaled_height, scaled_width)
-        )
-        self.surf = self.surf.convert_alpha()
+        self.surf = None
+        width, height = get_player_dims(self.screen_size)
+        self.rect = Rect(0, 0, width, height)
+        self.reset_state(lives)
+
+    # Back to the center of the screen with full lives (keeps the surface)
+    def reset_state(self, lives):
+        self.lives = lives
         self.x = self.screen_size  / 2
         self.y = self.screen_size / 2
-        self.rect = self.surf.get_rect(
-            centerx = self.x,
-            centery = self.y
-        )
+        self.rect.centerx = self.x
+        self.rect.centery = self.y
+
+    # Fetch the shared sprite surface on first use, only needed for rendering
+    def get_surf(self):
+        if self.surf is None:
+            self.surf = asset_store.get_surface('spaceship', self.rect.size)
+        return self.surf
 
     # Move the sprite based on user keypresses
     def update(self, action):
@@ -0,0 +1,94 @@
+"""
+Step Loop Profiler
+
+Opt-in timing of the phases of the step loop. Phases are timed by wrapping
+the bound method of one object with a timed version, stored as an instance
+attribute that shadows the method. Nothing is wrapped unless profiling is
+enabled, so the step loop runs exactly the same code when it is disabled.
+
+"""
+# Standard imports
+from time import perf_counter_ns
+
+
+class Profiler:
+    """Per-phase perf_counter_ns accumulators and work counters
+
+    Args:
+        total_phase: phase that covers all others (e.g. 'step'), used to
+            report the share of the time spent in each phase
+    """
+    def __init__(self, total_phase='step'):
+        self.total_phase = total_phase
+        self.times = {}
+        self.calls = {}
+        self.counters = {}
+
+    def instrument(self, obj, name, phase, counters=None):
+        """Time every call of `obj.name` under `phase`. If given, `counters`
+        is called after each call and returns a dict of counts to accumulate.
+        """
+        method = getattr(obj, name)
+        times = self.times
+        calls = self.calls
+        times.setdefault(phase, 0)
+        calls.setdefault(phase, 0)
+
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            result = method(*args, **kwargs)
+            times[phase] += perf_counter_ns() - start
+            calls[phase] += 1
+            if counters is not None:
+                self.count(counters())
+            return result
+
+        setattr(obj, name, timed)
+
+    def count(self, counts):
+        for key, value in counts.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        for phase in self.times:
+            self.times[phase] = 0
+            self.calls[phase] = 0
+        self.counters.clear()
+
+    def report(self):
+        """Aggregates per phase (calls, total ms, mean us and share of the
+        total phase), and the work counters with their mean per scan
+        """
+        total = self.times.get(self.total_phase, 0)
+        phases = {}
+        for phase, time_ns in self.times.items():
+            calls = self.calls[phase]
+            phases[phase] = {
+                'calls': calls,
+                'total_ms': time_ns / 1e6,
+                'mean_us': time_ns / 1e3 / calls if calls else 0.0,
+                'share': time_ns / total if total else 0.0
+            }
+        n_scans = self.calls.get('lidar_scan', 0)
+        counters = {}
+        for key, value in self.counters.items():
+            counters[key] = {
+                'total': value,
+                'per_scan': value / n_scans if n_scans else 0.0
+            }
+        return {'phases': phases, 'counters': counters}
+
+    def format_report(self):
+        report = self.report()
+        lines = ['{:<18}{:>10}{:>12}{:>12}{:>8}'.format(
+            'phase', 'calls', 'total ms', 'mean us', 'share'
+        )]
+        for phase, row in report['phases'].items():
+            lines.append('{:<18}{:>10}{:>12.1f}{:>12.1f}{:>8.1%}'.format(
+                phase, row['calls'], row['total_ms'], row['mean_us'], row['share']
+            ))
+        for key, row in report['counters'].items():
+            lines.append('{:<18}{:>10}{:>12.1f} per scan'.format(
+                key, row['total'], row['per_scan']
+            ))
+        return '\n'.join(lines)
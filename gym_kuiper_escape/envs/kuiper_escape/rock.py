@@ -1,66 +1,635 @@
+"""
+Rock Pool
+
+The state of all rocks lives in preallocated NumPy arrays, one slot per rock.
+Slots of rocks that leave the screen (or hit the player) go back on a
+free-list and are recycled by later spawns, so spawning and removing rocks
+does not allocate once the pool has grown to the peak number of rocks. All
+rocks are moved at once with vectorized updates, written into preallocated
+scratch arrays so that a frame of the pool does not allocate either.
+
+Sprite-like `Rock` views (with `__slots__`) are only handed out when the
+rocks are iterated, e.g. to draw them. There is one view per slot, created on
+first use and reused afterwards.
+
+AnalyticRockPool is an event-driven variant (rock_kinematics='analytic'):
+positions are evaluated in closed form when queried, and rocks leave the
+screen from a min-heap of precomputed exit frames.
+
+"""
 # Standard imports
-import os
+import heapq
 import math
 import random
 
 # 3rd party imports
-import pygame
+import numpy as np
+
+# Local imports
+from .core import Rect
+from .assets import asset_store
+
+FACES = ('top', 'right', 'bottom', 'left')
+
+# Per-rock parameters captured in game state snapshots, one row per rock
+ROCK_PARAMS = (
+    'x', 'y', 'size', 'speed', 'angle', 'dir_x', 'dir_y', 'face',
+    'rect_x', 'rect_y', 'rect_w', 'rect_h'
+)
+
+
+class Rock:
+    """View of one rock in a RockPool, mirroring the old rock sprite"""
+    __slots__ = ('pool', 'index')
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+
+    @property
+    def x(self):
+        return float(self.pool.x[self.index])
+
+    @property
+    def y(self):
+        return float(self.pool.y[self.index])
+
+    @property
+    def size(self):
+        return float(self.pool.size[self.index])
+
+    @property
+    def speed(self):
+        return float(self.pool.speed[self.index])
+
+    @property
+    def dir_x(self):
+        return float(self.pool.dir_x[self.index])
+
+    @property
+    def dir_y(self):
+        return float(self.pool.dir_y[self.index])
+
+    @property
+    def rect(self):
+        return Rect(*self.pool.rects[self.index].tolist())
+
+    # Fetch the shared sprite surface on first use, only needed for rendering
+    def get_surf(self):
+        surf = self.pool.surfs[self.index]
+        if surf is None:
+            surf = asset_store.get_surface('asteroid', self.rect.size)
+            self.pool.surfs[self.index] = surf
+        return surf
+
+    def alive(self):
+        return bool(self.pool.alive[self.index])
 
-# Construct path to assets
-path_base = os.path.dirname(os.path.realpath(__file__))
-path_asset = os.path.join(path_base, 'assets/asteroid.png')
+    def kill(self):
+        self.pool.release(self.index)
 
-class Rock(pygame.sprite.Sprite):
-    def __init__(self, screen_size, 
+
+class RockPool:
+    """Array-backed storage of the rocks of one game
+
+    Args:
+        screen_size: width/height of the square screen
+        speed_min, speed_max: range of rock speeds (pixels per frame)
+        size_min, size_max: range of rock sizes (portion of the screen)
+        grid: optional SpatialGrid of the slots of the live rocks. Released
+            rocks are removed right away, while spawns and moves are only
+            registered by sync_grid(), once the grid is queried, so the grid
+            costs nothing while no lidar reads it
+        capacity: initial number of slots, doubled whenever the pool is full
+    """
+    # Per-slot arrays, grown together
+    ARRAYS = (
+        'x', 'y', 'size', 'speed', 'angle', 'dir_x', 'dir_y', 'face',
+        'rects', 'spans', 'serial', 'alive'
+    )
+
+    def __init__(self, screen_size,
         speed_min=2, speed_max=10,
-        size_min=0.04, size_max=0.08
+        size_min=0.04, size_max=0.08,
+        grid=None, capacity=64
     ):
-        super(Rock, self).__init__()
         self.screen_size = screen_size
-        self.size_min = size_min
-        self.size_max = size_max
-        self.size = random.uniform(self.size_min, self.size_max) * self.screen_size
         self.speed_min = speed_min
         self.speed_max = speed_max
-        self.speed = random.uniform(self.speed_min, self.speed_max)
-        self.face = random.choice(['top', 'right', 'bottom', 'left'])
+        self.size_min = size_min
+        self.size_max = size_max
         self.angle_limit = 0.1*math.pi
-        self.angle = random.uniform(self.angle_limit, math.pi - self.angle_limit)
-        if self.face == 'top':
-            self.angle += math.pi
-            self.x = random.randint(0, self.screen_size)
-            self.y = -self.size / 2
-        elif self.face == 'right':
-            self.angle += 0.5 * math.pi
-            self.x = self.screen_size + (self.size) / 2
-            self.y = random.randint(0, self.screen_size)
-        elif self.face == 'bottom':
-            self.angle = self.angle
-            self.x = random.randint(0, self.screen_size)
-            self.y = self.screen_size + (self.size / 2)
-        elif self.face == 'left':
-            self.angle += 1.5 * math.pi
-            self.x = -self.size / 2
-            self.y = random.randint(0, self.screen_size)
-        self.angle = self.angle % (2 * math.pi)
-        self.dir_x = math.cos(self.angle)
-        self.dir_y = math.sin(self.angle)
-        self.surf = pygame.image.load(path_asset)
-        self.surf = pygame.transform.scale(self.surf, (self.size, self.size))
-        self.surf = self.surf.convert_alpha()
-        self.rect = self.surf.get_rect(centerx = self.x, centery = self.y)
-
-    # Update location, kill if moved off of the screen
+        self.grid = grid
+        self.grid_stale = False
+        self.capacity = 0
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.size = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.angle = np.zeros(0)
+        self.dir_x = np.zeros(0)
+        self.dir_y = np.zeros(0)
+        self.face = np.zeros(0, dtype=np.int64)
+        self.rects = np.zeros((0, 4), dtype=np.int64)  # x, y, w, h
+        self.spans = np.zeros((0, 4), dtype=np.int64)  # grid cells
+        self.serial = np.zeros(0, dtype=np.int64)  # spawn order
+        self.alive = np.zeros(0, dtype=bool)
+        self.views = []
+        self.surfs = []
+        self.free = []
+        self.n_alive = 0
+        self.n_spawned = 0
+        self.n_used = 0  # slots used since the last clear
+
+        # Allocation counters, reset with the pool
+        self.recycled = 0
+        self.grows = 0
+        self.views_created = 0
+        self.grow(capacity)
+
+    def __len__(self):
+        return self.n_alive
+
+    # Views of the live rocks, in spawn order
+    def __iter__(self):
+        return iter([self.view(i) for i in self.get_indices()])
+
+    def get_indices(self):
+        indices = np.flatnonzero(self.alive)
+        return indices[np.argsort(self.serial[indices], kind='stable')]
+
+    def view(self, index):
+        view = self.views[index]
+        if view is None:
+            view = Rock(self, index)
+            self.views[index] = view
+            self.views_created += 1
+        return view
+
+    def grow(self, capacity):
+        """Enlarge the arrays to `capacity` slots, keeping the live rocks"""
+        old = self.capacity
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        self.scratch = np.zeros(capacity)
+        self.scratch_int = np.zeros(capacity, dtype=np.int64)
+        self.mask = np.zeros(capacity, dtype=bool)
+        self.mask_tmp = np.zeros(capacity, dtype=bool)
+        self.views.extend([None] * (capacity - old))
+        self.surfs.extend([None] * (capacity - old))
+        self.free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+        self.grows += 1
+
+    def acquire(self):
+        if not self.free:
+            self.grow(2 * self.capacity)
+        # Unused slots are handed out in order, after any released slot
+        index = self.free.pop()
+        if index < self.n_used:
+            self.recycled += 1
+        else:
+            self.n_used = index + 1
+        self.alive[index] = True
+        self.serial[index] = self.n_spawned + 1
+        self.surfs[index] = None
+        self.n_spawned += 1
+        self.n_alive += 1
+        return index
+
+    def release(self, index):
+        if not self.alive[index]:
+            return
+        self.alive[index] = False
+        self.speed[index] = 0
+        self.n_alive -= 1
+        self.free.append(index)
+        if self.grid is not None:
+            self.grid.remove(index)
+
+    def spawn(self, rng=random):
+        """Spawn a rock on a random edge of the screen, heading inwards.
+        Draws the same random numbers as the original rock sprite.
+        """
+        size = rng.uniform(self.size_min, self.size_max) * self.screen_size
+        speed = rng.uniform(self.speed_min, self.speed_max)
+        face = rng.choice(FACES)
+        angle = rng.uniform(self.angle_limit, math.pi - self.angle_limit)
+        if face == 'top':
+            angle += math.pi
+            x = rng.randint(0, self.screen_size)
+            y = -size / 2
+        elif face == 'right':
+            angle += 0.5 * math.pi
+            x = self.screen_size + (size) / 2
+            y = rng.randint(0, self.screen_size)
+        elif face == 'bottom':
+            angle = angle
+            x = rng.randint(0, self.screen_size)
+            y = self.screen_size + (size / 2)
+        elif face == 'left':
+            angle += 1.5 * math.pi
+            x = -size / 2
+            y = rng.randint(0, self.screen_size)
+        angle = angle % (2 * math.pi)
+        width = int(size)
+        return self.add((
+            x, y, size, speed, angle, math.cos(angle), math.sin(angle),
+            FACES.index(face), int(x) - width // 2, int(y) - width // 2,
+            width, width
+        ))
+
+    def add(self, params):
+        """Add a rock from a row of ROCK_PARAMS, returns its slot"""
+        index = self.acquire()
+        (
+            self.x[index], self.y[index], self.size[index], self.speed[index],
+            self.angle[index], self.dir_x[index], self.dir_y[index],
+            self.face[index]
+        ) = params[:8]
+        rect = self.rects[index]
+        rect[0], rect[1], rect[2], rect[3] = params[8:]
+        self.unregister(index)
+        return index
+
+    def move_to(self, index, x, y):
+        """Place a rock with its center at (x, y)"""
+        self.x[index] = x
+        self.y[index] = y
+        rect = self.rects[index]
+        rect[0] = int(x) - rect[2] // 2
+        rect[1] = int(y) - rect[3] // 2
+        self.unregister(index)
+
+    # Leave the grid registration of a slot to the next sync_grid(), through
+    # a span no rect has
+    def unregister(self, index):
+        if self.grid is not None:
+            self.spans[index] = -1
+            self.grid_stale = True
+
     def update(self):
-        self.x += self.speed * self.dir_x
-        self.y += -self.speed * self.dir_y
-        self.rect.centerx = int(self.x)
-        self.rect.centery = int(self.y)
-        if self.rect.right < 0:
-            self.kill()
-        elif self.rect.left > self.screen_size:
-            self.kill()
-        elif self.rect.top > self.screen_size:
-            self.kill()
-        elif self.rect.bottom < 0:
-            self.kill()
+        """Move all rocks, and release the ones that left the screen"""
+        if not self.n_alive:
+            return
+        rects, step, half = self.rects, self.scratch, self.scratch_int
+        np.multiply(self.speed, self.dir_x, out=step)
+        np.add(self.x, step, out=self.x)
+        np.multiply(self.speed, self.dir_y, out=step)
+        np.subtract(self.y, step, out=self.y)
+        self.place_rects()
+        off_screen, tmp = self.mask, self.mask_tmp
+        off_screen.fill(False)
+        for axis in (0, 1):
+            # Beyond either edge of the screen along this axis
+            np.greater(rects[:, axis], self.screen_size, out=tmp)
+            np.logical_or(off_screen, tmp, out=off_screen)
+            np.add(rects[:, axis], rects[:, axis + 2], out=half)
+            np.less(half, 0, out=tmp)
+            np.logical_or(off_screen, tmp, out=off_screen)
+        np.logical_and(off_screen, self.alive, out=off_screen)
+        if np.count_nonzero(off_screen):
+            for index in range(self.n_used):
+                if off_screen[index]:
+                    self.release(index)
+        self.grid_stale = self.grid is not None
+
+    # Rects centered on the (truncated) rock positions, of the first n slots
+    def place_rects(self, n=None):
+        rects, step, half = self.rects[:n], self.scratch[:n], self.scratch_int[:n]
+        for axis, center in ((0, self.x[:n]), (1, self.y[:n])):
+            np.trunc(center, out=step)
+            np.copyto(rects[:, axis], step, casting='unsafe')
+            np.floor_divide(rects[:, axis + 2], 2, out=half)
+            np.subtract(rects[:, axis], half, out=rects[:, axis])
+
+    def sync(self):
+        """Bring the rects up to date before reading them directly (they
+        always are, rocks are moved on every update)
+        """
+        pass
+
+    def sync_grid(self):
+        """Register the rocks spawned, and re-register the rocks that moved
+        to other grid cells, since the last sync
+        """
+        if not self.grid_stale:
+            return
+        self.grid_stale = False
+        spans = self.grid.get_spans(self.rects)
+        moved = np.flatnonzero(self.alive & (spans != self.spans).any(axis=1))
+        if len(moved):
+            self.spans[moved] = spans[moved]
+            for index, span in zip(moved.tolist(), spans[moved].tolist()):
+                self.grid.move(index, tuple(span))
+
+    def collide_rect(self, rect, indices=None):
+        """Slots of the live rocks overlapping `rect`, out of `indices` (all
+        slots if not given)
+        """
+        if indices is None:
+            return self.collide_all(rect)
+        indices = np.asarray(indices, dtype=np.int64)
+        r = self.rects[indices]
+        hit = (
+            (r[:, 0] < rect.x + rect.w) & (r[:, 1] < rect.y + rect.h)
+            & (r[:, 0] + r[:, 2] > rect.x) & (r[:, 1] + r[:, 3] > rect.y)
+        )
+        return indices[hit].tolist()
+
+    # collide_rect over all slots, tested in the scratch arrays
+    def collide_all(self, rect):
+        rects, hit, tmp, edge = self.rects, self.mask, self.mask_tmp, self.scratch_int
+        np.less(rects[:, 0], rect.x + rect.w, out=hit)
+        np.less(rects[:, 1], rect.y + rect.h, out=tmp)
+        np.logical_and(hit, tmp, out=hit)
+        np.add(rects[:, 0], rects[:, 2], out=edge)
+        np.greater(edge, rect.x, out=tmp)
+        np.logical_and(hit, tmp, out=hit)
+        np.add(rects[:, 1], rects[:, 3], out=edge)
+        np.greater(edge, rect.y, out=tmp)
+        np.logical_and(hit, tmp, out=hit)
+        np.logical_and(hit, self.alive, out=hit)
+        if not np.count_nonzero(hit):
+            return []
+        return [index for index in range(self.n_used) if hit[index]]
+
+    def get_boxes(self, indices=None):
+        """Rects of the live rocks (or slots `indices`) as a (1, R, 4) float
+        array of (left, top, right, bottom)
+        """
+        if indices is None:
+            indices = np.flatnonzero(self.alive)
+        r = self.rects[indices]
+        boxes = np.empty((1, len(r), 4))
+        boxes[0, :, :2] = r[:, :2]
+        boxes[0, :, 2:] = r[:, :2] + r[:, 2:]
+        return boxes
+
+    def get_velocities(self, indices=None):
+        """Velocities of the live rocks (or slots `indices`) as (vel_x, vel_y)
+        arrays of shape (1, R), in pixels per frame (y pointing down)
+        """
+        if indices is None:
+            indices = np.flatnonzero(self.alive)
+        indices = np.asarray(indices, dtype=np.int64)
+        speed = self.speed[indices]
+        vel_x = speed * self.dir_x[indices]
+        vel_y = -speed * self.dir_y[indices]
+        return vel_x[None], vel_y[None]
+
+    def get_rects(self, indices=None):
+        """Rects of the live rocks (or slots `indices`), keyed by slot"""
+        if indices is None:
+            indices = np.flatnonzero(self.alive)
+        indices = np.asarray(indices, dtype=np.int64)
+        return {
+            index: Rect(*rect)
+            for index, rect in zip(indices.tolist(), self.rects[indices].tolist())
+        }
+
+    def get_params(self):
+        """The live rocks as rows of ROCK_PARAMS, in spawn order"""
+        indices = self.get_indices()
+        params = np.empty((len(indices), len(ROCK_PARAMS)))
+        for column, array in enumerate((
+            self.x, self.y, self.size, self.speed, self.angle, self.dir_x,
+            self.dir_y, self.face
+        )):
+            params[:, column] = array[indices]
+        params[:, 8:] = self.rects[indices]
+        return params
+
+    def set_params(self, params):
+        """Replace all rocks with rows of ROCK_PARAMS (in spawn order)"""
+        self.clear(reset_stats=False)
+        n = len(params)
+        while self.capacity < n:
+            self.grow(2 * self.capacity)
+        for column, array in enumerate((
+            self.x, self.y, self.size, self.speed, self.angle, self.dir_x,
+            self.dir_y, self.face
+        )):
+            array[:n] = params[:, column]
+        self.rects[:n] = params[:, 8:]
+        self.alive[:n] = True
+        self.serial[:n] = np.arange(1, n + 1)
+        self.surfs[:n] = [None] * n
+        del self.free[len(self.free) - n:]
+        self.n_alive = n
+        self.n_spawned = n
+        self.n_used = n
+        if self.grid is not None:
+            self.spans[:n] = -1
+            self.grid_stale = True
+
+    def clear(self, reset_stats=True):
+        self.alive[:] = False
+        self.speed[:] = 0
+        self.serial[:] = 0
+        self.free = list(range(self.capacity - 1, -1, -1))
+        self.n_alive = 0
+        self.n_spawned = 0
+        self.n_used = 0
+        self.grid_stale = False
+        if self.grid is not None:
+            self.grid.clear()
+        if reset_stats:
+            self.recycled = 0
+            self.grows = 0
+            self.views_created = 0
+
+    def stats(self):
+        """Allocation counters since the last clear"""
+        return {
+            'spawns': self.n_spawned,
+            'recycled': self.recycled,
+            'grows': self.grows,
+            'views_created': self.views_created,
+            'capacity': self.capacity
+        }
+
+
+class AnalyticRockPool(RockPool):
+    """RockPool with event-driven, closed-form rock kinematics
+
+    Rocks move in straight lines at constant speed. So instead of moving
+    every rock on every frame, each rock keeps its spawn frame, origin and
+    velocity, and the positions of all rocks are evaluated at once when
+    they are queried (collisions, lidar, rendering, snapshots), at most
+    once per frame. The frame on which a rock leaves the screen is solved
+    for at spawn and pushed onto a min-heap, so update() only pops the
+    rocks that are due: O(1) per frame plus O(log n) per despawn, however
+    many rocks are in flight. update(n_frames) jumps ahead any number of
+    frames at once. A query still evaluates every slot in use, and the game
+    tests collisions on every frame, so a game frame stays linear in the
+    number of rocks. It saves the separate move and bounds check pass.
+
+    Positions are origin + age * velocity rather than a running sum, so
+    they can differ from RockPool in the last bits, and a rect can rarely
+    be a pixel apart.
+    """
+    ARRAYS = RockPool.ARRAYS + ('x0', 'y0', 'vx', 'vy', 'spawn_frame', 'exit_frame')
+
+    # Extra snapshot columns after ROCK_PARAMS, to restore positions exactly
+    EXTRA_PARAMS = ('x0', 'y0', 'age')
+
+    def __init__(self, *args, **kwargs):
+        self.x0 = np.zeros(0)
+        self.y0 = np.zeros(0)
+        self.vx = np.zeros(0)
+        self.vy = np.zeros(0)
+        self.spawn_frame = np.zeros(0)  # float, for the age computation
+        self.exit_frame = np.zeros(0, dtype=np.int64)
+        self.frame = 0
+        self.synced_frame = 0
+        self.exits = []  # heap of (exit frame, serial, slot)
+        super(AnalyticRockPool, self).__init__(*args, **kwargs)
+
+    def __iter__(self):
+        self.sync()
+        return super(AnalyticRockPool, self).__iter__()
+
+    def add(self, params):
+        index = super(AnalyticRockPool, self).add(params)
+        self.set_origin(index, self.x[index], self.y[index], self.frame)
+        return index
+
+    def move_to(self, index, x, y):
+        super(AnalyticRockPool, self).move_to(index, x, y)
+        self.set_origin(index, x, y, self.frame)
+
+    # Start the closed-form trajectory of a slot, and schedule its exit
+    def set_origin(self, index, x0, y0, spawn_frame):
+        speed = self.speed[index]
+        self.x0[index] = x0
+        self.y0[index] = y0
+        self.vx[index] = speed * self.dir_x[index]
+        self.vy[index] = -speed * self.dir_y[index]
+        self.spawn_frame[index] = spawn_frame
+        age = min(
+            self.exit_age(x0, self.vx[index], int(self.rects[index, 2])),
+            self.exit_age(y0, self.vy[index], int(self.rects[index, 3]))
+        )
+        if age == math.inf:
+            self.exit_frame[index] = -1
+            return
+        exit_frame = int(spawn_frame) + age
+        self.exit_frame[index] = exit_frame
+        heapq.heappush(self.exits, (exit_frame, int(self.serial[index]), index))
+
+    def exit_age(self, origin, velocity, width):
+        """Frames after spawn until the rect is beyond an edge of the screen
+        along one axis (as tested by RockPool.update), inf if never
+        """
+        origin, velocity = float(origin), float(velocity)
+        if self.off_screen(origin + velocity, width):
+            return 1
+        if velocity == 0:
+            return math.inf
+
+        # Center position at which the rect is off the far edge, then settle
+        # the rounding with the exact expression of sync()
+        half = width // 2
+        if velocity > 0:
+            bound = self.screen_size + half + 1
+        else:
+            bound = half - width - 1
+        age = max(math.ceil((bound - origin) / velocity), 1)
+        while age > 1 and self.off_screen(origin + (age - 1) * velocity, width):
+            age -= 1
+        while not self.off_screen(origin + age * velocity, width):
+            age += 1
+        return age
+
+    def off_screen(self, center, width):
+        left = int(center) - width // 2
+        return left > self.screen_size or left + width < 0
+
+    def update(self, n_frames=1):
+        """Advance n_frames frames, and release the rocks that left the
+        screen by then
+        """
+        self.frame += n_frames
+        exits = self.exits
+        while exits and exits[0][0] <= self.frame:
+            exit_frame, serial, index = heapq.heappop(exits)
+
+            # Entries of released or moved rocks are skipped
+            if (self.alive[index] and self.serial[index] == serial
+                and self.exit_frame[index] == exit_frame):
+                self.release(index)
+        self.grid_stale = self.grid is not None
+
+    def sync(self):
+        """Evaluate the positions and rects at the current frame, of the
+        slots used since the last clear (the others hold no rock)
+        """
+        if self.synced_frame == self.frame:
+            return
+        self.synced_frame = self.frame
+        n = self.n_used
+        age, x, y = self.scratch[:n], self.x[:n], self.y[:n]
+        np.subtract(self.frame, self.spawn_frame[:n], out=age)
+        np.multiply(age, self.vx[:n], out=x)
+        np.add(x, self.x0[:n], out=x)
+        np.multiply(age, self.vy[:n], out=y)
+        np.add(y, self.y0[:n], out=y)
+        self.place_rects(n)
+
+    def sync_grid(self):
+        self.sync()
+        super(AnalyticRockPool, self).sync_grid()
+
+    def collide_rect(self, rect, indices=None):
+        self.sync()
+        return super(AnalyticRockPool, self).collide_rect(rect, indices)
+
+    def get_boxes(self, indices=None):
+        self.sync()
+        return super(AnalyticRockPool, self).get_boxes(indices)
+
+    def get_rects(self, indices=None):
+        self.sync()
+        return super(AnalyticRockPool, self).get_rects(indices)
+
+    def get_params(self):
+        """The live rocks as rows of ROCK_PARAMS followed by EXTRA_PARAMS,
+        in spawn order
+        """
+        self.sync()
+        params = super(AnalyticRockPool, self).get_params()
+        indices = self.get_indices()
+        extra = np.empty((len(indices), len(self.EXTRA_PARAMS)))
+        extra[:, 0] = self.x0[indices]
+        extra[:, 1] = self.y0[indices]
+        extra[:, 2] = self.frame - self.spawn_frame[indices]
+        return np.hstack([params, extra])
+
+    def set_params(self, params):
+        """Replace all rocks with rows of ROCK_PARAMS, optionally followed by
+        EXTRA_PARAMS (rows without them start their trajectory here)
+        """
+        n_params = len(ROCK_PARAMS)
+        super(AnalyticRockPool, self).set_params(params[:, :n_params])
+        for index, row in enumerate(params.tolist()):
+            if len(row) > n_params:
+                x0, y0, age = row[n_params:]
+            else:
+                x0, y0, age = row[0], row[1], 0
+            self.set_origin(index, x0, y0, self.frame - age)
+
+    def clear(self, reset_stats=True):
+        super(AnalyticRockPool, self).clear(reset_stats)
+        self.frame = 0
+        self.synced_frame = 0
+        self.exits = []
+
+
+ROCK_KINEMATICS = {
+    'step': RockPool,
+    'analytic': AnalyticRockPool
+}
@@ -0,0 +1,146 @@
+"""
+Episode Recording and Replay
+
+Episodes are fully determined by the environment seed, its configuration and
+the sequence of actions, so that is all the recorder stores. Episodes are
+appended to a compact binary file, one record per episode:
+
+    magic       4 bytes   b'KER1'
+    seed        uint64
+    config_len  uint32    length of the JSON encoded config
+    config      bytes     JSON encoded KuiperEscape constructor arguments
+    n_actions   uint32
+    actions     n_actions x uint8
+
+The replayer rebuilds the environment headless and re-simulates the episode
+at full speed, so any frame can be regenerated without storing frames.
+
+"""
+# Standard imports
+import json
+import random
+import struct
+from collections import namedtuple
+
+# 3rd party imports
+import numpy as np
+import gym
+
+# Local imports
+from gym_kuiper_escape.envs.env_base import KuiperEscape
+
+MAGIC = b'KER1'
+
+Episode = namedtuple('Episode', ['seed', 'config', 'actions'])
+
+
+def write_episode(f, episode):
+    config = json.dumps(episode.config, sort_keys=True).encode('utf-8')
+    actions = np.asarray(episode.actions, dtype=np.uint8)
+    f.write(MAGIC)
+    f.write(struct.pack('<QI', episode.seed, len(config)))
+    f.write(config)
+    f.write(struct.pack('<I', len(actions)))
+    f.write(actions.tobytes())
+
+
+def read_episode(f):
+    magic = f.read(4)
+    if not magic:
+        return None
+    if magic != MAGIC:
+        raise ValueError("Not a Kuiper Escape episode record: " + repr(magic))
+    seed, config_len = struct.unpack('<QI', f.read(12))
+    config = json.loads(f.read(config_len).decode('utf-8'))
+    n_actions, = struct.unpack('<I', f.read(4))
+    actions = np.frombuffer(f.read(n_actions), dtype=np.uint8)
+    return Episode(seed, config, actions)
+
+
+def load_episodes(path):
+    episodes = []
+    with open(path, 'rb') as f:
+        episode = read_episode(f)
+        while episode is not None:
+            episodes.append(episode)
+            episode = read_episode(f)
+    return episodes
+
+
+class EpisodeRecorder(gym.Wrapper):
+    """Records the episodes of a KuiperEscape environment to `path`
+
+    Every reset draws a fresh episode seed and re-seeds the environment with
+    it, so each episode can be reproduced on its own. An episode is appended
+    to the file when the next one starts, or when the recorder is closed.
+    """
+    def __init__(self, env, path, seed=None):
+        super(EpisodeRecorder, self).__init__(env)
+        self.path = path
+        self.seed_rng = random.Random(seed)
+        self.episode_seed = None
+        self.actions = bytearray()
+
+    def reset(self, **kwargs):
+        self.flush()
+        self.episode_seed = self.seed_rng.randrange(2 ** 32)
+        self.env.seed(self.episode_seed)
+        self.actions = bytearray()
+        return self.env.reset(**kwargs)
+
+    def step(self, action):
+        self.actions.append(int(action))
+        return self.env.step(action)
+
+    def flush(self):
+        if self.episode_seed is None:
+            return
+        episode = Episode(self.episode_seed, self.env.get_config(), self.actions)
+        with open(self.path, 'ab') as f:
+            write_episode(f, episode)
+        self.episode_seed = None
+
+    def close(self):
+        self.flush()
+        return self.env.close()
+
+
+class EpisodeReplayer:
+    """Re-simulates a recorded episode headless
+
+    The environment is rebuilt from the recorded config in agent mode with
+    lidar observations (observations do not affect the dynamics), and the
+    recorded actions are re-applied. Frames in between the requested ones
+    are only simulated, no observation is computed for them.
+    """
+    def __init__(self, episode):
+        self.episode = episode
+        config = dict(episode.config, mode='agent', obs_type='lidar', frame_stack=1)
+        self.env = KuiperEscape(**config)
+        self.reset()
+
+    def __len__(self):
+        return len(self.episode.actions)
+
+    def reset(self):
+        self.env.seed(self.episode.seed)
+        self.env.reset()
+        self.index = 0
+
+    def advance(self):
+        self.env.advance(int(self.episode.actions[self.index]))
+        self.index += 1
+
+    def seek(self, index):
+        """Simulate up to (after) action `index` and return the environment"""
+        if not 0 <= index <= len(self):
+            raise IndexError("Frame index out of range: " + str(index))
+        if index < self.index:
+            self.reset()
+        while self.index < index:
+            self.advance()
+        return self.env
+
+    def get_frame(self, index):
+        """Lidar observation after action `index`"""
+        return self.seek(index).get_state()
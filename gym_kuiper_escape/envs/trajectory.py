@@ -0,0 +1,329 @@
+"""
+Trajectory Datasets
+
+Offline RL datasets of every transition of a KuiperEscape environment. A
+dataset is a directory of .npy columns, one row per transition:
+
+    obs.npy         observation the action was taken in (obs_<key>.npy per
+                    key for dict observations)
+    action.npy      uint8
+    reward.npy      float64
+    done.npy        bool
+    iteration.npy   uint32
+    time.npy        float64
+    episodes.npy    one row per episode: first transition, number of
+                    transitions
+    index.json      transition and episode counts, column layout, config
+
+The recorder writes the columns through memory maps, preallocated for
+`capacity` rows. A full column grows by doubling in place: the file is
+extended and only the .npy header is rewritten (it is padded for any
+number of rows), the rows already written are not copied. Every
+`chunk_size` transitions the maps are flushed and index.json is replaced,
+so a dataset is readable up to the last flush even if the recording is
+interrupted. On close the columns are truncated to the recorded rows,
+which makes them plain .npy files.
+
+The next observation of a transition is the observation of the following
+row, so observations are stored once. The terminal observation of an
+episode is not stored (it is not needed for bootstrapping), nor is the last
+observation of an episode cut short by a reset or close.
+
+"""
+# Standard imports
+import json
+import os
+import struct
+
+# 3rd party imports
+import numpy as np
+import gym
+from gym.spaces import Dict
+
+INDEX = 'index.json'
+MAX_ROWS = 2**63 - 1  # largest first axis a column header has room for
+HEADER_ALIGN = 64
+EPISODES = 'episodes'
+COLUMNS = [
+    ('action', (), np.uint8),
+    ('reward', (), np.float64),
+    ('done', (), np.bool_),
+    ('iteration', (), np.uint32),
+    ('time', (), np.float64)
+]
+
+
+def get_obs_columns(observation_space):
+    """(column, key, shape, dtype) of every observation array, key None for
+    a single (non-dict) observation
+    """
+    if isinstance(observation_space, Dict):
+        return [
+            ('obs_' + key, key, space.shape, np.dtype(space.dtype))
+            for key, space in observation_space.spaces.items()
+        ]
+    return [('obs', None, observation_space.shape, np.dtype(observation_space.dtype))]
+
+
+class MemmapColumn:
+    """Growable memory-mapped .npy file of rows of `shape` and `dtype`
+
+    The file is allocated for `capacity` rows along the first axis and its
+    header states the capacity, until it is resized to the rows in use.
+    The header is written here rather than by numpy, padded to the length
+    of a header of MAX_ROWS rows, so it never changes length on a resize
+    (older numpy releases, such as the pinned 1.21, only pad the header to a
+    multiple of 64 bytes).
+    """
+    def __init__(self, path, shape, dtype, capacity):
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.row_nbytes = self.dtype.itemsize * int(np.prod(self.shape))
+        self.offset = len(self.get_header(MAX_ROWS, pad=False))
+        self.offset += -self.offset % HEADER_ALIGN
+        self.array = None
+        self.capacity = 0
+        open(path, 'wb').close()
+        self.resize(capacity)
+
+    def get_header(self, capacity, pad=True):
+        """Version 1.0 .npy header of `capacity` rows, padded with spaces to
+        the column's data offset
+        """
+        text = repr({
+            'descr': np.lib.format.dtype_to_descr(self.dtype),
+            'fortran_order': False,
+            'shape': (capacity,) + self.shape
+        })
+        prefix = np.lib.format.magic(1, 0)
+        if pad:
+            text = text.ljust(self.offset - len(prefix) - struct.calcsize('<H') - 1)
+        text = (text + '\n').encode('latin1')
+        return prefix + struct.pack('<H', len(text)) + text
+
+    def reserve(self, n):
+        """Make room for at least n rows"""
+        if n > self.capacity:
+            self.resize(max(n, 2 * self.capacity))
+
+    def resize(self, capacity):
+        """Extend or truncate the file in place, rewriting only its header"""
+        header = self.get_header(capacity)
+        self.close()
+        with open(self.path, 'r+b') as f:
+            f.write(header)
+            f.truncate(self.offset + capacity * self.row_nbytes)
+        if capacity > 0:
+            self.array = np.lib.format.open_memmap(self.path, mode='r+')
+        self.capacity = capacity
+
+    def flush(self):
+        if self.array is not None:
+            self.array.flush()
+
+    def close(self):
+        """Flush and unmap the file"""
+        self.flush()
+        self.array = None
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """Streams every transition of a KuiperEscape environment to a dataset
+    directory `path` (see the module docstring for the layout)
+
+    Args:
+        capacity: rows preallocated per column, doubled whenever full
+        chunk_size: transitions between flushes of the columns and the index
+
+    Observations are copied into the mapped columns as they are returned,
+    so the recorder also works with copy_obs=False.
+    """
+    def __init__(self, env, path, capacity=4096, chunk_size=1024):
+        super(TrajectoryRecorder, self).__init__(env)
+        self.path = path
+        self.chunk_size = chunk_size
+        os.makedirs(path, exist_ok=True)
+
+        self.obs_columns = get_obs_columns(env.observation_space)
+        self.columns = {}
+        for name, _, shape, dtype in self.obs_columns:
+            self.columns[name] = MemmapColumn(self.get_file(name), shape, dtype, capacity)
+        for name, shape, dtype in COLUMNS:
+            self.columns[name] = MemmapColumn(self.get_file(name), shape, dtype, capacity)
+        self.episodes = MemmapColumn(self.get_file(EPISODES), (2,), np.int64, 64)
+
+        self.n_transitions = 0
+        self.n_episodes = 0
+        self.n_flushed = 0
+        self.episode_start = None
+        self.closed = False
+        self.write_index()
+
+    def get_file(self, name):
+        return os.path.join(self.path, name + '.npy')
+
+    def reset(self, **kwargs):
+        self.end_episode()
+        observation = self.env.reset(**kwargs)
+        self.episode_start = self.n_transitions
+        self.write_observation(observation)
+        return observation
+
+    def step(self, action):
+        if self.episode_start is None:
+            raise RuntimeError("Call reset() before step()")
+        observation, reward, done, info = self.env.step(action)
+
+        # The row already holds the observation the action was taken in
+        n = self.n_transitions
+        columns = self.columns
+        columns['action'].array[n] = action
+        columns['reward'].array[n] = reward
+        columns['done'].array[n] = done
+        columns['iteration'].array[n] = info['iteration']
+        columns['time'].array[n] = info['time']
+        self.n_transitions += 1
+
+        if done:
+            self.end_episode()
+        else:
+            self.write_observation(observation)
+        if self.n_transitions - self.n_flushed >= self.chunk_size:
+            self.flush()
+        return (observation, reward, done, info)
+
+    # Copy the observation into the next row of the observation columns
+    def write_observation(self, observation):
+        n = self.n_transitions
+        for name, key, _, _ in self.obs_columns:
+            column = self.columns[name]
+            column.reserve(n + 1)
+            column.array[n] = observation if key is None else observation[key]
+        for name, _, _ in COLUMNS:
+            self.columns[name].reserve(n + 1)
+
+    def end_episode(self):
+        if self.episode_start is None:
+            return
+        length = self.n_transitions - self.episode_start
+        if length > 0:
+            self.episodes.reserve(self.n_episodes + 1)
+            self.episodes.array[self.n_episodes] = (self.episode_start, length)
+            self.n_episodes += 1
+        self.episode_start = None
+
+    def flush(self):
+        """Write the mapped rows to disk, then the index that covers them"""
+        for column in self.columns.values():
+            column.flush()
+        self.episodes.flush()
+        self.write_index()
+        self.n_flushed = self.n_transitions
+
+    def write_index(self):
+        index = {
+            'n_transitions': self.n_transitions,
+            'n_episodes': self.n_episodes,
+            'obs_columns': [
+                {'name': name, 'key': key, 'shape': list(shape), 'dtype': dtype.str}
+                for name, key, shape, dtype in self.obs_columns
+            ],
+            'config': self.env.get_config()
+        }
+        path = os.path.join(self.path, INDEX)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(index, f)
+        os.replace(path + '.tmp', path)
+
+    def close(self):
+        """Record the current episode, and truncate the columns to the rows
+        in use
+        """
+        if not self.closed:
+            self.end_episode()
+            for column in self.columns.values():
+                column.resize(self.n_transitions)
+            self.episodes.resize(self.n_episodes)
+            self.write_index()
+            self.closed = True
+        return self.env.close()
+
+
+class TrajectoryDataset:
+    """Read-only dataset recorded by a TrajectoryRecorder
+
+    The columns are memory-mapped, nothing is loaded until it is indexed:
+    get_episode() returns views of the files, and sample() reads only the
+    sampled rows.
+
+    Attributes:
+        columns (dict): column name to array of n_transitions rows
+        episodes (array): (first transition, number of transitions) per episode
+        config (dict): KuiperEscape config of the recording
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX)) as f:
+            index = json.load(f)
+        self.n_transitions = index['n_transitions']
+        self.n_episodes = index['n_episodes']
+        self.config = index['config']
+        self.obs_columns = [(entry['name'], entry['key']) for entry in index['obs_columns']]
+
+        names = [name for name, _ in self.obs_columns] + [name for name, _, _ in COLUMNS]
+        self.columns = {
+            name: self.load(name, self.n_transitions)
+            for name in names
+        }
+        self.episodes = self.load(EPISODES, self.n_episodes)
+
+        # Transitions without a next observation: the last transition of
+        # episodes that did not end with done, and the last transition
+        # recorded if the recording stopped mid-episode (its next
+        # observation is past the last flush)
+        last = self.episodes[:, 0] + self.episodes[:, 1] - 1
+        if self.n_transitions > 0:
+            last = np.append(last, self.n_transitions - 1)
+        self.dead_ends = np.unique(last[~self.columns['done'][last]])
+
+    def __len__(self):
+        return self.n_transitions
+
+    def load(self, name, n):
+        array = np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+        return array[:n]
+
+    def get_observation(self, index):
+        """Observations of the rows `index` (a dict for dict observations)"""
+        observation = {key: self.columns[name][index] for name, key in self.obs_columns}
+        if None in observation:
+            return observation[None]
+        return observation
+
+    def get_episode(self, i):
+        """Columns of episode i, as views of the mapped files"""
+        start, length = self.episodes[i]
+        return {name: column[start:start + length] for name, column in self.columns.items()}
+
+    def sample(self, batch_size, rng=None):
+        """Minibatch of transitions drawn uniformly with replacement. Returns
+        a dict of obs, action, reward, done, next_obs, iteration and time.
+        The next_obs of a done transition is a copy of its obs.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        if self.n_transitions <= len(self.dead_ends):
+            raise ValueError("No transitions with a next observation to sample")
+        index = rng.integers(self.n_transitions, size=batch_size)
+        redraw = np.isin(index, self.dead_ends)
+        while redraw.any():
+            index[redraw] = rng.integers(self.n_transitions, size=int(redraw.sum()))
+            redraw = np.isin(index, self.dead_ends)
+
+        # Sorted rows are read from the files in order
+        index.sort()
+        batch = {name: self.columns[name][index] for name, _, _ in COLUMNS}
+        batch['obs'] = self.get_observation(index)
+        batch['next_obs'] = self.get_observation(np.where(batch['done'], index, index + 1))
+        return batch
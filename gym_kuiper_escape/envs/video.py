@@ -0,0 +1,216 @@
+"""
+Video Recording
+
+Records the frames of a KuiperEscape environment without stalling the
+stepping loop. After every reset and step, the recorder copies the screen
+once into one of a fixed set of preallocated frame buffers and queues it.
+Encoding runs on a worker thread, which returns each buffer to the free
+list once the frame is written. Episodes are written to `path`, one per
+file or folder, with one of the encoders:
+
+    raw      episode_000000.rgb, frames of raw rgb24 bytes, e.g. for
+             ffmpeg -f rawvideo -pix_fmt rgb24 -s 512x512 -i <file> ...
+    png      episode_000000/frame_000000.png, ...
+    ffmpeg   episode_000000.mp4, frames piped to a local ffmpeg executable
+
+When all buffers are queued, the recorder either waits for the worker to
+free one (back-pressure, the default) or drops the frame and counts it.
+
+"""
+# Standard imports
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+# 3rd party imports
+import numpy as np
+import gym
+
+
+class RawWriter:
+    def __init__(self, path, size, fps):
+        self.path = path
+        self.file = None
+
+    def open(self, episode):
+        self.file = open(os.path.join(self.path, 'episode_{:06d}.rgb'.format(episode)), 'wb')
+
+    def write(self, frame):
+        self.file.write(frame.data)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class PngWriter:
+    def __init__(self, path, size, fps):
+        self.path = path
+        self.size = size
+        self.folder = None
+        self.n_frames = 0
+
+    def open(self, episode):
+        self.folder = os.path.join(self.path, 'episode_{:06d}'.format(episode))
+        os.makedirs(self.folder, exist_ok=True)
+        self.n_frames = 0
+
+    def write(self, frame):
+        import pygame
+        surf = pygame.image.frombuffer(frame.data, (self.size, self.size), 'RGB')
+        pygame.image.save(surf, os.path.join(self.folder, 'frame_{:06d}.png'.format(self.n_frames)))
+        self.n_frames += 1
+
+    def close(self):
+        self.folder = None
+
+
+class FfmpegWriter:
+    def __init__(self, path, size, fps):
+        self.executable = shutil.which('ffmpeg')
+        if self.executable is None:
+            raise RuntimeError("The ffmpeg encoder needs an ffmpeg executable on the PATH")
+        self.path = path
+        self.size = size
+        self.fps = fps
+        self.process = None
+
+    def open(self, episode):
+        self.process = subprocess.Popen(
+            [
+                self.executable, '-y', '-loglevel', 'error',
+                '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                '-s', '{0}x{0}'.format(self.size), '-r', str(self.fps),
+                '-i', '-',
+                '-pix_fmt', 'yuv420p',
+                os.path.join(self.path, 'episode_{:06d}.mp4'.format(episode))
+            ],
+            stdin=subprocess.PIPE
+        )
+
+    def write(self, frame):
+        self.process.stdin.write(frame.data)
+
+    def close(self):
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.wait()
+            self.process = None
+
+
+ENCODERS = {
+    'raw': RawWriter,
+    'png': PngWriter,
+    'ffmpeg': FfmpegWriter
+}
+
+
+class VideoRecorder(gym.Wrapper):
+    """Records every frame of a KuiperEscape environment to `path`
+
+    Args:
+        encoder: 'raw', 'png' or 'ffmpeg' (see the module docstring)
+        n_buffers: frames that can be queued for the worker thread
+        drop_frames: drop frames while all buffers are queued, instead of
+            waiting for the worker
+        render_lidar: draw the lidar beams over the frames, as
+            render(render_lidar=True) does
+    """
+    def __init__(self, env, path, encoder='raw', n_buffers=8, drop_frames=False, render_lidar=False):
+        super(VideoRecorder, self).__init__(env)
+        if encoder not in ENCODERS:
+            raise ValueError("Invalid encoder: " + str(encoder))
+        self.path = path
+        self.drop_frames = drop_frames
+        self.render_lidar = render_lidar
+        os.makedirs(path, exist_ok=True)
+
+        game = self.unwrapped.game
+        self.writer = ENCODERS[encoder](path, game.screen_size, game.framerate)
+        self.free = queue.Queue()
+        for _ in range(n_buffers):
+            self.free.put(np.empty((game.screen_size, game.screen_size, 3), dtype=np.uint8))
+        self.frames = queue.Queue()
+
+        self.n_episodes = 0
+        self.n_captured = 0
+        self.n_written = 0
+        self.n_dropped = 0
+        self.error = None
+        self.closed = False
+        self.worker = threading.Thread(target=self.run_worker, daemon=True)
+        self.worker.start()
+
+    def reset(self, **kwargs):
+        observation = self.env.reset(**kwargs)
+        self.frames.put(('episode', self.n_episodes))
+        self.n_episodes += 1
+        self.capture()
+        return observation
+
+    def step(self, action):
+        result = self.env.step(action)
+        self.capture()
+        return result
+
+    def capture(self):
+        """Copy the current screen into a free buffer and queue it"""
+        if self.error is not None:
+            raise RuntimeError("Video encoder failed") from self.error
+        try:
+            buffer = self.free.get(block=not self.drop_frames)
+        except queue.Empty:
+            self.n_dropped += 1
+            return
+        env = self.unwrapped
+        env.game.draw()
+        if self.render_lidar:
+            env.draw_lidar()
+
+        # Screen RGB order, the pixels view reverses the channels
+        view = env.get_pixels_view()
+        np.copyto(buffer, view[:, :, ::-1])
+        del view
+        self.frames.put(('frame', buffer))
+        self.n_captured += 1
+
+    def run_worker(self):
+        while True:
+            message = self.frames.get()
+            if message is None:
+                break
+            kind, value = message
+            try:
+                if kind == 'episode':
+                    self.writer.close()
+                    self.writer.open(value)
+                else:
+                    self.writer.write(value)
+                    self.n_written += 1
+            except Exception as e:
+                self.error = e
+            finally:
+                if kind == 'frame':
+                    self.free.put(value)
+        self.writer.close()
+
+    def stats(self):
+        """Frames captured, written by the worker, and dropped"""
+        return {
+            'captured': self.n_captured,
+            'written': self.n_written,
+            'dropped': self.n_dropped
+        }
+
+    def close(self):
+        """Write the queued frames and stop the worker"""
+        if not self.closed:
+            self.frames.put(None)
+            self.worker.join()
+            self.closed = True
+            if self.error is not None:
+                raise RuntimeError("Video encoder failed") from self.error
+        return self.env.close()
@@ -0,0 +1,40 @@
+# Standard imports
+import os
+import random
+
+# 3rd party imports
+import numpy as np
+import pytest
+
+# Local imports
+from gym_kuiper_escape.envs.kuiper_escape.assets import path_assets, to_screen_format
+from gym_kuiper_escape.envs.kuiper_escape.game import Game
+
+pygame = pytest.importorskip('pygame')
+
+
+def draw_uncached(game):
+    """The frame drawn with every sprite scaled from its own freshly loaded
+    image, as before the asset store
+    """
+    screen = pygame.Surface(game.screen_dims)
+    screen.fill((0, 0, 0))
+    sprites = [('spaceship', game.player)] + [('asteroid', rock) for rock in game.rocks]
+    for name, sprite in sprites:
+        image = pygame.image.load(os.path.join(path_assets, name + '.png'))
+        surf = to_screen_format(pygame.transform.scale(image, sprite.rect.size))
+        assert surf.get_size() == sprite.rect.size
+        screen.blit(surf, sprite.rect.topleft)
+    return pygame.surfarray.array3d(screen)
+
+
+def test_frames_match_uncached_sprites():
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    game = Game(mode='agent', lives=1000, rock_rate=8, rng=random.Random(0))
+    for i in range(60):
+        game.step_frame(i % 5)
+        if i % 10 == 9:
+            game.draw()
+            np.testing.assert_array_equal(
+                pygame.surfarray.array3d(game.screen), draw_uncached(game)
+            )
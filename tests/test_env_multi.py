@@ -0,0 +1,92 @@
+# Standard imports
+import random
+
+# 3rd party imports
+import numpy as np
+import pytest
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape, KuiperEscapeMulti
+
+ENV_KWARGS = {'lives_start': 3, 'rock_rate': 8}
+
+
+def add_rock(rocks, x, y, size=40):
+    """Add a rock that stays at (x, y), returns its slot"""
+    return rocks.add((
+        x, y, size, 0, 0, 1, 0, 0,
+        int(x) - size // 2, int(y) - size // 2, size, size
+    ))
+
+
+def move_player(player, dx):
+    player.x += dx
+    player.rect.centerx = int(player.x)
+
+
+@pytest.mark.parametrize('lidar_engine', ['march', 'analytic'])
+def test_single_agent_matches_single_env(lidar_engine):
+    env = KuiperEscape(lidar_engine=lidar_engine, **ENV_KWARGS)
+    multi = KuiperEscapeMulti(n_agents=1, lidar_engine=lidar_engine, **ENV_KWARGS)
+    env.seed(0)
+    multi.seed(0)
+    np.testing.assert_array_equal(multi.reset()[0], env.reset())
+
+    rng = random.Random(0)
+    for _ in range(1000):
+        action = rng.randrange(5)
+        observation, reward, done, info = env.step(action)
+        observations, rewards, dones, infos = multi.step(np.array([action]))
+        np.testing.assert_array_equal(observations[0], observation)
+        assert rewards[0] == reward
+        assert dones[0] == done
+        assert infos['lives'][0] == env.game.player.lives
+        assert infos['time'] == info['time']
+        if done:
+            break
+    assert done
+
+
+def test_shared_rock_costs_every_player_a_life():
+    env = KuiperEscapeMulti(n_agents=3, lives_start=3)
+    env.seed(0)
+    env.reset()
+    players = env.game.players
+    move_player(players[2], 200)
+
+    # The first two players start on top of each other, the third is clear
+    slot = add_rock(env.game.rocks, players[0].x, players[0].y)
+    info = env.step(np.zeros(3, dtype=int))[3]
+    assert info['lives'].tolist() == [2, 2, 3]
+    assert not env.game.rocks.alive[slot]
+
+
+def test_dead_player_stops_and_is_not_drawn():
+    env = KuiperEscapeMulti(n_agents=2, lives_start=1)
+    env.seed(0)
+    env.reset()
+    game = env.game
+    dead, alive = game.players
+    move_player(alive, 200)
+    add_rock(game.rocks, dead.x, dead.y)
+    _, _, done, info = env.step(np.zeros(2, dtype=int))
+    assert done.tolist() == [True, False]
+    assert info['lives'].tolist() == [0, 1]
+    assert dead not in game.all_sprites
+    assert alive in game.all_sprites
+
+    # Actions of the dead player are ignored
+    x, y, rect = dead.x, dead.y, tuple(dead.rect)
+    for action in (1, 2, 3, 4):
+        _, reward, done, _ = env.step(np.array([action, 0]))
+        assert (dead.x, dead.y, tuple(dead.rect)) == (x, y, rect)
+        assert reward[0] == 0
+        assert done[0]
+
+    # Nothing is drawn where the dead player is (the rock hit is gone too),
+    # while the other ship still is
+    frame = env.render(mode='rgb_array')
+    left, top, width, height = dead.rect
+    assert not frame[top:top + height, left:left + width].any()
+    left, top, width, height = alive.rect
+    assert frame[top:top + height, left:left + width].any()
@@ -0,0 +1,80 @@
+# Standard imports
+import logging
+import os
+
+# 3rd party imports
+import numpy as np
+import pytest
+
+# Local imports
+from gym_kuiper_escape.envs.env_remote import EnvClient
+from gym_kuiper_escape.envs.env_server import EnvServer
+
+
+def start_server(tmp_path, **kwargs):
+    path = os.path.join(str(tmp_path), 'server.sock')
+    server = EnvServer(**kwargs)
+    server.start_thread(path)
+    return server, path
+
+
+def test_close_with_clients_attached(tmp_path, caplog):
+    server, path = start_server(tmp_path, n_envs=2)
+    client = EnvClient(path)
+    client.reset([0, 1])
+    client.step([0, 1], [1, 2])
+    idle = EnvClient(path)
+
+    with caplog.at_level(logging.ERROR, logger='asyncio'):
+        server.close()
+    assert server.thread is None
+    assert server.loop.is_closed()
+    assert not server.handlers
+    assert not caplog.records
+
+    with pytest.raises(ConnectionError):
+        client.step([0], [1])
+    client.close()
+    idle.close()
+
+
+def test_env_error_is_sent_back(tmp_path):
+    server, path = start_server(tmp_path, n_envs=2)
+
+    def step(action):
+        raise TypeError('broken env')
+    server.envs[1].step = step
+
+    client = EnvClient(path)
+    other = EnvClient(path)
+    client.reset([0, 1])
+    with pytest.raises(RuntimeError, match='TypeError: broken env'):
+        client.step([0, 1], [1, 1])
+
+    # The stepper keeps serving every client
+    observation, reward, done, infos = client.step([0], [1])
+    assert len(reward) == 1
+    other.reset([0])
+    assert other.step([0], [2])[3][0]['iteration'] == 1
+    client.close()
+    other.close()
+    server.close()
+
+
+def test_step_info_entries(tmp_path):
+    server, path = start_server(tmp_path, n_envs=2, env_kwargs={'lives_start': 1, 'rock_rate': 10})
+    client = EnvClient(path)
+    client.seed([0, 1], [0, 1])
+    client.reset([0, 1])
+    done = np.zeros(2, dtype=bool)
+    for i in range(2000):
+        _, _, done, infos = client.step([0, 1], [i % 5, i % 5])
+        for d, info in zip(done, infos):
+            assert ('rock_pool' in info) == d
+        if done.any():
+            break
+    assert done.any()
+    info = infos[int(np.flatnonzero(done)[0])]
+    assert info['rock_pool'] == server.envs[int(np.flatnonzero(done)[0])].game.rocks.stats()
+    client.close()
+    server.close()
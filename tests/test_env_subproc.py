@@ -0,0 +1,55 @@
+# 3rd party imports
+import numpy as np
+import pytest
+from multiprocessing.shared_memory import SharedMemory
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+from gym_kuiper_escape.envs.env_subproc import SubprocVectorKuiperEscape
+
+ENV_KWARGS = {'lives_start': 1, 'rock_rate': 10}
+N_ENVS = 4
+
+
+def test_subproc_matches_in_process_envs():
+    env = SubprocVectorKuiperEscape(n_envs=N_ENVS, n_workers=2, env_kwargs=ENV_KWARGS)
+    specs = dict(env.specs)
+    try:
+        assert [list(group) for group in env.groups] == [[0, 1], [2, 3]]
+        assert env.seed(0) == list(range(N_ENVS))
+        references = [KuiperEscape(**ENV_KWARGS) for _ in range(N_ENVS)]
+        for i, reference in enumerate(references):
+            reference.seed(i)
+
+        space = env.observation_space
+        observation = env.reset()
+        assert observation.shape == (N_ENVS,) + space.shape
+        assert observation.dtype == space.dtype
+        np.testing.assert_array_equal(observation, [r.reset() for r in references])
+
+        n_done = 0
+        for i in range(300):
+            actions = np.arange(N_ENVS) + i
+            observation, reward, done, infos = env.step(actions % 5)
+            assert observation.shape == (N_ENVS,) + space.shape
+            assert observation.dtype == space.dtype
+            assert reward.shape == done.shape == (N_ENVS,)
+            assert len(infos) == N_ENVS
+            for k, reference in enumerate(references):
+                expected, expected_reward, expected_done, _ = reference.step(int(actions[k] % 5))
+                assert reward[k] == expected_reward
+                assert done[k] == expected_done
+                if expected_done:
+                    # Auto-reset, with the last observation in the info
+                    np.testing.assert_array_equal(infos[k]['terminal_observation'], expected)
+                    expected = reference.reset()
+                    n_done += 1
+                np.testing.assert_array_equal(observation[k], expected)
+        assert n_done > 0
+    finally:
+        env.close()
+
+    assert not any(process.is_alive() for process in env.processes)
+    for name, _, _ in specs.values():
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
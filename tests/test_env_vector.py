@@ -0,0 +1,33 @@
+# 3rd party imports
+import numpy as np
+import pytest
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscapeVector
+
+
+@pytest.mark.parametrize('obs_dtype', ['float16', 'float32'])
+@pytest.mark.parametrize('lidar_motion', [False, True])
+def test_observation_dtype(obs_dtype, lidar_motion):
+    env = KuiperEscapeVector(
+        n_envs=8, lives_start=1, rock_rate=10, lidar_motion=lidar_motion, obs_dtype=obs_dtype
+    )
+    env.seed(0)
+    space = env.observation_space
+    observation = env.reset()
+    assert observation.dtype == space.dtype == np.dtype(obs_dtype)
+    assert observation.shape == (8,) + space.shape
+
+    n_done = 0
+    for i in range(300):
+        observation, reward, done, info = env.step(np.full(8, i % 5))
+        assert observation.dtype == space.dtype
+        assert info['terminal_observation'].dtype == space.dtype
+        assert space.contains(observation[0])
+        n_done += done.sum()
+    assert n_done > 0
+
+
+def test_invalid_obs_dtype():
+    with pytest.raises(ValueError):
+        KuiperEscapeVector(n_envs=2, obs_dtype='float64')
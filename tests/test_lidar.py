@@ -0,0 +1,112 @@
+# Standard imports
+import random
+
+# 3rd party imports
+import numpy as np
+import pytest
+
+# Local imports
+from gym_kuiper_escape.envs.kuiper_escape.core import Body, Rect
+from gym_kuiper_escape.envs.kuiper_escape.game import Game
+from gym_kuiper_escape.envs.kuiper_escape.lidar import Lidar, LidarAnalytic
+
+SCREEN_SIZE = 512
+STEP = 0.02 * SCREEN_SIZE
+MAX_RADIUS = 0.5 * SCREEN_SIZE
+
+
+def make_lidar(engine, x, y, n_beams=32, motion=False):
+    return engine(
+        x=x, y=y, n_beams=n_beams, step=STEP,
+        max_radius=MAX_RADIUS, screen_size=SCREEN_SIZE, motion=motion
+    )
+
+
+def make_rock(left, top, size):
+    rock = Body()
+    rock.rect = Rect(left, top, size, size)
+    return rock
+
+
+def make_frames(seed, n_frames=200):
+    """Random rock layouts, with the ship outside of every rock"""
+    rng = random.Random(seed)
+    frames = []
+    while len(frames) < n_frames:
+        rocks = []
+        for _ in range(rng.randint(0, 30)):
+            size = rng.randint(20, 50)
+            rocks.append(make_rock(
+                rng.randint(-size, SCREEN_SIZE), rng.randint(-size, SCREEN_SIZE), size
+            ))
+        x = rng.randint(0, SCREEN_SIZE)
+        y = rng.randint(0, SCREEN_SIZE)
+        if not any(rock.rect.collidepoint(x, y) for rock in rocks):
+            frames.append((x, y, rocks))
+    return frames
+
+
+def test_single_rock():
+    rock = make_rock(200, 90, 20)
+    radius_exact, collide_exact = make_lidar(LidarAnalytic, 100, 100).scan([rock])
+    radius_march, collide_march = make_lidar(Lidar, 100, 100).scan([rock])
+
+    # Beam 0 points along +x, at the left edge of the rock
+    assert collide_exact[0] == collide_march[0] == 1
+    assert radius_exact[0] == pytest.approx(100)
+    assert radius_exact[0] <= radius_march[0] <= radius_exact[0] + STEP
+
+    # Beam 16 points along -x, at the left wall
+    assert collide_exact[16] == collide_march[16] == 0
+    assert radius_exact[16] == pytest.approx(100)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_analytic_matches_march(seed):
+    n_beams = 0
+    n_match = 0
+    n_within = 0
+    for x, y, rocks in make_frames(seed):
+        radius_march, collide_march = make_lidar(Lidar, x, y).scan(rocks)
+        radius_exact, collide_exact = make_lidar(LidarAnalytic, x, y).scan(rocks)
+        err = np.abs(np.asarray(radius_march) - radius_exact)
+        n_beams += len(err)
+        n_match += (np.asarray(collide_march) == collide_exact).sum()
+        n_within += (err <= STEP).sum()
+
+    # Beams only disagree where the marcher stepped over a rock corner (or
+    # grazed a rock edge along an axis)
+    assert n_match / n_beams >= 0.97
+    assert n_within / n_beams >= 0.95
+
+
+def populate(game, n_rocks):
+    # Rocks scattered over the screen, away from the player
+    while len(game.rocks) < n_rocks:
+        index = game.spawn_rock()
+        game.rocks.move_to(
+            index,
+            game.rng.uniform(0, game.screen_size),
+            game.rng.uniform(0, game.screen_size)
+        )
+        if game.rocks.collide_rect(game.player.rect, [index]):
+            game.rocks.release(index)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_grid_scan_matches_linear_scan(seed):
+    game = Game(mode='agent', rng=random.Random(seed))
+    populate(game, 600)
+    assert len(game.rocks) >= LidarAnalytic.grid_min_rocks
+    results = []
+    for grid in (None, game.grid):
+        lidar = make_lidar(LidarAnalytic, 0, 0, n_beams=64, motion=True)
+        lidar.sync_position(game.player)
+        radius, collide = lidar.scan(game.rocks, grid=grid)
+        closing, time_to_impact = lidar.get_motion()
+        results.append([a.copy() for a in (radius, collide, closing, time_to_impact)])
+
+    # Rocks hit at the same distance are broken on the lowest slot on both
+    # paths, so the motion channels match as well
+    for linear, indexed in zip(*results):
+        np.testing.assert_array_equal(linear, indexed)
@@ -0,0 +1,93 @@
+# 3rd party imports
+import pytest
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+
+PHASES = [
+    'step', 'reset', 'get_observation', 'get_state', 'get_rgb_state', 'reward',
+    'step_frame', 'spawn_rock', 'player_update', 'rock_update', 'collisions',
+    'update_screen', 'lidar_scan'
+]
+INSTRUMENTED = [
+    ('env', 'step'), ('env', 'reset'), ('env', 'get_observation'),
+    ('env', 'get_state'), ('env', 'get_rgb_state'), ('env', 'get_reward'),
+    ('game', 'step_frame'), ('game', 'spawn_rock'), ('game', 'get_collisions'),
+    ('game', 'update_screen'), ('player', 'update'), ('rocks', 'update'),
+    ('lidar', 'scan')
+]
+
+
+def get_objects(env):
+    return {
+        'env': env,
+        'game': env.game,
+        'player': env.game.player,
+        'rocks': env.game.rocks,
+        'lidar': env.lidar
+    }
+
+
+@pytest.mark.parametrize('lidar_engine', ['march', 'analytic'])
+def test_profile_counts_calls_per_phase(lidar_engine):
+    n_steps, frame_skip = 50, 4
+    env = KuiperEscape(
+        lives_start=1000,
+        rock_rate=8,
+        frame_skip=frame_skip,
+        lidar_engine=lidar_engine,
+        profile=True
+    )
+    env.seed(0)
+    env.reset()
+    for i in range(n_steps):
+        assert not env.step(i % 5)[2]
+    report = env.profile_report(reset=True)
+
+    n_frames = n_steps * frame_skip
+    frames_per_rock = max(int(env.game.framerate / env.rock_rate), 1)
+    expected = {
+        'step': n_steps,
+        'reset': 1,
+        'get_observation': n_steps + 1,
+        'get_state': n_steps + 1,
+        'get_rgb_state': 0,
+        'reward': n_frames,
+        'step_frame': n_frames,
+        'spawn_rock': n_frames // frames_per_rock,  # frames 1 to n_frames
+        'player_update': n_frames,
+        'rock_update': n_frames,
+        'collisions': n_frames,
+        'update_screen': 0,
+        'lidar_scan': n_steps + 1
+    }
+    phases = report['phases']
+    assert sorted(phases) == sorted(PHASES)
+    assert {phase: row['calls'] for phase, row in phases.items()} == expected
+    assert phases['step']['share'] == 1
+    assert set(report['counters']) == {'lidar_steps', 'lidar_rect_tests'}
+    assert report['counters']['lidar_steps']['total'] > 0
+    assert 'lidar_scan' in report['text']
+
+    # reset=True starts the next report from zero
+    report = env.profile_report()
+    assert all(row['calls'] == 0 for row in report['phases'].values())
+    assert report['counters'] == {}
+    env.close()
+
+
+def test_no_profile_leaves_methods_uninstrumented():
+    env = KuiperEscape(profile=False)
+    objects = get_objects(env)
+    for key, name in INSTRUMENTED:
+        # Timed methods shadow the class methods as instance attributes
+        assert name not in vars(objects[key]), (key, name)
+    with pytest.raises(RuntimeError):
+        env.profile_report()
+    env.close()
+
+    env = KuiperEscape(profile=True)
+    objects = get_objects(env)
+    for key, name in INSTRUMENTED:
+        assert name in vars(objects[key]), (key, name)
+    env.close()
@@ -0,0 +1,72 @@
+# Standard imports
+import os
+import random
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape, EpisodeRecorder, EpisodeReplayer, load_episodes
+
+ENV_KWARGS = {'lives_start': 1, 'rock_rate': 8}
+
+
+def run(env, n_steps, seed):
+    """Observations and rewards of n_steps random actions"""
+    rng = random.Random(seed)
+    observations, rewards = [env.reset()], []
+    for _ in range(n_steps):
+        observation, reward, done, _ = env.step(rng.randrange(5))
+        observations.append(observation)
+        rewards.append(reward)
+        if done:
+            break
+    return observations, rewards
+
+
+def test_record_replay_round_trip(tmp_path):
+    path = os.path.join(str(tmp_path), 'episodes.ker')
+    env = EpisodeRecorder(KuiperEscape(**ENV_KWARGS), path, seed=0)
+    recorded = [run(env, 400, seed) for seed in range(3)]
+    env.close()
+
+    episodes = load_episodes(path)
+    assert len(episodes) == 3
+    for episode, (observations, rewards) in zip(episodes, recorded):
+        assert len(episode.actions) == len(rewards)
+        replayer = EpisodeReplayer(episode)
+
+        # Random access, backwards included
+        for index in (len(rewards), 0, len(rewards) // 2):
+            np.testing.assert_array_equal(replayer.get_frame(index), observations[index])
+
+        replayer.reset()
+        for index, action in enumerate(episode.actions):
+            observation, reward, _, _ = replayer.env.step(int(action))
+            np.testing.assert_array_equal(observation, observations[index + 1])
+            assert reward == rewards[index]
+
+
+def test_envs_do_not_share_rng_state():
+    alone = KuiperEscape(**ENV_KWARGS)
+    alone.seed(1)
+    expected, _ = run(alone, 200, 0)
+
+    # Stepping another env, or drawing from the global RNGs, in between the
+    # steps of the env does not change its episode
+    env = KuiperEscape(**ENV_KWARGS)
+    other = KuiperEscape(**ENV_KWARGS)
+    env.seed(1)
+    other.seed(2)
+    env.reset()
+    other.reset()
+    rng, other_rng = random.Random(0), random.Random(1)
+    observations = [expected[0]]
+    for _ in range(len(expected) - 1):
+        observations.append(env.step(rng.randrange(5))[0])
+        other.step(other_rng.randrange(5))
+        random.random()
+        np.random.random()
+    for observation, reference in zip(observations, expected):
+        np.testing.assert_array_equal(observation, reference)
+    assert not np.array_equal(other.get_state(), env.get_state())
@@ -0,0 +1,104 @@
+# Standard imports
+import math
+import random
+
+# 3rd party imports
+import pytest
+
+# Local imports
+from gym_kuiper_escape.envs.kuiper_escape.core import Rect
+from gym_kuiper_escape.envs.kuiper_escape.grid import SpatialGrid
+from gym_kuiper_escape.envs.kuiper_escape.rock import ROCK_KINEMATICS
+
+SCREEN_SIZE = 512
+
+
+def expected_spans(pool, grid):
+    return {
+        index: grid.get_span(Rect(*pool.rects[index].tolist()))
+        for index in pool.get_indices().tolist()
+    }
+
+
+@pytest.mark.parametrize('kinematics', list(ROCK_KINEMATICS))
+def test_grid_synced_on_query(kinematics):
+    grid = SpatialGrid(SCREEN_SIZE, 64)
+    pool = ROCK_KINEMATICS[kinematics](SCREEN_SIZE, speed_min=5, speed_max=10, grid=grid)
+    rng = random.Random(0)
+    for frame in range(300):
+        pool.spawn(rng=rng)
+        pool.update()
+        if not len(pool):
+            continue
+        if frame % 7 == 0:
+            pool.release(int(pool.get_indices()[0]))
+        if frame % 11 == 0 and len(pool):
+            pool.move_to(int(pool.get_indices()[-1]), rng.uniform(0, 512), rng.uniform(0, 512))
+
+        # Spawns and moves are only registered once the grid is synced
+        if frame % 5 == 0:
+            pool.sync_grid()
+            assert grid.spans == expected_spans(pool, grid)
+
+    pool.set_params(pool.get_params())
+    assert len(grid) == 0
+    pool.sync_grid()
+    assert grid.spans == expected_spans(pool, grid)
+
+
+def test_analytic_kinematics_match_step_kinematics():
+    pools = {
+        kinematics: ROCK_KINEMATICS[kinematics](SCREEN_SIZE, speed_min=2, speed_max=10)
+        for kinematics in ('step', 'analytic')
+    }
+    rngs = {kinematics: random.Random(0) for kinematics in pools}
+    released = {kinematics: {} for kinematics in pools}
+    for frame in range(1000):
+        for kinematics, pool in pools.items():
+            if frame % 3 == 0:
+                pool.spawn(rng=rngs[kinematics])
+            alive = set(pool.serial[pool.get_indices()].tolist())
+            pool.update()
+            gone = alive - set(pool.serial[pool.get_indices()].tolist())
+            released[kinematics].update(dict.fromkeys(gone, frame))
+
+        # Same rocks in flight (in spawn order, released slots are reused in
+        # a different order), at the same positions
+        step, analytic = pools['step'], pools['analytic']
+        indices = step.get_indices()
+        serials = analytic.serial[analytic.get_indices()]
+        assert serials.tolist() == step.serial[indices].tolist()
+        params = analytic.get_params()
+        assert params[:, 0] == pytest.approx(step.x[indices])
+        assert params[:, 1] == pytest.approx(step.y[indices])
+        # Rects can rarely be a pixel apart, see AnalyticRockPool
+        assert abs(params[:, 8:12] - step.rects[indices]).max(initial=0) <= 1
+
+    # Every rock left the screen on the same frame
+    assert len(released['step']) > 100
+    assert released['analytic'] == released['step']
+
+
+@pytest.mark.parametrize('kinematics', list(ROCK_KINEMATICS))
+@pytest.mark.parametrize('x, y, angle, speed', [
+    (500, 256, 0, 4),  # right, x 524 and the rect left 514 after 6 frames
+    (5, 256, math.pi, 3),  # left, x -13 and the rect right -3
+    (256, 5, 0.5 * math.pi, 3),  # up
+    (256, 500, 1.5 * math.pi, 4)  # down
+])
+def test_rock_leaving_the_screen_frees_its_slot(kinematics, x, y, angle, speed):
+    pool = ROCK_KINEMATICS[kinematics](SCREEN_SIZE)
+    size = 20
+    index = pool.add((
+        x, y, size, speed, angle, math.cos(angle), math.sin(angle), 0,
+        x - size // 2, y - size // 2, size, size
+    ))
+    for _ in range(5):
+        pool.update()
+        assert pool.alive[index]
+    pool.update()
+    assert not pool.alive[index]
+    assert len(pool) == 0
+
+    # The freed slot is handed out again
+    assert pool.acquire() == index
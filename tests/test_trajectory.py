@@ -0,0 +1,83 @@
+# Standard imports
+import os
+
+# 3rd party imports
+import numpy as np
+import pytest
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+from gym_kuiper_escape.envs.trajectory import MemmapColumn, TrajectoryRecorder, TrajectoryDataset
+
+
+def record(path, n_steps, close=True):
+    env = TrajectoryRecorder(KuiperEscape(rock_rate=4, lives_start=1000), path, capacity=16)
+    env.seed(0)
+    env.reset()
+    for i in range(n_steps):
+        env.step(i % 5)
+    if close:
+        env.close()
+    return env
+
+
+def test_sample_next_obs(tmp_path):
+    record(str(tmp_path), 40)
+    dataset = TrajectoryDataset(str(tmp_path))
+    batch = dataset.sample(256, rng=np.random.default_rng(0))
+    assert len(batch['obs']) == 256
+    assert len(dataset.dead_ends) == 1
+
+
+def test_sample_after_flush_mid_episode(tmp_path):
+    # Recording interrupted mid-episode: only the flushed rows are indexed,
+    # and the next observation of the last one is not
+    env = record(str(tmp_path), 50, close=False)
+    env.flush()
+    dataset = TrajectoryDataset(str(tmp_path))
+    assert len(dataset) == 50
+    assert dataset.n_episodes == 0
+    assert list(dataset.dead_ends) == [49]
+
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        batch = dataset.sample(64, rng=rng)
+        assert batch['obs'].shape == (64,) + dataset.columns['obs'].shape[1:]
+        assert batch['next_obs'].shape == batch['obs'].shape
+    np.testing.assert_array_equal(
+        dataset.sample(1000, rng=rng)['iteration'] < 50, True
+    )
+
+
+# A header without room for growth (as written by numpy 1.21) is 128 bytes
+# long for the (1,) * 20 rows up to 99 rows, and 192 bytes from 999 rows on
+@pytest.mark.parametrize('shape, dtype', [
+    ((1,) * 20, np.uint8),
+    ((64, 1), np.float16),
+    ((), np.bool_)
+])
+def test_column_resize_across_shape_width(tmp_path, shape, dtype):
+    path = os.path.join(str(tmp_path), 'column.npy')
+    column = MemmapColumn(path, shape, dtype, 16)
+    offset = column.offset
+    assert offset % 64 == 0
+    rng = np.random.default_rng(0)
+    rows = (rng.random((5000,) + shape) * 100).astype(dtype)
+    for n in range(len(rows)):
+        column.reserve(n + 1)
+        column.array[n] = rows[n]
+    assert column.capacity == 8192
+    column.resize(len(rows))
+    column.close()
+
+    assert column.offset == offset
+    array = np.load(path, mmap_mode='r')
+    assert array.offset == offset
+    assert array.shape == rows.shape
+    np.testing.assert_array_equal(array, rows)
+    del array
+
+    # Truncated to fewer digits again
+    column.resize(7)
+    np.testing.assert_array_equal(np.load(path), rows[:7])
+    column.close()
@@ -0,0 +1,113 @@
+# Standard imports
+import threading
+import time
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape, VideoRecorder
+
+ENV_KWARGS = {'lives_start': 1000, 'rock_rate': 8}
+
+
+class SlowWriter:
+    """Encoder stub that keeps copies of the frames, and only writes once
+    `release` is set (then after `delay` seconds per frame)
+    """
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.release = threading.Event()
+        self.episodes = []
+        self.frames = []
+        self.n_closed = 0
+
+    def open(self, episode):
+        self.episodes.append(episode)
+
+    def write(self, frame):
+        self.release.wait()
+        time.sleep(self.delay)
+        self.frames.append(frame.copy())
+
+    def close(self):
+        self.n_closed += 1
+
+
+def make_recorder(tmp_path, writer, **kwargs):
+    env = KuiperEscape(**ENV_KWARGS)
+    env.seed(0)
+    recorder = VideoRecorder(env, str(tmp_path), **kwargs)
+    recorder.writer = writer
+    return recorder
+
+
+def get_frames(n_steps):
+    """Screens of a same-seed env after the reset and every step"""
+    env = KuiperEscape(**ENV_KWARGS)
+    env.seed(0)
+    frames = []
+    for i in range(n_steps + 1):
+        if i == 0:
+            env.reset()
+        else:
+            env.step(i % 5)
+        env.game.draw()
+        view = env.get_pixels_view()
+        frames.append(view[:, :, ::-1].copy())
+        del view
+    env.close()
+    return frames
+
+
+def test_frames_written_in_order(tmp_path):
+    n_steps = 20
+    writer = SlowWriter(delay=0.002)
+    writer.release.set()
+    recorder = make_recorder(tmp_path, writer, n_buffers=2)
+    recorder.reset()
+    for i in range(1, n_steps + 1):
+        recorder.step(i % 5)
+    recorder.close()
+
+    # Back-pressure: no frame is dropped, however slow the writer
+    assert recorder.stats() == {'captured': n_steps + 1, 'written': n_steps + 1, 'dropped': 0}
+    assert writer.episodes == [0]
+    assert len(writer.frames) == n_steps + 1
+    for frame, expected in zip(writer.frames, get_frames(n_steps)):
+        np.testing.assert_array_equal(frame, expected)
+
+
+def test_drop_frames_while_writer_is_busy(tmp_path):
+    n_steps = 10
+    writer = SlowWriter()
+    recorder = make_recorder(tmp_path, writer, n_buffers=2, drop_frames=True)
+    recorder.reset()
+    for i in range(1, n_steps + 1):
+        recorder.step(i % 5)
+
+    # The writer holds on to the first frame, so both buffers stay queued
+    # after the reset and the first step, and all later frames are dropped
+    assert recorder.stats() == {'captured': 2, 'written': 0, 'dropped': n_steps - 1}
+    writer.release.set()
+    recorder.close()
+    assert recorder.stats() == {'captured': 2, 'written': 2, 'dropped': n_steps - 1}
+    for frame, expected in zip(writer.frames, get_frames(1)):
+        np.testing.assert_array_equal(frame, expected)
+
+
+def test_close_joins_the_worker(tmp_path):
+    writer = SlowWriter(delay=0.01)
+    writer.release.set()
+    recorder = make_recorder(tmp_path, writer, n_buffers=4)
+    recorder.reset()
+    for i in range(8):
+        recorder.step(i % 5)
+    assert recorder.worker.is_alive()
+    recorder.close()
+
+    # All queued frames are written before close returns
+    assert not recorder.worker.is_alive()
+    assert len(writer.frames) == 9
+    assert writer.n_closed == 2  # before the first episode, and at the end
+    recorder.close()
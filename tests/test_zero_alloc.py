@@ -0,0 +1,85 @@
+"""
+Zero Allocation Check
+
+Checks that env.step() does not allocate NumPy arrays in steady state, with
+lidar observations from the analytic engine (lidar_engine='analytic') and
+copy_obs=False (the observation is the env's shared buffer).
+
+NumPy data buffers are traced by tracemalloc, but a temporary array is freed
+before the step returns and only shows up in the peak of the traced memory.
+That peak also includes the Python objects of the step (frames, the info
+dict), so the check runs the exact same episode with 32 beams and 64 rock
+slots, then with 4096 beams, and with 4096 slots. The Python allocations are
+the same in every run, while any array allocated during a step grows with
+the number of beams or slots, to at least 4 KiB (4096 bools), more than the
+whole peak of the small run. The peaks may still differ by a few bytes of
+Python objects, so differences below NOISE_BYTES are ignored.
+"""
+# Standard imports
+import tracemalloc
+
+# 3rd party imports
+import numpy as np
+import pytest
+
+# Local imports
+from gym_kuiper_escape.envs import KuiperEscape
+
+SIZES = [(32, 64), (4096, 64), (32, 4096)]  # lidar beams, rock slots
+NOISE_BYTES = 512
+
+
+def numpy_memory():
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.DomainFilter(True, np.lib.tracemalloc_domain)
+    ])
+    return sum(trace.size for trace in snapshot.traces)
+
+
+def step_peak(n_beams, capacity, n_steps, lidar_motion, n_warmup=100):
+    """Largest transient traced memory of one step, and the change of the
+    NumPy memory in use over all steps
+    """
+    env = KuiperEscape(
+        mode='agent',
+        lives_start=n_warmup + n_steps,
+        rock_rate=5,
+        lidar_engine='analytic',
+        lidar_n_beams=n_beams,
+        copy_obs=False,
+        lidar_motion=lidar_motion
+    )
+    env.seed(0)
+    env.reset()
+
+    # Steady state: the pool and the lidar scratch arrays are fully grown
+    env.game.rocks.grow(capacity)
+    for i in range(n_warmup):
+        env.step(i % 5)
+
+    tracemalloc.start()
+    try:
+        numpy_start = numpy_memory()
+        peak = 0
+        for i in range(n_steps):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            observation = env.step(i % 5)[0]
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+            del observation
+        numpy_change = numpy_memory() - numpy_start
+    finally:
+        tracemalloc.stop()
+    env.close()
+    return peak, numpy_change
+
+
+@pytest.mark.parametrize('lidar_motion', [False, True])
+def test_step_allocates_no_arrays(lidar_motion):
+    peaks = []
+    for n_beams, capacity in SIZES:
+        peak, numpy_change = step_peak(n_beams, capacity, 200, lidar_motion)
+        assert numpy_change == 0
+        peaks.append(peak)
+    for peak in peaks[1:]:
+        assert abs(peak - peaks[0]) < NOISE_BYTES, peaks